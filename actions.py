@@ -0,0 +1,248 @@
+"""Legal joint actions for a |request|, enumerated once and stored compactly.
+
+An option is what one active slot does:
+
+    ("move", move_index, target, gimmick)  target is None when the move takes
+                                           none; gimmick is "", "terastallize"
+                                           or "mega"
+    ("switch", team_index)
+    ("pass",)
+
+and a joint action is one option per slot. legal_actions() builds each
+slot's options from the request, then takes the product and drops joint
+actions the server would reject or that duplicate another one: two slots
+switching in the same Pokémon, two gimmicks of a kind in one turn, fewer
+replacements than a forced switch can fill, and targets at empty foe slots
+(which the server redirects, so they repeat the other target).
+"""
+
+from array import array
+from itertools import product
+from typing import Callable, Iterator, Optional
+
+from battle_state import BattleState
+from move_index import ALLY_TARGETS, CHOSEN_TARGETS, get_move
+
+PASS = ("pass",)
+
+# Request flag -> gimmick word appended to the move choice
+GIMMICKS = (("canTerastallize", "terastallize"), ("canMegaEvo", "mega"))
+
+
+def option_text(option: tuple) -> str:
+    """One slot's option -> its part of the /choose text"""
+    if option[0] == "move":
+        text = f"move {option[1] + 1}"
+        if option[2] is not None:
+            text += f" {option[2]}"
+        if len(option) > 3 and option[3]:
+            text += f" {option[3]}"
+        return text
+    if option[0] == "switch":
+        return f"switch {option[1] + 1}"
+    return "pass"
+
+
+def parse_option(text: str) -> Optional[tuple]:
+    """Inverse of option_text; None for anything it doesn't recognise"""
+    parts = text.split()
+    if parts == ["pass"]:
+        return PASS
+    if len(parts) == 2 and parts[0] == "switch" and parts[1].isdigit():
+        return ("switch", int(parts[1]) - 1)
+    if len(parts) < 2 or parts[0] != "move" or not parts[1].isdigit():
+        return None
+    target, gimmick = None, ""
+    for part in parts[2:]:
+        if part.lstrip("-").isdigit():
+            target = int(part)
+        else:
+            gimmick = part
+    return ("move", int(parts[1]) - 1, target, gimmick)
+
+
+def to_choice(action: tuple[tuple, ...]) -> str:
+    """Joint action -> the text after /choose"""
+    return ", ".join(option_text(option) for option in action)
+
+
+class ActionSet:
+    """Joint actions as rows of indices into a table of per-slot options.
+
+    options lists every slot's options, slot 0's first; table is a flat array
+    of len(self) * width indices into it, row-major, so a policy can score
+    each option once and gather the rows; with numpy,
+    numpy.frombuffer(table, numpy.uint16).reshape(-1, width) is a zero-copy
+    view. Indexing and iteration give joint actions as option tuples.
+    """
+
+    __slots__ = ("options", "width", "table")
+
+    def __init__(self, options: list[tuple], width: int, table: array):
+        self.options = options
+        self.width = width
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.table) // self.width if self.width else 0
+
+    def __getitem__(self, index: int) -> tuple[tuple, ...]:
+        return tuple(self.options[i] for i in self.row(index))
+
+    def __iter__(self) -> Iterator[tuple[tuple, ...]]:
+        return (self[i] for i in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f"ActionSet({len(self)} actions, {len(self.options)} options)"
+
+    def row(self, index: int) -> array:
+        if index < 0:
+            index += len(self)
+        return self.table[index * self.width : (index + 1) * self.width]
+
+    def choice(self, index: int) -> str:
+        return to_choice(self[index])
+
+    def index(self, action: tuple[tuple, ...]) -> int:
+        """Row of a joint action; ValueError if it isn't legal"""
+        for i, candidate in enumerate(self):
+            if candidate == action:
+                return i
+        raise ValueError(f"{to_choice(action)!r} is not a legal action")
+
+    def where(self, keep: Callable[[tuple[tuple, ...]], bool]) -> "ActionSet":
+        """The joint actions keep() accepts, sharing this set's options table"""
+        table = array("H")
+        for i in range(len(self)):
+            if keep(self[i]):
+                table.extend(self.row(i))
+        return ActionSet(self.options, self.width, table)
+
+    def without_gimmicks(self) -> "ActionSet":
+        return self.where(lambda action: not any(map(_gimmick, action)))
+
+
+def _gimmick(option: tuple) -> str:
+    return option[3] if option[0] == "move" and len(option) > 3 else ""
+
+
+def _open_foe_slots(state: Optional[BattleState], active_count: int) -> list[int]:
+    """Foe positions (1-based) worth aiming at; both when we can't tell"""
+    every = list(range(1, active_count + 1))
+    foe_side = state.foe_side if state is not None else None
+    if foe_side is None:
+        return every
+    occupied = [
+        position + 1
+        for position, mon in enumerate(foe_side.active[:active_count])
+        if mon is not None and not mon.fainted
+    ]
+    return occupied or every
+
+
+def _slot_options(
+    slot: int,
+    slot_request: dict,
+    bench: list[int],
+    active_count: int,
+    foe_slots: list[int],
+    ally_alive: bool,
+    gimmicks: bool,
+) -> list[tuple]:
+    """Every option for one active slot of a move request"""
+    flags = [""]
+    if gimmicks:
+        flags += [word for key, word in GIMMICKS if slot_request.get(key)]
+    options = []
+    for i, move in enumerate(slot_request.get("moves", [])):
+        if move.get("disabled"):
+            continue
+        target = move.get("target")
+        if target is None:
+            info = get_move(move.get("id") or move.get("move", ""))
+            target = info.target if info else "normal"
+        if active_count < 2 or target not in CHOSEN_TARGETS:
+            targets = [None]
+        elif target in ALLY_TARGETS:
+            # Allies are negative: slot 0 (a) is -1, slot 1 (b) is -2
+            targets = [-(2 - slot)] if ally_alive else []
+        else:
+            targets = foe_slots
+        options.extend(("move", i, aim, flag) for aim in targets for flag in flags)
+    if not slot_request.get("trapped"):
+        options.extend(("switch", i) for i in bench)
+    return options
+
+
+def legal_actions(
+    request: dict, state: Optional[BattleState] = None, gimmicks: bool = True
+) -> ActionSet:
+    """Every distinct legal joint action for a request.
+
+    state, when given, lets foe targets skip empty positions. gimmicks=False
+    leaves out terastallize/mega variants, for consumers that can't tell
+    them apart.
+    """
+    side_pokemon = request.get("side", {}).get("pokemon", [])
+    active = request.get("active", [])
+    bench = [
+        i
+        for i, mon in enumerate(side_pokemon)
+        if not mon.get("active") and not mon.get("condition", "").endswith(" fnt")
+    ]
+
+    per_slot = []
+    min_switches = 0
+    force_switch = request.get("forceSwitch")
+    if force_switch:
+        if not isinstance(force_switch, list):
+            force_switch = [force_switch]
+        for must_switch in force_switch:
+            per_slot.append(
+                [("switch", i) for i in bench] + [PASS] if must_switch else [PASS]
+            )
+        # The server takes pass only for slots there is nobody left to fill
+        min_switches = min(len(bench), sum(map(bool, force_switch)))
+    elif active:
+        fainted = [
+            side_pokemon[slot].get("condition", "").endswith(" fnt")
+            if slot < len(side_pokemon)
+            else False
+            for slot in range(len(active))
+        ]
+        foe_slots = _open_foe_slots(state, len(active))
+        for slot, slot_request in enumerate(active):
+            if fainted[slot] or slot_request.get("commanding"):
+                per_slot.append([PASS])
+                continue
+            ally_alive = len(active) > 1 and not fainted[1 - slot]
+            options = _slot_options(
+                slot, slot_request, bench, len(active), foe_slots, ally_alive, gimmicks
+            )
+            if not options:
+                # Only an ally-targeted move left and no ally: the server
+                # still wants a move, so offer it untargeted
+                options = _slot_options(
+                    slot, slot_request, bench, 1, foe_slots, False, gimmicks
+                )
+            per_slot.append(options or [PASS])
+
+    # Options are numbered per slot: slot 0's "move 1" is not slot 1's
+    options: list[tuple] = []
+    ids: list[dict[tuple, int]] = []
+    for slot_options in per_slot:
+        ids.append({})
+        for option in slot_options:
+            ids[-1][option] = len(options)
+            options.append(option)
+
+    table = array("H")
+    for action in product(*per_slot):
+        switches = [option[1] for option in action if option[0] == "switch"]
+        if len(switches) < min_switches or len(set(switches)) < len(switches):
+            continue
+        used = [flag for flag in map(_gimmick, action) if flag]
+        if len(set(used)) < len(used):
+            continue
+        table.extend(ids[slot][option] for slot, option in enumerate(action))
+    return ActionSet(options, len(per_slot), table)
@@ -1,8 +1,11 @@
 import asyncio
+import logging
 import random
 import string
 from showdown_bot import ShowdownBot,generate_random_username
 
+logger = logging.getLogger(__name__)
+
 
 class OfficialBattleManager:
     def __init__(self):
@@ -17,16 +20,16 @@ class OfficialBattleManager:
     
     async def test_against_real_players(self):
         """Test bot against real players on official server"""
-        print(f"🚀 Starting bot: {self.bot_name}")
-        print(f"🌐 Connecting to official Pokémon Showdown server")
-        print(f"🎯 Will search for random battles...")
-        print(f"🔗 Server: {self.official_ws_url}")
+        logger.info("🚀 Starting bot: %s", self.bot_name)
+        logger.info("🌐 Connecting to official Pokémon Showdown server")
+        logger.info("🎯 Will search for random battles...")
+        logger.info("🔗 Server: %s", self.official_ws_url)
         
         try:
             await self.bot.connect_and_run()
         except KeyboardInterrupt:
-            print(f"\n⏹️ {self.bot_name}: Stopped by user")
+            logger.info("⏹️ %s: Stopped by user", self.bot_name)
         except Exception as e:
-            print(f"❌ {self.bot_name}: Error: {e}")
+            logger.error("❌ %s: Error: %s", self.bot_name, e)
 
 
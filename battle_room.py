@@ -0,0 +1,65 @@
+import asyncio
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+from battle_state import BattleState
+
+if TYPE_CHECKING:
+    from replay_log import BattleRecord
+
+
+class GameResult(NamedTuple):
+    """How one finished battle went, from the bot's side"""
+
+    room_id: str
+    winner: Optional[str]  # None for a tie or an abandoned battle
+    won: bool
+    turns: int
+    decision_times: tuple[float, ...]  # seconds spent on each |request|
+
+
+class BattleRoom:
+    """State for a single battle room, so one connection can play several battles"""
+
+    def __init__(self, room_id: str):
+        self.room_id = room_id
+        self.current_request: Optional[dict] = None
+        self.fainted_slots: set[int] = set()
+        self.team: list[dict] = []
+        self.finished = False
+        self.winner: Optional[str] = None
+        self.decision_times: list[float] = []
+        self.state = BattleState()
+        self.record: Optional["BattleRecord"] = None  # set when replays are kept
+        # The choice being worked out for the latest |request|, and when that
+        # request was received
+        self.decision: Optional[asyncio.Task] = None
+        self.request_recv = 0.0
+        # Frames that arrived while the choice was being made, still to handle
+        self.held: list[list[str]] = []
+
+    def cancel_decision(self):
+        """Drop a choice still being worked out; its request is out of date"""
+        if self.decision is not None and not self.decision.done():
+            self.decision.cancel()
+        self.decision = None
+
+    @property
+    def player_id(self) -> Optional[str]:
+        """"p1" / "p2", learned from |request|"""
+        return self.state.player_id
+
+    @property
+    def turn(self) -> int:
+        return self.state.turn
+
+    def result(self, username: str) -> GameResult:
+        return GameResult(
+            self.room_id,
+            self.winner,
+            self.winner == username,
+            self.turn,
+            tuple(self.decision_times),
+        )
+
+    def __repr__(self):
+        return f"BattleRoom({self.room_id!r}, turn={self.turn})"
@@ -0,0 +1,439 @@
+from array import array
+from typing import Callable, Optional
+
+from condition import parse_condition
+from move_index import to_id
+
+BOOST_STATS = ("atk", "def", "spa", "spd", "spe", "accuracy", "evasion")
+BOOST_INDEX = {stat: i for i, stat in enumerate(BOOST_STATS)}
+
+POSITIONS = "abc"
+
+
+def split_ident(ident: str) -> tuple[str, str, str]:
+    """"p1a: Garchomp" -> ("p1", "a", "Garchomp"); "p1: Garchomp" -> ("p1", "", ...)"""
+    head, _, name = ident.partition(": ")
+    return head[:2], head[2:3], name.strip()
+
+
+def parse_details(details: str) -> tuple[str, int]:
+    """"Garchomp, L77, M" -> ("Garchomp", 77)"""
+    parts = details.split(", ")
+    level = 100
+    for part in parts[1:]:
+        if part.startswith("L") and part[1:].isdigit():
+            level = int(part[1:])
+    return parts[0], level
+
+
+class PokemonState:
+    """One Pokémon as far as the protocol has revealed it"""
+
+    __slots__ = (
+        "name",
+        "species",
+        "level",
+        "hp",
+        "max_hp",
+        "status",
+        "boosts",
+        "item",
+        "ability",
+        "moves",
+        "active",
+        "tera_type",
+        "terastallized",
+    )
+
+    def __init__(self, name: str, species: str = "", level: int = 100):
+        self.name = name
+        self.species = species or name
+        self.level = level
+        self.hp = 100
+        self.max_hp = 100
+        self.status = ""
+        self.boosts = array("b", bytes(len(BOOST_STATS)))
+        self.item: Optional[str] = None  # None = unknown, "" = known to have none
+        self.ability: Optional[str] = None
+        self.moves: list[str] = []  # move ids, in the order they were revealed
+        self.active = False
+        self.tera_type: Optional[str] = None
+        self.terastallized = False
+
+    @property
+    def fainted(self) -> bool:
+        return self.status == "fnt" or self.hp <= 0
+
+    @property
+    def hp_fraction(self) -> float:
+        if self.fainted:
+            return 0.0
+        return self.hp / self.max_hp if self.max_hp else 1.0
+
+    def set_condition(self, condition: str):
+        parsed = parse_condition(condition)
+        self.hp = parsed.hp
+        if parsed.max_hp:
+            self.max_hp = parsed.max_hp
+        self.status = parsed.status
+
+    def boost(self, stat: str, amount: int):
+        i = BOOST_INDEX.get(stat)
+        if i is not None:
+            self.boosts[i] = max(-6, min(6, self.boosts[i] + amount))
+
+    def clear_boosts(self):
+        for i in range(len(self.boosts)):
+            self.boosts[i] = 0
+
+    def reveal_move(self, move_id: str):
+        if move_id not in self.moves:
+            self.moves.append(move_id)
+
+    def __repr__(self):
+        return f"PokemonState({self.species!r}, {self.hp}/{self.max_hp} {self.status})"
+
+
+class SideState:
+    """One player's side: their Pokémon, who is active and side conditions"""
+
+    __slots__ = ("player", "name", "pokemon", "active", "conditions", "team")
+
+    def __init__(self, player: str):
+        self.player = player
+        self.name = ""
+        self.pokemon: dict[str, PokemonState] = {}
+        self.active: list[Optional[PokemonState]] = [None] * len(POSITIONS)
+        self.conditions: dict[str, int] = {}  # condition -> layers
+        self.team: list[PokemonState] = []  # request order, only known for our side
+
+    def get(self, name: str) -> PokemonState:
+        mon = self.pokemon.get(name)
+        if mon is None:
+            mon = self.pokemon[name] = PokemonState(name)
+        return mon
+
+    def active_pokemon(self) -> list[PokemonState]:
+        return [mon for mon in self.active if mon is not None]
+
+
+class BattleState:
+    """Battle view built up line by line from the protocol stream"""
+
+    __slots__ = (
+        "sides",
+        "player_id",
+        "battle_format",
+        "gametype",
+        "turn",
+        "weather",
+        "terrain",
+        "pseudo_weather",
+        "winner",
+    )
+
+    def __init__(self):
+        self.sides = {"p1": SideState("p1"), "p2": SideState("p2")}
+        self.player_id: Optional[str] = None
+        self.battle_format: Optional[str] = None  # format id, from |tier|
+        self.gametype = "singles"
+        self.turn = 0
+        self.weather: Optional[str] = None
+        self.terrain: Optional[str] = None
+        self.pseudo_weather: set[str] = set()
+        self.winner: Optional[str] = None
+
+    @property
+    def our_side(self) -> Optional[SideState]:
+        return self.sides.get(self.player_id) if self.player_id else None
+
+    @property
+    def foe_side(self) -> Optional[SideState]:
+        if not self.player_id:
+            return None
+        return self.sides["p2" if self.player_id == "p1" else "p1"]
+
+    def pokemon(self, ident: str) -> Optional[PokemonState]:
+        player, _, name = split_ident(ident)
+        side = self.sides.get(player)
+        return side.get(name) if side is not None and name else None
+
+    def apply(self, msg_type: str, args: list[str]):
+        """Fold one parsed protocol line into the state"""
+        handler = _HANDLERS.get(msg_type)
+        if handler is not None:
+            try:
+                handler(self, args)
+            except (IndexError, ValueError):
+                pass  # malformed or truncated line; keep the last good state
+
+    def update_from_request(self, request: dict):
+        """Refresh our side from the authoritative |request| side data"""
+        side_data = request.get("side")
+        if not side_data:
+            return
+        self.player_id = side_data.get("id", self.player_id)
+        side = self.sides.get(self.player_id)
+        if side is None:
+            return
+        side.name = side_data.get("name", side.name)
+
+        team = []
+        for data in side_data.get("pokemon", []):
+            _, _, name = split_ident(data.get("ident", ""))
+            mon = side.get(name)
+            if "details" in data:
+                mon.species, mon.level = parse_details(data["details"])
+            mon.set_condition(data.get("condition", "100/100"))
+            mon.active = data.get("active", False)
+            mon.item = data.get("item", mon.item)
+            mon.ability = data.get("ability") or data.get("baseAbility") or mon.ability
+            mon.moves = list(data.get("moves", mon.moves))
+            mon.tera_type = data.get("teraType", mon.tera_type)
+            mon.terastallized = bool(data.get("terastallized"))
+            team.append(mon)
+        side.team = team
+
+
+def _kwargs(args: list[str]) -> dict[str, str]:
+    """Pull "[from] item: Leftovers" style suffix arguments into a dict"""
+    found = {}
+    for arg in args:
+        if arg.startswith("["):
+            key, _, value = arg[1:].partition("] ")
+            found[key] = value
+    return found
+
+
+def _reveal_source(state: BattleState, mon: PokemonState, args: list[str]):
+    """Items and abilities named by [from] tags belong to the [of] Pokémon"""
+    kwargs = _kwargs(args)
+    source = kwargs.get("from", "")
+    owner = state.pokemon(kwargs["of"]) if "of" in kwargs else mon
+    if owner is None:
+        return
+    if source.startswith("item: "):
+        owner.item = source[6:]
+    elif source.startswith("ability: "):
+        owner.ability = source[9:]
+
+
+def _on_switch(state: BattleState, args: list[str]):
+    player, position, name = split_ident(args[0])
+    side = state.sides[player]
+    slot = POSITIONS.index(position) if position else 0
+    previous = side.active[slot]
+    if previous is not None:
+        previous.active = False
+        previous.clear_boosts()
+    mon = side.get(name)
+    mon.species, mon.level = parse_details(args[1])
+    if len(args) > 2:
+        mon.set_condition(args[2])
+    mon.active = True
+    side.active[slot] = mon
+
+
+def _on_details(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None:
+        mon.species, mon.level = parse_details(args[1])
+
+
+def _on_hp(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None:
+        mon.set_condition(args[1])
+        _reveal_source(state, mon, args[2:])
+
+
+def _on_faint(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None:
+        mon.hp = 0
+        mon.status = "fnt"
+
+
+def _on_boost(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None:
+        mon.boost(args[1], int(args[2]))
+
+
+def _on_unboost(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None:
+        mon.boost(args[1], -int(args[2]))
+
+
+def _on_setboost(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    i = BOOST_INDEX.get(args[1])
+    if mon is not None and i is not None:
+        mon.boosts[i] = int(args[2])
+
+
+def _on_clearboost(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None:
+        mon.clear_boosts()
+
+
+def _on_clearallboost(state: BattleState, args: list[str]):
+    for side in state.sides.values():
+        for mon in side.active_pokemon():
+            mon.clear_boosts()
+
+
+def _on_clearnegativeboost(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None:
+        for i, value in enumerate(mon.boosts):
+            if value < 0:
+                mon.boosts[i] = 0
+
+
+def _on_status(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None:
+        mon.status = args[1]
+        _reveal_source(state, mon, args[2:])
+
+
+def _on_curestatus(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None and mon.status != "fnt":
+        mon.status = ""
+
+
+def _on_cureteam(state: BattleState, args: list[str]):
+    player, _, _ = split_ident(args[0])
+    for mon in state.sides[player].pokemon.values():
+        if mon.status != "fnt":
+            mon.status = ""
+
+
+def _on_weather(state: BattleState, args: list[str]):
+    state.weather = None if args[0] == "none" else args[0]
+
+
+def _effect_name(effect: str) -> str:
+    """"move: Stealth Rock" -> "Stealth Rock\""""
+    return effect.partition(": ")[2] or effect
+
+
+def _on_fieldstart(state: BattleState, args: list[str]):
+    name = _effect_name(args[0])
+    if name.endswith("Terrain"):
+        state.terrain = name
+    else:
+        state.pseudo_weather.add(name)
+
+
+def _on_fieldend(state: BattleState, args: list[str]):
+    name = _effect_name(args[0])
+    if name == state.terrain:
+        state.terrain = None
+    state.pseudo_weather.discard(name)
+
+
+def _on_sidestart(state: BattleState, args: list[str]):
+    side = state.sides[args[0][:2]]
+    name = _effect_name(args[1])
+    side.conditions[name] = side.conditions.get(name, 0) + 1
+
+
+def _on_sideend(state: BattleState, args: list[str]):
+    state.sides[args[0][:2]].conditions.pop(_effect_name(args[1]), None)
+
+
+def _on_move(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None and "[from]" not in "".join(args[3:]):
+        mon.reveal_move(to_id(args[1]))
+
+
+def _on_item(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None:
+        mon.item = args[1]
+
+
+def _on_enditem(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None:
+        mon.item = ""
+
+
+def _on_ability(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None:
+        mon.ability = args[1]
+
+
+def _on_terastallize(state: BattleState, args: list[str]):
+    mon = state.pokemon(args[0])
+    if mon is not None:
+        mon.tera_type = args[1]
+        mon.terastallized = True
+
+
+def _on_player(state: BattleState, args: list[str]):
+    if len(args) > 1 and args[0] in state.sides:
+        state.sides[args[0]].name = args[1]
+
+
+def _on_tier(state: BattleState, args: list[str]):
+    # "[Gen 9] Random Battle" -> "gen9randombattle", Showdown's format id
+    state.battle_format = to_id(args[0])
+
+
+def _on_gametype(state: BattleState, args: list[str]):
+    state.gametype = args[0]
+
+
+def _on_turn(state: BattleState, args: list[str]):
+    state.turn = int(args[0])
+
+
+def _on_win(state: BattleState, args: list[str]):
+    state.winner = args[0]
+
+
+_HANDLERS: dict[str, Callable[[BattleState, list[str]], None]] = {
+    "switch": _on_switch,
+    "drag": _on_switch,
+    "replace": _on_switch,
+    "detailschange": _on_details,
+    "-formechange": _on_details,
+    "-damage": _on_hp,
+    "-heal": _on_hp,
+    "-sethp": _on_hp,
+    "faint": _on_faint,
+    "-boost": _on_boost,
+    "-unboost": _on_unboost,
+    "-setboost": _on_setboost,
+    "-clearboost": _on_clearboost,
+    "-clearallboost": _on_clearallboost,
+    "-clearnegativeboost": _on_clearnegativeboost,
+    "-status": _on_status,
+    "-curestatus": _on_curestatus,
+    "-cureteam": _on_cureteam,
+    "-weather": _on_weather,
+    "-fieldstart": _on_fieldstart,
+    "-fieldend": _on_fieldend,
+    "-sidestart": _on_sidestart,
+    "-sideend": _on_sideend,
+    "move": _on_move,
+    "-item": _on_item,
+    "-enditem": _on_enditem,
+    "-ability": _on_ability,
+    "-terastallize": _on_terastallize,
+    "player": _on_player,
+    "tier": _on_tier,
+    "gametype": _on_gametype,
+    "turn": _on_turn,
+    "win": _on_win,
+}
+
+STATE_MESSAGE_TYPES = frozenset(_HANDLERS)
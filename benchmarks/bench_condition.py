@@ -0,0 +1,80 @@
+"""Per-request cost of reading HP/status: the old split-based parsers vs parse_condition.
+
+For every |request| in the log, each side Pokémon's condition is read the
+way one decision used to read it (a fainted check in the switch search plus
+an HP parse in the move handler) and then through the memoized parser.
+
+    python benchmarks/bench_condition.py [--rounds 20000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from condition import parse_condition  # noqa: E402
+
+LOG_PATH = os.path.join(ROOT, "data", "sample_battle.log")
+
+
+def load_conditions(path: str) -> list[list[str]]:
+    """Condition strings of every request's side, one list per request"""
+    requests = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("|request|") and len(line) > len("|request|\n"):
+                request = json.loads(line[len("|request|") :])
+                requests.append(
+                    [mon["condition"] for mon in request["side"]["pokemon"]]
+                )
+    return requests
+
+
+def legacy_read(condition: str) -> tuple[bool, int]:
+    fainted = condition.startswith("0") or "fnt" in condition.lower()
+    try:
+        if "/" in condition:
+            current_hp = int(condition.split("/")[0].split(" ")[-1])
+        else:
+            current_hp = 0 if condition == "0 fnt" else 100
+    except (ValueError, IndexError):
+        current_hp = 100
+    return fainted, current_hp
+
+
+def cached_read(condition: str) -> tuple[bool, float]:
+    parsed = parse_condition(condition)
+    return parsed.fainted, parsed.fraction
+
+
+def bench(read, requests: list[list[str]], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for conditions in requests:
+            for condition in conditions:
+                read(condition)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20000)
+    args = parser.parse_args()
+
+    requests = load_conditions(LOG_PATH)
+    total = len(requests) * args.rounds
+
+    legacy = bench(legacy_read, requests, args.rounds)
+    cached = bench(cached_read, requests, args.rounds)
+    for name, elapsed in (("split parsers", legacy), ("parse_condition", cached)):
+        print(f"{name:>16}: {elapsed / total * 1e6:6.2f} us/request")
+    print(f"{'speedup':>16}: {legacy / cached:.2f}x")
+    print(f"{'cache':>16}: {parse_condition.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Cost of scoring a turn with the damage engine, singles and doubles.
+
+Turns are synthetic: random species from the dex with four random damaging
+moves each, random HP and boosts. "rows" is collecting the option rows in
+Python, "score" the NumPy pass; "batched" scores the rows of --batch turns
+in a single call, which is what a shared evaluator across battles would do.
+The last column is how long --battles simultaneous decisions would take,
+against the 30 s request timeout.
+
+    python benchmarks/bench_damage.py [--turns 2000] [--batch 200] [--battles 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import damage  # noqa: E402
+from battle_state import BOOST_STATS, BattleState  # noqa: E402
+from move_index import load_move_index  # noqa: E402
+from pokedex import load_pokedex  # noqa: E402
+
+REQUEST_TIMEOUT = 30.0
+
+
+def random_turn(rng: random.Random, active_count: int):
+    """A BattleState from p1's side and the matching |request|"""
+    species = list(load_pokedex().values())
+    attacks = [m for m in load_move_index().values() if m.base_power > 0]
+    state = BattleState()
+    state.player_id = "p1"
+    request = {"active": []}
+    for player in ("p1", "p2"):
+        side = state.sides[player]
+        for slot in range(active_count):
+            mon = side.get(f"{player}-{slot}")
+            mon.species = rng.choice(species).name
+            mon.level = rng.randint(70, 100)
+            mon.hp = rng.randint(1, 100)
+            for i in range(len(BOOST_STATS)):
+                mon.boosts[i] = rng.randint(-2, 2)
+            mon.active = True
+            side.active[slot] = mon
+            side.team.append(mon)
+            if player == "p1":
+                moves = rng.sample(attacks, 4)
+                request["active"].append(
+                    {"moves": [{"id": m.id, "move": m.name} for m in moves]}
+                )
+    return state, request
+
+
+def bench_turns(engine, turns) -> tuple[float, float]:
+    rows_time = score_time = 0.0
+    for state, request in turns:
+        start = time.perf_counter()
+        rows, groups = engine.rows(state, request)
+        middle = time.perf_counter()
+        engine.score(rows, len(groups))
+        rows_time += middle - start
+        score_time += time.perf_counter() - middle
+    return rows_time / len(turns), score_time / len(turns)
+
+
+def bench_batched(engine, turns, batch: int) -> float:
+    """Per-turn cost of scoring batch turns' rows in one NumPy call"""
+    collected = []
+    for state, request in turns[:batch]:
+        collected.append(engine.rows(state, request))
+    rows, offset = [], 0
+    for turn_rows, groups in collected:
+        rows.extend((row[0] + offset,) + row[1:] for row in turn_rows)
+        offset += len(groups)
+    start = time.perf_counter()
+    repeats = 20
+    for _ in range(repeats):
+        engine.score(rows, offset)
+    return (time.perf_counter() - start) / repeats / len(collected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--battles", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not damage.available():
+        sys.exit("numpy is not installed")
+    rng = random.Random(args.seed)
+    engine = damage.DamageEngine()
+
+    print(
+        f"{'':>8}{'rows us':>10}{'score us':>10}{'turn us':>10}"
+        f"{'batched us':>12}{f'{args.battles} battles':>14}"
+    )
+    for name, active_count in (("singles", 1), ("doubles", 2)):
+        turns = [random_turn(rng, active_count) for _ in range(args.turns)]
+        engine.best_options(*turns[0])  # warm the dex and type table
+        rows_cost, score_cost = bench_turns(engine, turns)
+        batched = bench_batched(engine, turns, args.batch)
+        per_turn = rows_cost + score_cost
+        burst = per_turn * args.battles
+        print(
+            f"{name:>8}{rows_cost * 1e6:>10.1f}{score_cost * 1e6:>10.1f}"
+            f"{per_turn * 1e6:>10.1f}{(rows_cost + batched) * 1e6:>12.1f}"
+            f"{burst * 1e3:>11.1f} ms"
+        )
+    print(f"(request timeout: {REQUEST_TIMEOUT:.0f} s)")
+
+
+if __name__ == "__main__":
+    main()
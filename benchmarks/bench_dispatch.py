@@ -0,0 +1,164 @@
+"""Replay a captured battle log through the old if/elif chain and MessageDispatcher.
+
+Both sides route every line of every frame to a no-op handler, a plain
+function where the bot's is one (chat, turn, search updates and unhandled
+lines) and a coroutine that is awaited elsewhere. The dispatcher is the
+real MessageDispatcher, filled with the message types the bot registers,
+plus its fallback and an observer. So the numbers compare what a line
+costs to classify and hand off, not the work the handlers do. The
+dispatcher comes out level with the chain or a little ahead of it, by less
+than runs on one busy CPU vary: the table buys structure, not CPU.
+
+    python benchmarks/bench_dispatch.py [--rounds 2000] [--repeats 5]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from protocol import MessageDispatcher  # noqa: E402
+
+LOG_PATH = os.path.join(ROOT, "data", "sample_battle.log")
+
+USERNAME = "mrbot1"
+
+
+def load_frames(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        return [frame for frame in f.read().split("\n\n") if frame.strip()]
+
+
+# What ShowdownBot.register_default_handlers puts in the table
+BOT_TYPES = (
+    "challstr",
+    "updateuser",
+    "updatesearch",
+    "init",
+    "noinit",
+    "raw",
+    "request",
+    "win",
+    "tie",
+    "turn",
+    "pm",
+    "faint",
+    "error",
+    "nametaken",
+    "deinit",
+    "c",
+)
+
+
+# Handlers the bot has as plain functions; the rest are coroutines
+SYNC_TYPES = frozenset({"updatesearch", "turn", "c"})
+
+
+async def handler(room, args, line):
+    pass
+
+
+def sync_handler(room, args, line):
+    pass
+
+
+def observer(room, msg_type, args):
+    pass
+
+
+async def legacy_route(msg: str):
+    """The branch order of the original handle_message chain"""
+    for line in msg.split("\n"):
+        if line.startswith("|challstr|"):
+            await handler(None, None, line)
+        elif "|updateuser|" in line and USERNAME.lower() in line.lower():
+            await handler(None, None, line)
+        elif "|updatesearch|" in line:
+            sync_handler(None, None, line)
+        elif line.startswith(">battle-"):
+            await handler(None, None, line)
+        elif "|request|" in line:
+            await handler(None, None, line)
+        elif "|win|" in line:
+            await handler(None, None, line)
+        elif "|turn|" in msg:
+            sync_handler(None, None, line)
+        elif "|pm|" in msg and "/challenge" in msg:
+            await handler(None, None, line)
+        elif line.startswith("|faint|"):
+            await handler(None, None, line)
+        elif "|error|" in line:
+            await handler(None, None, line)
+        elif "|nametaken|" in line:
+            await handler(None, None, line)
+        else:
+            if line.strip() and not line.startswith("|c|"):
+                sync_handler(None, None, line)
+
+
+def make_dispatcher() -> MessageDispatcher:
+    dispatcher = MessageDispatcher()
+    for msg_type in BOT_TYPES:
+        dispatcher.register(
+            msg_type, sync_handler if msg_type in SYNC_TYPES else handler
+        )
+    dispatcher.set_fallback(sync_handler)
+    dispatcher.observe(observer)
+    return dispatcher
+
+
+def dispatcher_route(dispatcher: MessageDispatcher):
+    async def route(msg: str):
+        # As handle_message: the room line picks the room, the rest dispatch
+        lines = msg.split("\n")
+        if lines[0].startswith(">"):
+            lines = lines[1:]
+        await dispatcher.dispatch_lines(None, lines)
+
+    return route
+
+
+async def bench(route, frames: list[str], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames:
+            await route(frame)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--log", default=LOG_PATH)
+    parser.add_argument("--repeats", type=int, default=5, help="best of, per side")
+    args = parser.parse_args()
+
+    frames = load_frames(args.log)
+    line_count = sum(frame.count("\n") + 1 for frame in frames) * args.rounds
+
+    async def run() -> tuple[float, float]:
+        # Interleaved, best of: one CPU's noise hits both sides alike
+        route = dispatcher_route(make_dispatcher())
+        legacy = table = float("inf")
+        for _ in range(args.repeats):
+            legacy = min(legacy, await bench(legacy_route, frames, args.rounds))
+            table = min(table, await bench(route, frames, args.rounds))
+        return legacy, table
+
+    legacy, table = asyncio.run(run())
+
+    for name, elapsed in (("if/elif chain", legacy), ("dispatcher", table)):
+        print(
+            f"{name:>15}: {elapsed:.3f}s  "
+            f"{elapsed / line_count * 1e9:7.1f} ns/line  "
+            f"{line_count / elapsed:12,.0f} lines/s"
+        )
+    print(f"{'chain/table':>15}: {legacy / table:.2f}x (1.00x is parity)")
+
+
+if __name__ == "__main__":
+    main()
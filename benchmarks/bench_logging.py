@@ -0,0 +1,85 @@
+"""Cost of per-line bot output: the old print() versus queued, level-gated logging.
+
+Every line of the captured battle log is "logged" the way the bot logs an
+unhandled protocol line. Output goes to os.devnull so the numbers measure the
+call overhead on the event loop thread, not the terminal.
+
+    python benchmarks/bench_logging.py [--rounds 2000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from log_config import bot_logger, configure_logging, stop_logging  # noqa: E402
+
+LOG_PATH = os.path.join(ROOT, "data", "sample_battle.log")
+
+USERNAME = "mrbot1"
+
+
+def load_lines(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line for line in f.read().splitlines() if line.strip()]
+
+
+def bench_print(lines: list[str], rounds: int, out) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for line in lines:
+            print(f"📬 {USERNAME} received: {line.strip()}", file=out)
+    return time.perf_counter() - start
+
+
+def bench_logger(lines: list[str], rounds: int) -> float:
+    log = bot_logger(USERNAME)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for line in lines:
+            log.debug("📬 Received: %s", line)
+    return time.perf_counter() - start
+
+
+def bench_baseline(lines: list[str], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for line in lines:
+            pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    lines = load_lines(LOG_PATH)
+    calls = len(lines) * args.rounds
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        results = {"no output (loop only)": bench_baseline(lines, args.rounds)}
+        results["print()"] = bench_print(lines, args.rounds, devnull)
+
+        configure_logging(level=logging.DEBUG, stream=devnull)
+        results["logging, debug on"] = bench_logger(lines, args.rounds)
+        stop_logging()
+
+        configure_logging(quiet=True, stream=devnull)
+        results["logging, quiet"] = bench_logger(lines, args.rounds)
+        stop_logging()
+
+    baseline = results["no output (loop only)"]
+    for name, elapsed in results.items():
+        print(
+            f"{name:>22}: {elapsed:.3f}s  "
+            f"{(elapsed - baseline) / calls * 1e9:8.1f} ns/call over baseline"
+        )
+
+
+if __name__ == "__main__":
+    main()
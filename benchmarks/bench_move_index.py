@@ -0,0 +1,94 @@
+"""Move index loader/lookup benchmark and a consistency check against |request| JSON.
+
+The old determine_move_target built three literal sets (134, 20 and 25
+names) on every call; the "per-call sets" row rebuilds sets of the same
+sizes to reproduce that cost.
+
+    python benchmarks/bench_move_index.py [--lookups 200000] [--log FILE]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from move_index import (  # noqa: E402
+    MOVES_PATH,
+    check_request_targets,
+    get_move,
+    load_move_index,
+)
+
+LOG_PATH = os.path.join(ROOT, "data", "sample_battle.log")
+
+
+def iter_requests(path: str):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("|request|") and len(line) > len("|request|\n"):
+                yield json.loads(line[len("|request|") :])
+
+
+def bench_load(repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        load_move_index.__wrapped__(MOVES_PATH)
+    return (time.perf_counter() - start) / repeats
+
+
+def bench_legacy_lookup(move_ids: list[str], lookups: int) -> float:
+    names = sorted(load_move_index())
+    no_target, ally, spread = names[:134], names[134:154], names[154:179]
+    start = time.perf_counter()
+    for i in range(lookups):
+        move_id = move_ids[i % len(move_ids)]
+        no_target_moves = set(no_target)
+        ally_moves = set(ally)
+        spread_moves = set(spread)
+        if move_id in no_target_moves or move_id in spread_moves:
+            continue
+        move_id in ally_moves
+    return time.perf_counter() - start
+
+
+def bench_index_lookup(move_ids: list[str], lookups: int) -> float:
+    start = time.perf_counter()
+    for i in range(lookups):
+        info = get_move(move_ids[i % len(move_ids)])
+        info.needs_target
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--log", default=LOG_PATH)
+    args = parser.parse_args()
+
+    load = bench_load(20)
+    index = load_move_index()
+    print(f"loader: {len(index)} moves in {load * 1e3:.2f} ms (once per process)")
+
+    move_ids = list(index)
+    legacy = bench_legacy_lookup(move_ids, args.lookups)
+    indexed = bench_index_lookup(move_ids, args.lookups)
+    for name, elapsed in (("per-call sets", legacy), ("move index", indexed)):
+        print(f"{name:>14}: {elapsed / args.lookups * 1e9:8.1f} ns/lookup")
+
+    checked = 0
+    problems = []
+    for request in iter_requests(args.log):
+        checked += sum(len(a.get("moves", [])) for a in request.get("active") or [])
+        problems.extend(check_request_targets(request))
+    print(f"consistency: {checked} request moves checked, {len(problems)} mismatches")
+    for problem in problems:
+        print(f"  {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Login-to-battle latency and frames sent, two bots on the local server.
+
+Both bots search with a packed team, so login, /team and /search are all on
+the clock, and every connection goes through a SendThrottle (Showdown's
+0.6s a message by default, so keep battles short). --max-lines 1 turns off
+coalescing (one command per frame) for comparison.
+
+    python benchmarks/bench_outbound.py [--games 3] [--max-lines 1]
+                                        [--send-interval 0.6]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from connection import THROTTLE_DELAY, SendThrottle  # noqa: E402
+from local_server import LocalShowdownServer  # noqa: E402
+from log_config import configure_logging  # noqa: E402
+from outbound import MAX_LINES  # noqa: E402
+from showdown_bot import ShowdownBot  # noqa: E402
+
+TEAM = (
+    "Garchomp||choicescarf|roughskin|earthquake,dragonclaw,stoneedge,swordsdance"
+    "|Jolly|,252,,,4,252|||||]Toxapex||blacksludge|regenerator|toxic,scald,"
+    "recover,haze|Bold|252,,252,,4,|||||]Scizor||lifeorb|technician|bulletpunch,"
+    "uturn,knockoff,swordsdance|Adamant|252,252,,,4,|||||"
+)
+
+
+async def run(games: int, max_lines: int, max_turns: int, interval: float):
+    async with LocalShowdownServer(port=0, seed=0, max_turns=max_turns) as server:
+        bots = [
+            ShowdownBot(
+                f"outbound{seat}",
+                ws_url=server.ws_url,
+                packed_team=TEAM,
+                max_games=games,
+                throttle=SendThrottle(interval) if interval else None,
+            )
+            for seat in "ab"
+        ]
+        first_battle = {}
+        for bot in bots:
+            bot.outbox.max_lines = max_lines
+
+            def seen(room, msg_type, args, bot=bot):
+                if room is not None and bot.username not in first_battle:
+                    first_battle[bot.username] = time.perf_counter()
+
+            bot.dispatcher.observe(seen)
+        start = time.perf_counter()
+        await asyncio.gather(*(bot.connect_and_run() for bot in bots))
+        elapsed = time.perf_counter() - start
+    return bots, {name: t - start for name, t in first_battle.items()}, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=3)
+    parser.add_argument("--max-lines", type=int, default=MAX_LINES)
+    parser.add_argument("--max-turns", type=int, default=20)
+    parser.add_argument("--send-interval", type=float, default=THROTTLE_DELAY)
+    args = parser.parse_args()
+    configure_logging(quiet=True)
+
+    bots, first_battle, elapsed = asyncio.run(
+        run(args.games, args.max_lines, args.max_turns, args.send_interval)
+    )
+    print(f"{'bot':<12}{'to battle':>11}{'games':>7}{'commands':>10}{'frames':>8}")
+    for bot in bots:
+        print(
+            f"{bot.username:<12}{first_battle.get(bot.username, 0.0) * 1e3:>9.1f}ms"
+            f"{len(bot.results):>7}{bot.outbox.commands:>10}{bot.outbox.frames:>8}"
+        )
+    print(f"{args.games} games in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
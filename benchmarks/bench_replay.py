@@ -0,0 +1,93 @@
+"""Offline parse + decide throughput: recorded frames through ShowdownBot.
+
+Frames come from replay logs (--replays) or raw protocol text (--log, the
+sample battle by default) and are decoded up front, so only
+handle_message and the policy are timed. Every round replays them through
+a fresh bot on a FakeWebSocket, with the random module reseeded, so runs
+are repeatable; the last column checks that every round made the same
+choices.
+
+    python benchmarks/bench_replay.py [--rounds 50] [--replays 'replays/*.sdrl']
+                                      [--policies heuristic random]
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from log_config import configure_logging  # noqa: E402
+from policy import POLICIES, make_policy  # noqa: E402
+from replay_reader import iter_battles, iter_text_frames, replay  # noqa: E402
+from showdown_bot import ShowdownBot  # noqa: E402
+
+LOG_PATH = os.path.join(ROOT, "data", "sample_battle.log")
+
+USERNAME = "mrbot1"
+
+
+def load(args) -> list[tuple[str, list[str]]]:
+    """(username, frames) per battle"""
+    if args.replays:
+        return [
+            (battle.meta.get("username"), battle.frames)
+            for battle in iter_battles(sorted(glob.glob(args.replays)))
+        ]
+    return [(USERNAME, list(iter_text_frames(args.log)))]
+
+
+async def run(battles, policy, rounds: int) -> tuple[float, int, bool]:
+    """Seconds for all rounds, decisions per round, whether rounds agreed"""
+    first = None
+    stable = True
+    start = time.perf_counter()
+    for _ in range(rounds):
+        random.seed(0)
+        choices = []
+        for username, frames in battles:
+            choices += await replay(ShowdownBot(username, policy=policy), frames)
+        if first is None:
+            first = choices
+        stable = stable and choices == first
+    return time.perf_counter() - start, len(first or []), stable
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--log", default=LOG_PATH)
+    parser.add_argument("--replays", help="glob of replay log files")
+    parser.add_argument(
+        "--policies", nargs="+", choices=sorted(POLICIES), default=["heuristic"]
+    )
+    args = parser.parse_args()
+    configure_logging(quiet=True)
+
+    battles = load(args)
+    frames = sum(len(f) for _, f in battles)
+    lines = sum(frame.count("\n") + 1 for _, f in battles for frame in f)
+    print(f"{len(battles)} battles, {frames} frames, {lines} lines per round")
+    print(
+        f"{'policy':>10}{'frames/s':>12}{'lines/s':>12}{'decisions/s':>13}"
+        f"{'us/frame':>10}  stable"
+    )
+    for name in args.policies:
+        elapsed, decisions, stable = asyncio.run(
+            run(battles, make_policy(name), args.rounds)
+        )
+        print(
+            f"{name:>10}{frames * args.rounds / elapsed:>12,.0f}"
+            f"{lines * args.rounds / elapsed:>12,.0f}"
+            f"{decisions * args.rounds / elapsed:>13,.0f}"
+            f"{elapsed / (frames * args.rounds) * 1e6:>10.1f}  {stable}"
+        )
+
+
+if __name__ == "__main__":
+    main()
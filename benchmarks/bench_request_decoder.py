@@ -0,0 +1,96 @@
+"""Cost of decoding |request| payloads per JSON backend, new and repeated.
+
+The corpus is every |request| in data/sample_battle.log plus those in any
+replay logs given. Each installed backend is timed on a bare decode, on
+what the bot does for a new request and for a byte-identical repeat, and
+the size a room keeps per request is reported.
+
+    python benchmarks/bench_request_decoder.py [replays/*.sdrl] [--rounds 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from replay_reader import iter_battles  # noqa: E402
+from request_decoder import BACKENDS, RequestDecoder, get_backend  # noqa: E402
+
+LOG_PATH = os.path.join(ROOT, "data", "sample_battle.log")
+PREFIX = "|request|"
+
+
+def load_payloads(replay_paths: list[str]) -> list[str]:
+    lines = []
+    with open(LOG_PATH, encoding="utf-8") as f:
+        lines.extend(f.read().splitlines())
+    for battle in iter_battles(replay_paths):
+        for frame in battle.frames:
+            lines.extend(frame.split("\n"))
+    return [
+        line[len(PREFIX) :]
+        for line in lines
+        if line.startswith(PREFIX) and len(line) > len(PREFIX)
+    ]
+
+
+def deep_size(value) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(k) + deep_size(v) for k, v in value.items())
+    elif isinstance(value, list):
+        size += sum(deep_size(item) for item in value)
+    return size
+
+
+def bench(fn, payloads: list[str], rounds: int) -> float:
+    """Microseconds per payload"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for payload in payloads:
+            fn(payload)
+    return (time.perf_counter() - start) / (rounds * len(payloads)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("replays", nargs="*")
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.replays)
+    if not payloads:
+        sys.exit("no requests found")
+    rounds = max(1, args.rounds * 6 // len(payloads))
+    print(
+        f"{len(payloads)} requests, {sum(map(len, payloads)) // len(payloads)}"
+        f" bytes on average, {rounds} rounds"
+    )
+    print(f"{'backend':<8}{'loads':>10}{'new':>10}{'repeat':>10}")
+    for name in BACKENDS:
+        try:
+            _, loads = get_backend(name)
+        except ImportError:
+            print(f"{name:<8}{'not installed':>30}")
+            continue
+        decoder = RequestDecoder(name)
+        loads_us = bench(loads, payloads, rounds)
+        # Forgetting first makes every payload new; keyed by itself it repeats
+        new_us = bench(
+            lambda p: decoder.forget() or decoder.decode(p), payloads, rounds
+        )
+        for payload in payloads:
+            decoder.decode(payload, payload)
+        repeat_us = bench(lambda p: decoder.decode(p, p), payloads, rounds)
+        print(f"{name:<8}{loads_us:>8.2f}us{new_us:>8.2f}us{repeat_us:>8.2f}us")
+
+    decoder = RequestDecoder()
+    kept = sum(deep_size(decoder.decode(payload)) for payload in payloads)
+    print(f"retained per request: {kept / len(payloads):,.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
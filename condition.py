@@ -0,0 +1,42 @@
+import functools
+from typing import NamedTuple
+
+
+class Condition(NamedTuple):
+    """A parsed HP/status string such as "309/329 tox" or "0 fnt\""""
+
+    hp: int
+    max_hp: int  # 0 when the string doesn't say ("0 fnt")
+    fraction: float
+    status: str  # "", "brn", "par", "slp", "frz", "psn", "tox" or "fnt"
+
+    @property
+    def fainted(self) -> bool:
+        return self.status == "fnt" or self.hp <= 0
+
+
+FULL_HP = Condition(100, 100, 1.0, "")
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_condition(condition: str) -> Condition:
+    """Parse a request/protocol condition string.
+
+    The same few hundred strings repeat across every request and battle, so
+    results are memoized. Unparseable input counts as full HP, as the old
+    per-handler parsers did.
+    """
+    hp_part, _, status = condition.strip().partition(" ")
+    try:
+        if "/" in hp_part:
+            hp_text, _, max_text = hp_part.partition("/")
+            hp, max_hp = int(hp_text), int(max_text)
+        else:
+            hp, max_hp = int(hp_part), 0
+    except ValueError:
+        return FULL_HP
+
+    if status == "fnt" or hp <= 0:
+        return Condition(0, max_hp, 0.0, "fnt")
+    fraction = hp / max_hp if max_hp else 1.0
+    return Condition(hp, max_hp, fraction, status)
@@ -0,0 +1,110 @@
+"""Per-connection plumbing: send throttling, health counters and reconnect backoff."""
+
+import asyncio
+import random
+import time
+from typing import Iterator, Optional
+
+# Pokémon Showdown handles one message per THROTTLE_DELAY from a normal user
+# and queues up to THROTTLE_BUFFER_LIMIT more; beyond that messages are
+# dropped with a "message-throttle-notice"
+THROTTLE_DELAY = 0.6
+THROTTLE_DELAY_TRUSTED = 0.1
+THROTTLE_BUFFER_LIMIT = 6
+
+THROTTLE_NOTICE = "message-throttle-notice"
+
+
+class SendThrottle:
+    """Token bucket for one connection's outgoing messages.
+
+    A token is added every `interval` seconds up to `burst`; each send takes
+    one, waiting if none is left. The defaults stay inside Showdown's limits
+    for untrusted users. penalize() empties the bucket, for when the server
+    says we went too fast anyway.
+    """
+
+    def __init__(
+        self, interval: float = THROTTLE_DELAY, burst: int = THROTTLE_BUFFER_LIMIT - 1
+    ):
+        self.interval = interval
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.waits = 0  # sends that had to wait for a token
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        refilled = (now - self.updated) / self.interval
+        self.tokens = min(self.burst, self.tokens + refilled)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:  # first come, first served
+            self._refill()
+            if self.tokens < 1:
+                self.waits += 1
+                await asyncio.sleep((1 - self.tokens) * self.interval)
+                self._refill()
+            self.tokens -= 1
+
+    def penalize(self):
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class ConnectionHealth:
+    """Counters a bot keeps about its connection, read by the fleet supervisor"""
+
+    def __init__(self):
+        self.state = "idle"  # idle/waiting/connecting/connected/backoff/done
+        self.connects = 0
+        self.disconnects = 0
+        self.errors = 0  # connection-level failures
+        self.handler_errors = 0  # exceptions while handling one message
+        self.last_error = ""
+        self.sent = 0
+        self.received = 0
+        self.throttle_notices = 0
+        self.rejoined = 0  # rooms resumed after a reconnect
+        self.connected_at: Optional[float] = None
+        self.last_recv: Optional[float] = None
+        self.first_search: Optional[float] = None  # monotonic time of the first /search
+
+    def record_error(self, error: BaseException):
+        self.errors += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+
+    def uptime(self) -> float:
+        if self.connected_at is None:
+            return 0.0
+        return time.monotonic() - self.connected_at
+
+    def to_dict(self) -> dict:
+        now = time.monotonic()
+        return {
+            "state": self.state,
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "errors": self.errors,
+            "handler_errors": self.handler_errors,
+            "last_error": self.last_error,
+            "sent": self.sent,
+            "received": self.received,
+            "throttle_notices": self.throttle_notices,
+            "rejoined": self.rejoined,
+            "uptime": round(self.uptime(), 1),
+            "idle": round(now - self.last_recv, 1) if self.last_recv else None,
+        }
+
+
+def backoff_delays(
+    base: float = 1.0, cap: float = 60.0, rng: Optional[random.Random] = None
+) -> Iterator[float]:
+    """Reconnect delays with "full jitter": uniform in [0, min(cap, base * 2**n)]"""
+    rng = rng or random.Random()
+    attempt = 0
+    while True:
+        yield rng.uniform(0, min(cap, base * 2**attempt))
+        attempt += 1
@@ -0,0 +1,284 @@
+"""Batched damage estimates for every (active slot, move, target) option of a turn.
+
+Each option is reduced to a row of numbers (levels, base stats, boosts, move
+power, type indices...) and the whole turn is scored in one set of NumPy
+array operations using the standard damage formula, STAB, the type chart,
+stat boosts and accuracy. NumPy is optional: without it available() is
+False and the bot keeps choosing moves at random.
+"""
+
+import functools
+import time
+from typing import NamedTuple, Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+from battle_state import BOOST_INDEX, BattleState, PokemonState
+from move_index import ALLY_TARGETS, CHOSEN_TARGETS, SPREAD_TARGETS, get_move
+from pokedex import get_species, load_type_chart
+
+SPREAD_MODIFIER = 0.75
+RANDOM_MODIFIER = 0.925  # mean of the 0.85-1.00 damage roll
+DEFAULT_BASE_STAT = 80  # species missing from the dex
+
+# Showdown target types that pick a random foe instead of a chosen one
+RANDOM_TARGETS = frozenset({"randomNormal"})
+
+# Columns of one scoring row
+_COLUMNS = (
+    "group",  # option the row belongs to; spread moves add several rows
+    "weight",  # +1 foe, -1 ally hit by our own spread move, 1/n for random targets
+    "power",
+    "type",
+    "stab",
+    "accuracy",
+    "spread",
+    "burned",
+    "att_level",
+    "att_base",
+    "att_boost",
+    "def_level",
+    "def_base",
+    "def_boost",
+    "def_base_hp",
+    "def_hp_fraction",
+    "def_type1",
+    "def_type2",
+)
+
+
+class Option(NamedTuple):
+    slot: int  # active slot, 0 = a
+    move: int  # index into the request's move list
+    target: Optional[int]  # /choose target (1/2 foes, -1/-2 allies) or None
+    score: float  # expected share of the targets' remaining HP taken
+
+
+def available() -> bool:
+    return np is not None
+
+
+@functools.lru_cache(maxsize=None)
+def type_table():
+    """(type -> index, multiplier matrix) with a trailing typeless row/column"""
+    chart = load_type_chart()
+    types = sorted(chart)
+    index = {name: i for i, name in enumerate(types)}
+    matrix = np.ones((len(types) + 1, len(types) + 1))
+    for attacker, row in chart.items():
+        for defender, multiplier in row.items():
+            if defender in index:
+                matrix[index[attacker], index[defender]] = multiplier
+    return index, matrix
+
+
+def _types(mon: PokemonState) -> tuple[str, ...]:
+    if mon.terastallized and mon.tera_type:
+        return (mon.tera_type,)
+    species = get_species(mon.species)
+    return species.types if species is not None else ()
+
+
+def _stab_types(mon: PokemonState) -> tuple[str, ...]:
+    """Original types, plus the tera type once terastallized (both keep STAB)"""
+    species = get_species(mon.species)
+    types = species.types if species is not None else ()
+    if mon.terastallized and mon.tera_type:
+        types += (mon.tera_type,)
+    return types
+
+
+def _base(mon: PokemonState, stat: str) -> int:
+    species = get_species(mon.species)
+    return species.base(stat) if species is not None else DEFAULT_BASE_STAT
+
+
+def _defender_part(
+    defender: PokemonState, defense_stat: str, type_index: dict[str, int]
+) -> tuple:
+    typeless = len(type_index)
+    types = [type_index.get(t, typeless) for t in _types(defender)]
+    types += [typeless, typeless]
+    return (
+        defender.level,
+        _base(defender, defense_stat),
+        defender.boosts[BOOST_INDEX[defense_stat]],
+        _base(defender, "hp"),
+        defender.hp_fraction,
+        types[0],
+        types[1],
+    )
+
+
+class DamageEngine:
+    """Scores a turn's attacking options and picks the best one per active slot"""
+
+    def __init__(self, budget: float = 0.005):
+        if np is None:
+            raise RuntimeError("DamageEngine needs numpy")
+        self.budget = budget  # seconds allowed for collecting options per turn
+
+    def rows(self, state: BattleState, request: dict) -> tuple[list, list[tuple]]:
+        """Flatten the turn into scoring rows and the (slot, move, target) groups"""
+        our_side, foe_side = state.our_side, state.foe_side
+        if our_side is None or foe_side is None:
+            return [], []
+        type_index, _ = type_table()
+        typeless = len(type_index)
+        active_count = len(request.get("active", []))
+        foes = [
+            (position, mon)
+            for position, mon in enumerate(foe_side.active[:active_count])
+            if mon is not None and not mon.fainted
+        ]
+        deadline = time.perf_counter() + self.budget
+
+        rows: list[tuple] = []
+        groups: list[tuple] = []
+        for slot, active in enumerate(request.get("active", [])):
+            if time.perf_counter() > deadline:
+                break
+            if slot >= len(our_side.team):
+                break
+            attacker = our_side.team[slot]
+            if attacker.fainted:
+                continue
+            ally = (
+                our_side.team[1 - slot]
+                if active_count == 2 and len(our_side.team) > 1
+                else None
+            )
+            stab_types = _stab_types(attacker)
+            burned = attacker.status == "brn"
+
+            for move_index, move_data in enumerate(active.get("moves", [])):
+                if move_data.get("disabled"):
+                    continue
+                info = get_move(move_data.get("id") or move_data.get("move", ""))
+                if info is None or info.base_power <= 0 or info.category == "Status":
+                    continue
+                target = move_data.get("target") or info.target
+                physical = info.category == "Physical"
+                attack_stat, defense_stat = (
+                    ("atk", "def") if physical else ("spa", "spd")
+                )
+                stab = info.type in stab_types
+                move_part = (
+                    info.base_power,
+                    type_index.get(info.type, typeless),
+                    1.5 if stab else 1.0,
+                    1.0 if info.accuracy is True else info.accuracy / 100,
+                )
+                burn = 1.0 if burned and physical else 0.0
+                attacker_part = (
+                    attacker.level,
+                    _base(attacker, attack_stat),
+                    attacker.boosts[BOOST_INDEX[attack_stat]],
+                )
+
+                if active_count == 1 or target in SPREAD_TARGETS | RANDOM_TARGETS:
+                    if not foes:
+                        continue
+                    group = len(groups)
+                    groups.append((slot, move_index, None))
+                    hit = foes if active_count > 1 else foes[:1]
+                    spread = 1.0 if target in SPREAD_TARGETS and len(hit) > 1 else 0.0
+                    weight = 1 / len(hit) if target in RANDOM_TARGETS else 1.0
+                    hit = [(weight, foe) for _, foe in hit]
+                    if target == "allAdjacent" and ally and not ally.fainted:
+                        hit.append((-1.0, ally))
+                    for weight, defender in hit:
+                        rows.append(
+                            (group, weight)
+                            + move_part
+                            + (spread, burn)
+                            + attacker_part
+                            + _defender_part(defender, defense_stat, type_index)
+                        )
+                elif target in CHOSEN_TARGETS and target not in ALLY_TARGETS:
+                    for position, foe in foes:
+                        group = len(groups)
+                        groups.append((slot, move_index, position + 1))
+                        rows.append(
+                            (group, 1.0)
+                            + move_part
+                            + (0.0, burn)
+                            + attacker_part
+                            + _defender_part(foe, defense_stat, type_index)
+                        )
+        return rows, groups
+
+    def score(self, rows: list[tuple], group_count: int):
+        """Expected share of remaining HP taken, summed per group (one NumPy pass)"""
+        _, matrix = type_table()
+        table = np.asarray(rows, dtype=np.float64)
+        col = {name: table[:, i] for i, name in enumerate(_COLUMNS)}
+
+        def stat(base, level):
+            return np.floor((2 * base + 52) * level / 100) + 5
+
+        def boost(stage):
+            return np.where(stage >= 0, (2 + stage) / 2, 2 / (2 - np.minimum(stage, 0)))
+
+        attack = stat(col["att_base"], col["att_level"]) * boost(col["att_boost"])
+        defense = stat(col["def_base"], col["def_level"]) * boost(col["def_boost"])
+        max_hp = (
+            np.floor((2 * col["def_base_hp"] + 52) * col["def_level"] / 100)
+            + col["def_level"]
+            + 10
+        )
+        level_factor = np.floor(2 * col["att_level"] / 5 + 2)
+        raw = np.floor(level_factor * col["power"] * attack / defense)
+        base = np.floor(raw / 50) + 2
+        move_type = col["type"].astype(np.intp)
+        effectiveness = (
+            matrix[move_type, col["def_type1"].astype(np.intp)]
+            * matrix[move_type, col["def_type2"].astype(np.intp)]
+        )
+        damage = (
+            base
+            * col["stab"]
+            * effectiveness
+            * np.where(col["spread"] > 0, SPREAD_MODIFIER, 1.0)
+            * np.where(col["burned"] > 0, 0.5, 1.0)
+            * RANDOM_MODIFIER
+            * col["accuracy"]
+        )
+        remaining = np.maximum(max_hp * col["def_hp_fraction"], 1.0)
+        share = np.minimum(damage / remaining, 1.0) * col["weight"]
+        totals = np.zeros(group_count)
+        np.add.at(totals, col["group"].astype(np.intp), share)
+        return totals
+
+    def best_options(self, state: BattleState, request: dict) -> dict[int, Option]:
+        """Best scoring damaging option for each active slot that has one"""
+        return self.best_options_batch([(state, request)])[0]
+
+    def best_options_batch(
+        self, turns: list[tuple[BattleState, dict]]
+    ) -> list[dict[int, Option]]:
+        """best_options for many turns (rooms, bots) with a single scoring pass"""
+        rows: list[tuple] = []
+        spans = []
+        offset = 0
+        for state, request in turns:
+            turn_rows, groups = self.rows(state, request)
+            rows.extend((row[0] + offset,) + row[1:] for row in turn_rows)
+            spans.append((offset, groups))
+            offset += len(groups)
+        if not rows:
+            return [{} for _ in turns]
+
+        totals = self.score(rows, offset).tolist()
+        results = []
+        for start, groups in spans:
+            best: dict[int, Option] = {}
+            for i, (slot, move, target) in enumerate(groups):
+                total = totals[start + i]
+                if total > 0 and (slot not in best or total > best[slot].score):
+                    best[slot] = Option(slot, move, target, total)
+            results.append(best)
+        return results
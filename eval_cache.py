@@ -0,0 +1,219 @@
+"""Evaluation cache: remember what a policy chose for a position.
+
+Self-play keeps reaching the same positions, in later turns and in other
+rooms. EvalCache maps a canonical hash of (battle state, legal action set)
+to the /choose text a policy produced for it. The hash drops nicknames,
+player ids and the turn number and buckets HP, so near-identical positions
+share an entry. It keeps each Pokémon's moves: "move 1" is only the same
+choice for the same moveset. Because the legal set is part of the key a
+cached choice is always legal.
+
+Each process has an LRU cache of bounded size (get_eval_cache()).
+Optionally it sits in front of a SharedEvalTable, a fixed-size hash table in
+shared memory that the workers of a tournament read and write, so a position
+one worker has searched is a hit for the others.
+"""
+
+import hashlib
+import struct
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Optional
+
+from actions import ActionSet
+from battle_state import BattleState, SideState
+
+# HP is keyed in 1/HP_BUCKETS steps of the maximum
+HP_BUCKETS = 32
+
+# key, value length, value (UTF-8 /choose text); 64 bytes a slot
+_SLOT = struct.Struct("<QB55s")
+_MAX_VALUE = 55
+# Slots probed per lookup before giving up (reads) or overwriting (writes)
+_PROBES = 4
+
+
+def _side_key(side: Optional[SideState], ours: bool) -> list:
+    if side is None:
+        return []
+    mons = side.team if ours and side.team else side.pokemon.values()
+    entries = []
+    for mon in mons:
+        position = side.active.index(mon) if mon in side.active else -1
+        entries.append(
+            (
+                mon.species,
+                round(mon.hp_fraction * HP_BUCKETS),
+                mon.status,
+                mon.boosts.tobytes(),
+                position,
+                mon.item,
+                mon.ability,
+                mon.terastallized,
+                # Ours in request order, which /choose move numbers follow
+                tuple(mon.moves) if ours else tuple(sorted(mon.moves)),
+            )
+        )
+    if not ours:
+        # Reveal order differs between battles; our team order is the request's
+        entries.sort(key=repr)
+    return [sorted(side.conditions.items()), entries]
+
+
+def position_key(state: BattleState, legal: ActionSet) -> int:
+    """Canonical 64-bit hash of a position and its legal joint actions"""
+    text = repr(
+        (
+            state.gametype,
+            state.weather,
+            state.terrain,
+            sorted(state.pseudo_weather),
+            _side_key(state.our_side, True),
+            _side_key(state.foe_side, False),
+            legal.width,
+            legal.options,
+        )
+    ).encode()
+    digest = hashlib.blake2b(text, digest_size=8)
+    digest.update(legal.table.tobytes())
+    # 0 marks an empty slot in the shared table
+    return int.from_bytes(digest.digest(), "little") or 1
+
+
+class SharedEvalTable:
+    """Fixed-size open-addressing hash table in a shared memory block.
+
+    There are no locks: a writer clears a slot's key, writes the value and
+    then the key, and a reader only accepts a value if the key reads the same
+    before and after it. A racing write can therefore lose an entry but not
+    return the wrong one. Values longer than 55 bytes are not stored.
+    """
+
+    def __init__(self, name: Optional[str] = None, slots: int = 1 << 16):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * _SLOT.size)
+            self.owner = True
+        else:
+            # Attach from forked workers only: they share the creator's
+            # resource tracker, which unlinks the block if the creator dies
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.slots = self.shm.size // _SLOT.size
+        self.name = self.shm.name
+
+    def _offsets(self, key: int):
+        start = key % self.slots
+        for probe in range(_PROBES):
+            yield ((start + probe) % self.slots) * _SLOT.size
+
+    def get(self, key: int) -> Optional[str]:
+        buf = self.shm.buf
+        for offset in self._offsets(key):
+            stored, length, value = _SLOT.unpack_from(buf, offset)
+            if stored == key:
+                if struct.unpack_from("<Q", buf, offset)[0] != key:
+                    return None
+                return value[:length].decode()
+            if stored == 0:
+                return None
+        return None
+
+    def put(self, key: int, value: str):
+        data = value.encode()
+        if len(data) > _MAX_VALUE:
+            return
+        buf = self.shm.buf
+        offsets = list(self._offsets(key))
+        # Reuse our own slot or an empty one; otherwise evict the home slot
+        target = offsets[0]
+        for offset in offsets:
+            stored = struct.unpack_from("<Q", buf, offset)[0]
+            if stored in (0, key):
+                target = offset
+                break
+        struct.pack_into("<Q", buf, target, 0)
+        struct.pack_into("<B55s", buf, target + 8, len(data), data)
+        struct.pack_into("<Q", buf, target, key)
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class EvalCache:
+    """Bounded LRU of position key -> /choose text, with hit-rate counters"""
+
+    def __init__(
+        self, max_entries: int = 65536, shared: Optional[SharedEvalTable] = None
+    ):
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries: OrderedDict[int, str] = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, state: BattleState, legal: ActionSet) -> int:
+        return position_key(state, legal)
+
+    def get(self, key: int) -> Optional[str]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.shared_hits += 1
+                self._store(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, key: int, value: str):
+        self._store(key, value)
+        if self.shared is not None:
+            self.shared.put(key, value)
+
+    def _store(self, key: int, value: str):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.shared_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.hits + self.shared_hits) / self.lookups if self.lookups else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+        }
+
+
+_default_cache: Optional[EvalCache] = None
+
+
+def get_eval_cache() -> EvalCache:
+    """The process-wide cache, kept across turns and battles"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = EvalCache()
+    return _default_cache
@@ -0,0 +1,216 @@
+"""Supervise many bots: bounded connections, reconnects and per-bot health.
+
+A Fleet runs each ShowdownBot's connect_and_run() in a loop. When a
+connection ends before the bot is done it waits a jittered, exponentially
+growing delay and connects again; on the new connection the bot rejoins the
+battles it was in. At most max_connections bots are connected at a time,
+connections are opened at most one per connect_interval (after a burst of
+connect_burst), and every bot's messages go through a SendThrottle.
+
+    python fleet.py --bots 4 --games 3 --local
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from typing import Iterable, Optional
+
+from connection import (
+    THROTTLE_BUFFER_LIMIT,
+    THROTTLE_DELAY,
+    SendThrottle,
+    backoff_delays,
+)
+from log_config import configure_logging
+from showdown_bot import ShowdownBot
+
+logger = logging.getLogger(__name__)
+
+
+class Fleet:
+    """Keeps a set of bots connected until each has played its games"""
+
+    def __init__(
+        self,
+        bots: Iterable[ShowdownBot],
+        max_connections: Optional[int] = None,
+        send_interval: Optional[float] = THROTTLE_DELAY,
+        send_burst: int = THROTTLE_BUFFER_LIMIT - 1,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        stable_after: float = 30.0,
+        seed: Optional[int] = None,
+        connect_interval: Optional[float] = None,
+        connect_burst: int = 1,
+    ):
+        self.bots = list(bots)
+        # A Showdown connection carries one login, so the pool is a cap on
+        # how many bots are connected at once
+        self.max_connections = max_connections or len(self.bots)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # A connection that lasted this long resets the backoff
+        self.stable_after = stable_after
+        self.rng = random.Random(seed)
+        # Staggers connection starts, so hundreds of bots don't log in at once
+        self.connect_throttle = (
+            SendThrottle(connect_interval, connect_burst) if connect_interval else None
+        )
+        self.started: Optional[float] = None
+        if send_interval is not None:
+            for bot in self.bots:
+                if bot.throttle is None:
+                    bot.throttle = SendThrottle(send_interval, send_burst)
+        self._stopping = False
+        self._tasks: list[asyncio.Task] = []
+
+    async def run(self):
+        """Supervise every bot; returns once all are done or stop() was called"""
+        self._stopping = False
+        self.started = time.monotonic()
+        slots = asyncio.Semaphore(max(1, self.max_connections))
+        self._tasks = [
+            asyncio.create_task(self.supervise(bot, slots)) for bot in self.bots
+        ]
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            self._tasks = []
+
+    async def supervise(self, bot: ShowdownBot, slots: asyncio.Semaphore):
+        delays = backoff_delays(self.backoff_base, self.backoff_max, self.rng)
+        while not (bot.done or self._stopping):
+            bot.health.state = "waiting"
+            async with slots:
+                if self._stopping:
+                    break
+                if self.connect_throttle is not None:
+                    await self.connect_throttle.acquire()
+                started = time.monotonic()
+                await bot.connect_and_run()
+            if bot.done or self._stopping:
+                break
+            if time.monotonic() - started >= self.stable_after:
+                delays = backoff_delays(self.backoff_base, self.backoff_max, self.rng)
+            delay = next(delays)
+            bot.health.state = "backoff"
+            bot.log.warning(
+                "🔌 Connection lost (%s), reconnecting in %.1fs",
+                bot.health.last_error or "closed",
+                delay,
+            )
+            await asyncio.sleep(delay)
+        bot.health.state = "done"
+
+    async def stop(self):
+        """Stop reconnecting and close every open connection"""
+        self._stopping = True
+        for bot in self.bots:
+            if bot.ws is not None:
+                await bot.ws.close()
+
+    def health(self) -> dict[str, dict]:
+        """Per-bot connection counters plus rooms open and games finished"""
+        report = {}
+        for bot in self.bots:
+            stats = bot.health.to_dict()
+            stats["rooms"] = len(bot.rooms)
+            stats["games"] = len(bot.results)
+            stats["commands"] = bot.outbox.commands
+            stats["throttle_waits"] = bot.throttle.waits if bot.throttle else 0
+            # Seconds from run() to the bot's first /search
+            first_search = bot.health.first_search
+            stats["first_search"] = (
+                round(first_search - self.started, 3)
+                if first_search is not None and self.started is not None
+                else None
+            )
+            report[bot.username] = stats
+        return report
+
+    def report(self) -> str:
+        """health() as a text table"""
+        header = (
+            f"{'bot':<18}{'state':<11}{'conn':>5}{'drops':>6}{'errors':>7}"
+            f"{'rejoin':>7}{'games':>6}{'sent':>7}{'waits':>6}{'notices':>8}"
+            f"{'search':>8}"
+        )
+        lines = [header, "-" * len(header)]
+        for name, stats in self.health().items():
+            lines.append(
+                f"{name:<18}{stats['state']:<11}{stats['connects']:>5}"
+                f"{stats['disconnects']:>6}"
+                f"{stats['errors'] + stats['handler_errors']:>7}"
+                f"{stats['rejoined']:>7}{stats['games']:>6}{stats['sent']:>7}"
+                f"{stats['throttle_waits']:>6}{stats['throttle_notices']:>8}"
+                f"{_seconds(stats['first_search']):>8}"
+            )
+        return "\n".join(lines)
+
+
+def _seconds(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.2f}s"
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bots", type=int, default=2)
+    parser.add_argument("--games", type=int, default=1, help="games per bot")
+    parser.add_argument("--format", default="gen9randombattle")
+    parser.add_argument("--url", default=None, help="server websocket URL")
+    parser.add_argument("--local", action="store_true", help="start a local server")
+    parser.add_argument("--max-connections", type=int, default=None)
+    parser.add_argument(
+        "--send-interval",
+        type=float,
+        default=THROTTLE_DELAY,
+        help="seconds between messages per connection, 0 for no limit",
+    )
+    parser.add_argument(
+        "--connect-interval",
+        type=float,
+        default=0,
+        help="seconds between connection starts, 0 for no limit",
+    )
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+    configure_logging(quiet=args.quiet)
+
+    async def run():
+        server = None
+        url = args.url
+        if args.local:
+            from local_server import LocalShowdownServer
+
+            server = await LocalShowdownServer(port=0, reconnect_grace=30).start()
+            url = server.ws_url
+        fleet = Fleet(
+            [
+                ShowdownBot(
+                    f"fleet{i}",
+                    ws_url=url,
+                    battle_format=args.format,
+                    max_games=args.games,
+                )
+                for i in range(args.bots)
+            ],
+            max_connections=args.max_connections,
+            send_interval=args.send_interval or None,
+            connect_interval=args.connect_interval or None,
+        )
+        try:
+            await fleet.run()
+        finally:
+            if server is not None:
+                await server.stop()
+        print(fleet.report())
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Start a fleet of bots from a config file: no prompts, fast startup.
+
+    python launcher.py fleet.json [--quiet] [--stats stats.json]
+
+The config is JSON (or TOML, for a .toml file):
+
+    {
+        "server": "local",
+        "max_connections": 100,
+        "connect_interval": 0.05,
+        "connect_burst": 10,
+        "bots": [
+            {"name": "rand", "count": 200, "games": 3},
+            {"name": "vgc", "count": 2, "format": "gen9vgc2025regi",
+             "team": "teams/vgc.txt", "policy": "search"}
+        ]
+    }
+
+"server" is a websocket URL, "local" for a LocalShowdownServer on a free
+port ("local_server" holds its keyword arguments), or left out for
+Showdown's default. Fleet limits are max_connections, connect_interval and
+connect_burst (how fast connections are opened) and send_interval (per
+connection, null for none). team_library and replay_dir are paths. Each
+bot group has a name, which is suffixed with a number when count > 1,
+plus format, games, battles (played at once), policy (shared by the
+group), and team (packed text or a file that holds it).
+
+Modules only some configs need (the local server, the team library, the
+replay log, the login client's HTTP stack) are imported when a config asks
+for them. When the fleet is done, the launcher prints the health table and
+how long each bot took from launch to its first /search, so a startup
+regression shows up as a number.
+"""
+
+import time
+
+LAUNCHED = time.monotonic()
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import math  # noqa: E402
+import os  # noqa: E402
+import statistics  # noqa: E402
+from typing import Optional  # noqa: E402
+
+from log_config import configure_logging  # noqa: E402
+
+FLEET_KEYS = frozenset(
+    {
+        "server",
+        "local_server",
+        "max_connections",
+        "connect_interval",
+        "connect_burst",
+        "send_interval",
+        "team_library",
+        "replay_dir",
+        "bots",
+    }
+)
+BOT_KEYS = frozenset({"name", "count", "format", "games", "battles", "policy", "team"})
+
+
+def load_config(path: str) -> dict:
+    """Read and check a launcher config; raises ValueError on unknown keys"""
+    if path.endswith(".toml"):
+        import tomllib
+
+        with open(path, "rb") as f:
+            config = tomllib.load(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+    unknown = set(config) - FLEET_KEYS
+    for group in config.get("bots", []):
+        unknown |= set(group) - BOT_KEYS
+    if unknown:
+        raise ValueError(f"Unknown config keys: {', '.join(sorted(unknown))}")
+    if not config.get("bots"):
+        raise ValueError("The config has no bots")
+    return config
+
+
+def _team_text(team: Optional[str]) -> Optional[str]:
+    if team and os.path.isfile(team):
+        with open(team, encoding="utf-8") as f:
+            return f.read().strip()
+    return team
+
+
+def build_bots(config: dict, ws_url: Optional[str], library=None, recorder=None):
+    from policy import make_policy
+    from showdown_bot import ShowdownBot
+
+    bots = []
+    for group in config["bots"]:
+        count = group.get("count", 1)
+        policy = make_policy(group["policy"]) if "policy" in group else None
+        team = _team_text(group.get("team"))
+        for i in range(count):
+            bots.append(
+                ShowdownBot(
+                    f"{group['name']}{i}" if count > 1 else group["name"],
+                    ws_url=ws_url,
+                    battle_format=group.get("format", "gen9randombattle"),
+                    packed_team=team,
+                    max_battles=group.get("battles", 1),
+                    max_games=group.get("games"),
+                    policy=policy,
+                    recorder=recorder,
+                    team_library=library,
+                )
+            )
+    return bots
+
+
+def startup_stats(fleet, imported: float) -> dict:
+    """Seconds from launch to imports done and to each bot's first /search"""
+    searches = sorted(
+        bot.health.first_search - LAUNCHED
+        for bot in fleet.bots
+        if bot.health.first_search is not None
+    )
+    stats = {"imports": round(imported, 3), "bots": len(fleet.bots)}
+    stats["searched"] = len(searches)
+    if searches:
+        stats["first_search"] = {
+            "first": round(searches[0], 3),
+            "median": round(statistics.median(searches), 3),
+            "p95": round(searches[math.ceil(0.95 * len(searches)) - 1], 3),
+            "last": round(searches[-1], 3),
+        }
+    return stats
+
+
+async def launch(config: dict) -> tuple:
+    """Run the configured fleet to completion; (fleet, seconds spent importing)"""
+    from fleet import Fleet
+
+    server = library = recorder = None
+    url = config.get("server")
+    if url == "local":
+        from local_server import LocalShowdownServer
+
+        options = {"port": 0, "reconnect_grace": 30, **config.get("local_server", {})}
+        server = await LocalShowdownServer(**options).start()
+        url = server.ws_url
+    if config.get("team_library"):
+        from team_library import TeamLibrary
+
+        library = TeamLibrary(config["team_library"])
+    if config.get("replay_dir"):
+        from replay_log import ReplayRecorder
+
+        recorder = ReplayRecorder(config["replay_dir"])
+    imported = time.monotonic() - LAUNCHED
+
+    fleet_options = {
+        key: config[key]
+        for key in ("max_connections", "connect_interval", "connect_burst")
+        if key in config
+    }
+    if "send_interval" in config:
+        fleet_options["send_interval"] = config["send_interval"]
+    fleet = Fleet(build_bots(config, url, library, recorder), **fleet_options)
+    try:
+        await fleet.run()
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if library is not None:
+            library.close()
+        if server is not None:
+            await server.stop()
+    return fleet, imported
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("config")
+    parser.add_argument("--quiet", action="store_true")
+    parser.add_argument("--stats", help="write the startup stats as JSON here")
+    args = parser.parse_args(argv)
+    configure_logging(quiet=args.quiet)
+
+    config = load_config(args.config)
+    fleet, imported = asyncio.run(launch(config))
+    stats = startup_stats(fleet, imported)
+    print(fleet.report())
+    print(f"imports done {stats['imports']:.3f}s after launch")
+    if "first_search" in stats:
+        first_search = stats["first_search"]
+        print(
+            f"first /search of {stats['searched']}/{stats['bots']} bots after launch: "
+            + ", ".join(f"{k} {v:.3f}s" for k, v in first_search.items())
+        )
+    if args.stats:
+        with open(args.stats, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,728 @@
+"""A small in-process stand-in for the Pokémon Showdown server.
+
+It speaks the part of the protocol ShowdownBot uses (challstr, /trn, /team,
+/search, /challenge, /accept, /join, battle rooms, |request|, |turn|, |faint|,
+|win|)
+and drives battles with a deliberately simple engine, so bots can play each
+other offline as fast as they can decide.
+
+    python local_server.py [--port 8000]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import random
+import secrets
+from typing import Optional
+
+import websockets
+
+from move_index import get_move, to_id
+from packed_team import TeamValidationError, parse_packed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "localhost"
+DEFAULT_PORT = 8000
+WS_PATH = "/showdown/websocket"
+
+POSITIONS = "abc"
+
+# Teams for players that search without sending one
+ROSTER = {
+    "Garchomp": ["earthquake", "dragonclaw", "stoneedge", "swordsdance"],
+    "Rotom-Wash": ["voltswitch", "hydropump", "willowisp", "painsplit"],
+    "Gardevoir": ["moonblast", "psychic", "calmmind", "mysticalfire"],
+    "Scizor": ["bulletpunch", "uturn", "knockoff", "swordsdance"],
+    "Amoonguss": ["spore", "gigadrain", "sludgebomb", "clearsmog"],
+    "Dragonite": ["dragondance", "extremespeed", "earthquake", "roost"],
+    "Toxapex": ["toxic", "scald", "recover", "haze"],
+    "Corviknight": ["bravebird", "bodypress", "roost", "uturn"],
+    "Iron Bundle": ["icywind", "hydropump", "freezedry", "protect"],
+    "Flutter Mane": ["moonblast", "shadowball", "protect", "icywind"],
+    "Chi-Yu": ["heatwave", "darkpulse", "snarl", "protect"],
+    "Great Tusk": ["headlongrush", "closecombat", "icespinner", "rapidspin"],
+}
+
+
+def is_doubles(battle_format: str) -> bool:
+    return "doubles" in battle_format or "vgc" in battle_format
+
+
+class SimMon:
+    __slots__ = ("name", "species", "level", "moves", "hp", "max_hp")
+
+    def __init__(self, species: str, moves: list[str], level: int = 100, name=None):
+        self.name = name or species
+        self.species = species
+        self.level = level
+        self.moves = [to_id(m) for m in moves if get_move(m) is not None][:4]
+        if not self.moves:
+            self.moves = ["struggle"]
+        # Every mon gets the same-sized pool; only HP fractions matter here
+        self.max_hp = 250 + level
+        self.hp = self.max_hp
+
+    @property
+    def fainted(self) -> bool:
+        return self.hp <= 0
+
+    @property
+    def details(self) -> str:
+        return f"{self.species}, L{self.level}"
+
+    def condition(self, exact: bool = True) -> str:
+        if self.fainted:
+            return "0 fnt"
+        if exact:
+            return f"{self.hp}/{self.max_hp}"
+        return f"{math.ceil(self.hp * 100 / self.max_hp)}/100"
+
+
+def team_from_packed(packed: str) -> list[SimMon]:
+    """Just enough of the packed team to field it: species, moves, level"""
+    try:
+        team = parse_packed(packed)
+    except TeamValidationError:
+        return []
+    return [
+        SimMon(s.species, list(s.moves), level=s.level, name=s.nickname)
+        for s in team.sets[:6]
+    ]
+
+
+def random_team(rng: random.Random, size: int = 6) -> list[SimMon]:
+    return [SimMon(species, ROSTER[species]) for species in rng.sample(list(ROSTER), size)]
+
+
+class Client:
+    """One websocket connection and whoever is logged in on it"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.name = ""
+        self.packed_team: Optional[str] = None
+        self.battles: set[str] = set()
+
+    @property
+    def userid(self) -> str:
+        return to_id(self.name)
+
+    async def send(self, text: str):
+        try:
+            await self.ws.send(text)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+
+class SimSide:
+    def __init__(self, player: str, client: Client, mons: list[SimMon], active_count: int):
+        self.player = player
+        self.client = client
+        self.mons = mons  # request order: active slots first
+        self.active_count = active_count
+        self.choice: Optional[list[str]] = None
+        self.force_switch: Optional[list[bool]] = None
+        self.last_request: Optional[dict] = None  # resent on /join
+
+    @property
+    def name(self) -> str:
+        return self.client.name
+
+    @property
+    def defeated(self) -> bool:
+        return all(mon.fainted for mon in self.mons)
+
+    def ident(self, slot: int) -> str:
+        return f"{self.player}{POSITIONS[slot]}: {self.mons[slot].name}"
+
+    def living_slots(self) -> list[int]:
+        return [
+            slot
+            for slot in range(min(self.active_count, len(self.mons)))
+            if not self.mons[slot].fainted
+        ]
+
+    def bench(self) -> list[int]:
+        return [
+            i
+            for i in range(self.active_count, len(self.mons))
+            if not self.mons[i].fainted
+        ]
+
+    def request(self, rqid: int, wait: bool = False) -> dict:
+        side = {
+            "name": self.name,
+            "id": self.player,
+            "pokemon": [
+                {
+                    "ident": f"{self.player}: {mon.name}",
+                    "details": mon.details,
+                    "condition": mon.condition(),
+                    "active": i < self.active_count,
+                    "moves": mon.moves,
+                    "baseAbility": "",
+                    "item": "",
+                    "ability": "",
+                }
+                for i, mon in enumerate(self.mons)
+            ],
+        }
+        if self.force_switch:
+            return {
+                "forceSwitch": self.force_switch,
+                "side": side,
+                "noCancel": True,
+                "rqid": rqid,
+            }
+        if wait:
+            return {"wait": True, "side": side, "rqid": rqid}
+        active = []
+        for slot in range(min(self.active_count, len(self.mons))):
+            moves = []
+            for move_id in self.mons[slot].moves:
+                info = get_move(move_id)
+                moves.append(
+                    {
+                        "move": info.name,
+                        "id": move_id,
+                        "pp": 16,
+                        "maxpp": 16,
+                        "target": info.target,
+                        "disabled": False,
+                    }
+                )
+            active.append({"moves": moves})
+        return {"active": active, "side": side, "rqid": rqid}
+
+
+class SimBattle:
+    """A scripted battle: switches go first, then moves by priority and a coin flip"""
+
+    def __init__(
+        self,
+        room_id: str,
+        battle_format: str,
+        clients: tuple[Client, Client],
+        rng: random.Random,
+        max_turns: int = 300,
+        choice_timeout: float = 60,
+        on_end=None,
+    ):
+        self.room_id = room_id
+        self.format = battle_format
+        self.rng = rng
+        self.max_turns = max_turns
+        self.choice_timeout = choice_timeout
+        self.on_end = on_end
+        active_count = 2 if is_doubles(battle_format) else 1
+        self.sides = []
+        for player, client in zip(("p1", "p2"), clients):
+            if client.packed_team:
+                mons = team_from_packed(client.packed_team) or random_team(rng)
+            else:
+                mons = random_team(rng)
+            self.sides.append(SimSide(player, client, mons, active_count))
+        self.turn = 0
+        self.rqid = 0
+        self.ended = False
+        self.winner: Optional[str] = None
+        self.log: list[str] = []  # every broadcast line, replayed on /join
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def foe(self, side: SimSide) -> SimSide:
+        return self.sides[1] if side is self.sides[0] else self.sides[0]
+
+    async def broadcast(self, lines: list[str]):
+        self.log.extend(lines)
+        frame = "\n".join([f">{self.room_id}"] + lines)
+        await asyncio.gather(*(side.client.send(frame) for side in self.sides))
+
+    def side_of(self, userid: str) -> Optional[SimSide]:
+        for side in self.sides:
+            if side.client.userid == userid:
+                return side
+        return None
+
+    async def rejoin(self, side: SimSide, client: Client):
+        """Hand a side to a new connection: replay the room, resend its request"""
+        side.client = client
+        client.battles.add(self.room_id)
+        await client.send("\n".join([f">{self.room_id}"] + self.log))
+        if side.last_request is not None and not self.ended:
+            await client.send(
+                f">{self.room_id}\n|request|{json.dumps(side.last_request)}"
+            )
+
+    async def start(self):
+        for side in self.sides:
+            side.client.battles.add(self.room_id)
+        p1, p2 = self.sides
+        await self.broadcast(
+            [
+                "|init|battle",
+                f"|title|{p1.name} vs. {p2.name}",
+                f"|j|☆{p1.name}",
+                f"|j|☆{p2.name}",
+            ]
+        )
+        lines = [
+            f"|gametype|{'doubles' if p1.active_count > 1 else 'singles'}",
+            f"|player|p1|{p1.name}|1|",
+            f"|player|p2|{p2.name}|2|",
+            f"|teamsize|p1|{len(p1.mons)}",
+            f"|teamsize|p2|{len(p2.mons)}",
+            "|gen|9",
+            f"|tier|{self.format}",
+            "|",
+            "|start",
+        ]
+        for side in self.sides:
+            for slot in range(min(side.active_count, len(side.mons))):
+                mon = side.mons[slot]
+                lines.append(f"|switch|{side.ident(slot)}|{mon.details}|{mon.condition(False)}")
+        await self.next_turn(lines)
+
+    async def send_requests(self):
+        self.rqid += 1
+        needs_choice = any(side.force_switch for side in self.sides)
+        for side in self.sides:
+            side.choice = None
+            wait = needs_choice and not side.force_switch
+            request = side.request(self.rqid, wait=wait)
+            side.last_request = request
+            await side.client.send(f">{self.room_id}\n|request|{json.dumps(request)}")
+        self._arm_timer()
+
+    def _arm_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(
+            self.choice_timeout, lambda: asyncio.ensure_future(self._timeout())
+        )
+
+    async def _timeout(self):
+        """Players that never answer get their default choice"""
+        for side in self._waiting_on():
+            side.choice = []
+        await self._maybe_resolve()
+
+    def _waiting_on(self) -> list[SimSide]:
+        forced = [side for side in self.sides if side.force_switch]
+        pending = forced or self.sides
+        return [side for side in pending if side.choice is None]
+
+    async def choose(self, client: Client, text: str):
+        if self.ended:
+            return
+        for side in self.sides:
+            if side.client is client and side.choice is None:
+                if any(s.force_switch for s in self.sides) and not side.force_switch:
+                    return  # this side is waiting
+                side.choice = [part.strip() for part in text.split(",")]
+                break
+        await self._maybe_resolve()
+
+    async def _maybe_resolve(self):
+        if self.ended or self._waiting_on():
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if any(side.force_switch for side in self.sides):
+            await self._resolve_force_switch()
+        else:
+            await self._resolve_turn()
+
+    def _parse_switch(self, side: SimSide, action: str, taken: set[int]) -> Optional[int]:
+        parts = action.split()
+        if len(parts) >= 2 and parts[0] == "switch" and parts[1].isdigit():
+            index = int(parts[1]) - 1
+            if index in side.bench() and index not in taken:
+                return index
+        return None
+
+    def _switch_in(self, side: SimSide, slot: int, index: int, lines: list[str]):
+        side.mons[slot], side.mons[index] = side.mons[index], side.mons[slot]
+        mon = side.mons[slot]
+        lines.append(f"|switch|{side.ident(slot)}|{mon.details}|{mon.condition(False)}")
+
+    async def _resolve_force_switch(self):
+        lines = ["|"]
+        for side in self.sides:
+            if not side.force_switch:
+                continue
+            taken: set[int] = set()
+            actions = [a for a in side.choice if a != "pass"]
+            for slot, must in enumerate(side.force_switch):
+                if not must:
+                    continue
+                index = self._parse_switch(side, actions.pop(0), taken) if actions else None
+                if index is None:
+                    free = [i for i in side.bench() if i not in taken]
+                    if not free:
+                        continue
+                    index = free[0]
+                taken.add(index)
+                self._switch_in(side, slot, index, lines)
+            side.force_switch = None
+        await self.next_turn(lines)
+
+    def _plan(self, side: SimSide) -> list[tuple]:
+        """Map a side's /choose parts onto its living active slots"""
+        living = side.living_slots()
+        actions = list(side.choice or [])
+        if len(actions) == side.active_count:
+            actions = [actions[slot] for slot in living]
+        plans = []
+        taken: set[int] = set()
+        for i, slot in enumerate(living):
+            action = actions[i] if i < len(actions) else ""
+            index = self._parse_switch(side, action, taken)
+            if index is not None:
+                taken.add(index)
+                plans.append(("switch", side, slot, index))
+                continue
+            parts = action.split()
+            move_slot, target = 0, None
+            if len(parts) >= 2 and parts[0] == "move" and parts[1].isdigit():
+                move_slot = max(0, int(parts[1]) - 1)
+                if len(parts) >= 3 and parts[2].lstrip("-").isdigit():
+                    target = int(parts[2])
+            moves = side.mons[slot].moves
+            move_id = moves[move_slot] if move_slot < len(moves) else moves[0]
+            plans.append(("move", side, slot, (move_id, target)))
+        return plans
+
+    def _targets(
+        self, side: SimSide, slot: int, info, target: Optional[int]
+    ) -> list[tuple[SimSide, int]]:
+        foe = self.foe(side)
+        foes = [(foe, s) for s in foe.living_slots()]
+        if info.target in ("self", "allySide", "foeSide", "all", "allyTeam", "allies"):
+            return []
+        if info.spread:
+            hits = list(foes)
+            if info.target == "allAdjacent":
+                hits += [(side, s) for s in side.living_slots() if s != slot]
+            return hits
+        if target is not None and target < 0:
+            ally = -target - 1
+            if ally in side.living_slots() and ally != slot:
+                return [(side, ally)]
+        if target is not None and target > 0:
+            wanted = [(f, s) for f, s in foes if s == target - 1]
+            if wanted:
+                return wanted
+        return [self.rng.choice(foes)] if foes else []
+
+    def _use_move(
+        self,
+        side: SimSide,
+        slot: int,
+        move_id: str,
+        target: Optional[int],
+        lines: list[str],
+    ):
+        user = side.mons[slot]
+        if user.fainted:
+            return
+        info = get_move(move_id)
+        targets = self._targets(side, slot, info, target)
+        target_ident = targets[0][0].ident(targets[0][1]) if targets else ""
+        lines.append(f"|move|{side.ident(slot)}|{info.name}|{target_ident}")
+        if info.category == "Status" or not info.base_power:
+            return
+        spread = 0.75 if len(targets) > 1 else 1.0
+        for target_side, target_slot in targets:
+            mon = target_side.mons[target_slot]
+            if mon.fainted:
+                continue
+            if info.accuracy is not True and self.rng.random() * 100 >= info.accuracy:
+                lines.append(f"|-miss|{side.ident(slot)}|{target_side.ident(target_slot)}")
+                continue
+            fraction = info.base_power / 350 * self.rng.uniform(0.85, 1.0) * spread
+            mon.hp = max(0, mon.hp - max(1, round(mon.max_hp * fraction)))
+            lines.append(f"|-damage|{target_side.ident(target_slot)}|{mon.condition(False)}")
+            if mon.fainted:
+                lines.append(f"|faint|{target_side.ident(target_slot)}")
+
+    async def _resolve_turn(self):
+        lines = ["|"]
+        plans = self._plan(self.sides[0]) + self._plan(self.sides[1])
+        for kind, side, slot, index in plans:
+            if kind == "switch":
+                self._switch_in(side, slot, index, lines)
+
+        moves = [plan for plan in plans if plan[0] == "move"]
+        order = {id(plan): self.rng.random() for plan in moves}
+        moves.sort(key=lambda p: (-get_move(p[3][0]).priority, order[id(p)]))
+        for _, side, slot, (move_id, target) in moves:
+            self._use_move(side, slot, move_id, target, lines)
+
+        lines += ["|", "|upkeep"]
+        for side in self.sides:
+            if side.defeated:
+                await self.end(lines, winner=self.foe(side))
+                return
+            flags = [
+                slot < len(side.mons) and side.mons[slot].fainted
+                for slot in range(side.active_count)
+            ]
+            bench = side.bench()
+            if any(flags) and bench:
+                # Only as many replacements as there are healthy bench mons
+                allowed = len(bench)
+                side.force_switch = []
+                for flag in flags:
+                    side.force_switch.append(flag and allowed > 0)
+                    allowed -= flag
+        if any(side.force_switch for side in self.sides):
+            await self.broadcast(lines)
+            await self.send_requests()
+            return
+        await self.next_turn(lines)
+
+    async def next_turn(self, lines: list[str]):
+        if self.turn >= self.max_turns:
+            await self.end(lines, winner=None)
+            return
+        self.turn += 1
+        lines.append(f"|turn|{self.turn}")
+        # The turn's log first, as Showdown does: a request answers the
+        # position that log leads to
+        await self.broadcast(lines)
+        await self.send_requests()
+
+    async def end(self, lines: list[str], winner: Optional[SimSide]):
+        self.ended = True
+        if self._timer is not None:
+            self._timer.cancel()
+        self.winner = winner.name if winner else None
+        lines.append(f"|win|{winner.name}" if winner else "|tie")
+        await self.broadcast(lines)
+        if self.on_end:
+            self.on_end(self)
+
+    async def forfeit(self, client: Client):
+        if self.ended:
+            return
+        for side in self.sides:
+            if side.client is client:
+                await self.end([f"|-message|{side.name} forfeited."], winner=self.foe(side))
+                return
+
+
+class LocalShowdownServer:
+    """Pairs /search and /challenge requests and runs the resulting battles"""
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        seed: Optional[int] = None,
+        max_turns: int = 300,
+        choice_timeout: float = 60,
+        reconnect_grace: float = 0,
+    ):
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.max_turns = max_turns
+        self.choice_timeout = choice_timeout
+        # Seconds a disconnected player has to /join back before forfeiting
+        self.reconnect_grace = reconnect_grace
+        self.clients: set[Client] = set()
+        self.battles: dict[str, SimBattle] = {}
+        self.queues: dict[str, list[Client]] = {}
+        self.challenges: dict[tuple[str, str], str] = {}  # (from, to) -> format
+        self.games_started = 0
+        self.games_finished = 0
+        self._room_ids = itertools.count(1)
+        self._server = None
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}{WS_PATH}"
+
+    async def start(self):
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("🏟️ Local server listening on %s", self.ws_url)
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await asyncio.Future()
+        finally:
+            await self.stop()
+
+    async def _handle(self, ws, path=None):
+        client = Client(ws)
+        self.clients.add(client)
+        try:
+            await client.send(f"|challstr|4|{secrets.token_hex(64)}")
+            async for message in ws:
+                await self.handle_command(client, message)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.clients.discard(client)
+            for queue in self.queues.values():
+                if client in queue:
+                    queue.remove(client)
+            for room_id in list(client.battles):
+                battle = self.battles.get(room_id)
+                if battle is None:
+                    continue
+                if self.reconnect_grace > 0:
+                    loop = asyncio.get_running_loop()
+                    loop.call_later(
+                        self.reconnect_grace,
+                        lambda b=battle: asyncio.ensure_future(b.forfeit(client)),
+                    )
+                else:
+                    await battle.forfeit(client)
+
+    async def handle_command(self, client: Client, message: str):
+        """Client messages are "ROOM|TEXT", where TEXT may hold several lines"""
+        room_id, _, text = message.partition("|")
+        for line in text.split("\n"):
+            if line:
+                await self._command(client, room_id, line)
+
+    async def _command(self, client: Client, room_id: str, line: str):
+        command, _, arg = line.partition(" ")
+        if command in ("/trn", "/nick"):
+            client.name = arg.split(",")[0].strip()
+            await client.send(f"|updateuser| {client.name}|1|1|{{}}")
+        elif command in ("/team", "/utm"):
+            client.packed_team = arg or None
+        elif command == "/search":
+            await self._search(client, arg.strip())
+        elif command == "/cancelsearch":
+            for queue in self.queues.values():
+                if client in queue:
+                    queue.remove(client)
+        elif command == "/challenge":
+            target, _, battle_format = arg.partition(",")
+            await self._challenge(client, to_id(target), battle_format.strip())
+        elif command == "/accept":
+            await self._accept(client, to_id(arg))
+        elif command == "/reject":
+            self.challenges.pop((to_id(arg), client.userid), None)
+        elif command == "/join":
+            await self._join(client, arg.strip())
+        elif command == "/leave":
+            target_room = arg.strip() or room_id
+            client.battles.discard(target_room)
+            await client.send(f">{target_room}\n|deinit")
+        elif command == "/choose":
+            battle = self.battles.get(room_id)
+            if battle is not None:
+                await battle.choose(client, arg)
+        elif command in ("/forfeit", "/ff"):
+            battle = self.battles.get(room_id)
+            if battle is not None:
+                await battle.forfeit(client)
+
+    async def _join(self, client: Client, room_id: str):
+        battle = self.battles.get(room_id)
+        side = battle.side_of(client.userid) if battle is not None else None
+        if side is None:
+            await client.send(
+                f'>{room_id}\n|noinit|nonexistent|The room "{room_id}" does not exist.'
+            )
+            return
+        await battle.rejoin(side, client)
+
+    async def _search(self, client: Client, battle_format: str):
+        queue = self.queues.setdefault(battle_format, [])
+        await client.send(
+            f'|updatesearch|{{"searching":["{battle_format}"],"games":null}}'
+        )
+        opponent = next((c for c in queue if c is not client), None)
+        if opponent is None:
+            if client not in queue:
+                queue.append(client)
+            return
+        queue.remove(opponent)
+        await self._start_battle(battle_format, opponent, client)
+
+    async def _challenge(self, client: Client, target: str, battle_format: str):
+        for other in self.clients:
+            if other.userid == target:
+                self.challenges[(client.userid, target)] = battle_format
+                await other.send(
+                    f"|pm| {client.name}| {other.name}|/challenge {battle_format}"
+                )
+                return
+        await client.send(f"|popup|User {target} not found.")
+
+    async def _accept(self, client: Client, challenger: str):
+        battle_format = self.challenges.pop((challenger, client.userid), None)
+        if battle_format is None:
+            return
+        for other in self.clients:
+            if other.userid == challenger:
+                await self._start_battle(battle_format, other, client)
+                return
+
+    async def _start_battle(self, battle_format: str, p1: Client, p2: Client):
+        room_id = f"battle-{battle_format}-{next(self._room_ids)}"
+        battle = SimBattle(
+            room_id,
+            battle_format,
+            (p1, p2),
+            random.Random(self.rng.random()),
+            max_turns=self.max_turns,
+            choice_timeout=self.choice_timeout,
+            on_end=self._battle_ended,
+        )
+        self.battles[room_id] = battle
+        self.games_started += 1
+        await battle.start()
+
+    def _battle_ended(self, battle: SimBattle):
+        self.games_finished += 1
+        self.battles.pop(battle.room_id, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Showdown protocol stand-in")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    from log_config import configure_logging
+
+    configure_logging()
+    server = LocalShowdownServer(args.host, args.port, seed=args.seed)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional, TextIO
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+
+# Every bot logs under "showdown_bot.<username>"
+BOT_LOGGER = "showdown_bot"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def bot_logger(username: str) -> logging.Logger:
+    return logging.getLogger(f"{BOT_LOGGER}.{username}")
+
+
+class _RawQueueHandler(logging.handlers.QueueHandler):
+    """Queues records untouched; the listener thread does all the formatting.
+
+    The stock prepare() formats and copies every record on the logging
+    thread, which is most of the cost of a log call. Arguments are
+    therefore rendered when the record is written, not when it is logged.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(
+    level: int = logging.INFO, quiet: bool = False, stream: Optional[TextIO] = None
+):
+    """Route all logging through a queue so the event loop never waits on stdout.
+
+    Records are put on an in-memory queue as they are and formatted and
+    written by a background QueueListener thread. quiet=True is the production mode: only
+    warnings and errors are kept, so the per-line debug/info calls in the bot
+    cost a single level check. Calling this again replaces the old setup.
+    """
+    global _listener
+    stop_logging()
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(
+        log_queue, handler, respect_handler_level=True
+    )
+    _listener.start()
+
+    # LOG_FORMAT shows no thread or process, so records needn't look them up
+    logging.logThreads = logging.logProcesses = logging.logMultiprocessing = False
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(_RawQueueHandler(log_queue))
+    root.setLevel(logging.WARNING if quiet else level)
+
+
+def stop_logging():
+    """Flush whatever is still queued and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
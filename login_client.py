@@ -0,0 +1,180 @@
+import asyncio
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import requests
+
+LOGIN_URL = "https://play.pokemonshowdown.com/~~showdown/action.php"
+
+LOGIN_HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Origin": "https://play.pokemonshowdown.com",
+    "Referer": "https://play.pokemonshowdown.com/",
+}
+
+
+class LoginError(Exception):
+    """Raised when the login server does not hand out a usable assertion"""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class AssertionClient:
+    """Fetches login assertions without blocking the event loop.
+
+    The blocking HTTP call runs on a small thread pool over one pooled
+    keep-alive session, so a whole fleet of bots can log in concurrently.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 15,
+        cache_size: int = 1024,
+        login_url: str = LOGIN_URL,
+    ):
+        if retries < 1:
+            raise ValueError(f"retries must be at least 1, got {retries}")
+        self.max_workers = max_workers
+        self.retries = retries  # attempts in all, the first one included
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.login_url = login_url
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="showdown-login"
+        )
+        # requests is imported with the first session: bots that never log
+        # in to the official server don't pay for importing it
+        self._session: Optional["requests.Session"] = None
+        self._session_lock = threading.Lock()  # executor threads race to make it
+        self._cache: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._inflight: dict[tuple[str, str], asyncio.Future] = {}
+
+    def _get_session(self) -> "requests.Session":
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1, pool_maxsize=self.max_workers
+                    )
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update(LOGIN_HEADERS)
+                    self._session = session
+        return self._session
+
+    def _post(self, data: dict) -> tuple[int, str]:
+        """Blocking request, only ever called on the executor"""
+        session = self._get_session()
+        import requests
+
+        try:
+            response = session.post(self.login_url, data=data, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise LoginError(f"Request failed: {e}", retryable=True) from e
+        return response.status_code, response.text
+
+    async def get_assertion(self, userid: str, challstr: str) -> str:
+        """Return the assertion for userid/challstr, fetching it at most once"""
+        key = (userid, challstr)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        # Several callers asking for the same key share one round trip
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            assertion = await self._fetch_with_retry(userid, challstr)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                # Only the owner was cancelled: the others get a LoginError
+                # they can handle (and retry), not a cancellation of their own
+                e = LoginError("Login attempt was cancelled", retryable=True)
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        else:
+            future.set_result(assertion)
+            self._remember(key, assertion)
+            return assertion
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _fetch_with_retry(self, userid: str, challstr: str) -> str:
+        loop = asyncio.get_running_loop()
+        data = {
+            "act": "getassertion",
+            "userid": userid,
+            "challstr": challstr,
+            "pass": "",  # Empty password for guest login
+        }
+
+        last_error: Optional[LoginError] = None
+        for attempt in range(self.retries):
+            if attempt:
+                delay = self.backoff * (2 ** (attempt - 1))
+                await asyncio.sleep(delay + random.uniform(0, delay))
+            try:
+                status, text = await loop.run_in_executor(
+                    self._executor, self._post, data
+                )
+            except LoginError as e:
+                last_error = e
+                continue
+
+            if status != 200:
+                last_error = LoginError(f"HTTP error {status}", retryable=status >= 500)
+                if last_error.retryable:
+                    continue
+                raise last_error
+
+            assertion = text.strip()
+            if assertion.startswith(";;"):
+                # Error message from server, retrying will not change it
+                raise LoginError(f"Server error: {assertion}")
+            if len(assertion) <= 10:  # Valid assertion should be longer
+                raise LoginError(f"Invalid assertion received: {assertion}")
+            return assertion
+
+        raise last_error
+
+    def _remember(self, key: tuple[str, str], assertion: str):
+        self._cache[key] = assertion
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+_default_client: Optional[AssertionClient] = None
+
+
+def get_default_client() -> AssertionClient:
+    """Client shared by every bot in the process"""
+    global _default_client
+    if _default_client is None:
+        _default_client = AssertionClient()
+    return _default_client
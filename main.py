@@ -1,20 +1,29 @@
 # main.py
 import asyncio
+import os
+import sys
 from battle_manager import BattleManager
 from battle_manager_online import OfficialBattleManager
-import logging
+from local_server import LocalShowdownServer
+from log_config import configure_logging
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# SHOWDOWN_QUIET=1 keeps only warnings and errors (production mode)
+configure_logging(quiet=os.environ.get("SHOWDOWN_QUIET") == "1")
 
 async def main():
-    i = input("Mode : ")
+    # python main.py 2 skips the prompt; launcher.py runs fleets from a config
+    i = sys.argv[1] if len(sys.argv) > 1 else input("Mode : ")
     if i == "0":
         manager = BattleManager()
         await manager.run_battle()
     elif i == "1":
         manager = OfficialBattleManager()
         await manager.test_against_real_players()
+    elif i == "2":
+        # Same as mode 0, against the offline stand-in instead of a real server
+        async with LocalShowdownServer():
+            manager = BattleManager()
+            await manager.run_battle()
 
 if __name__ == "__main__":
     asyncio.run(main())
-
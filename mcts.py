@@ -0,0 +1,459 @@
+"""Time-bounded, root-parallel Monte Carlo tree search over a simplified battle.
+
+The battle is snapshotted into small picklable objects (estimated stats,
+types, known moves, HP, boosts) and searched in worker processes: each
+worker runs UCB1 over our legal choices at the root, samples a random
+opponent reply, resolves the turn and plays random turns out to a fixed
+depth. Workers stop at an absolute deadline and report visit counts and
+values; the parent sums them and picks the most visited choice.
+
+In random battle formats set_predictor has data for, opponent moves not
+revealed yet are filled in with the likeliest ones for the species. The
+simplified model ignores abilities, items, status, weather, hazards and
+unrevealed opponent Pokémon. It is a cheap lookahead, not a simulator.
+"""
+
+import asyncio
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from actions import PASS, ActionSet, legal_actions, to_choice
+from battle_state import BattleState, PokemonState
+from move_index import SPREAD_TARGETS, get_move
+from pokedex import effectiveness, get_species
+from protocol import REQUEST_TIMEOUT
+from set_predictor import MOVE_SLOTS, has_sets, predict_mon
+
+# Share of the request timeout a search may use by default
+SEARCH_BUDGET_SHARE = 0.05
+
+# Opponent Pokémon we have seen, without set data or revealed moves, get one
+# STAB attack per type of this power
+PLACEHOLDER_POWER = 80
+
+class SimMove:
+    __slots__ = ("power", "type", "physical", "accuracy", "priority", "target")
+
+    def __init__(self, power, move_type, physical, accuracy, priority, target):
+        self.power = power
+        self.type = move_type
+        self.physical = physical
+        self.accuracy = accuracy
+        self.priority = priority
+        self.target = target
+
+
+class SimMon:
+    __slots__ = ("types", "stats", "level", "hp", "max_hp", "boosts", "moves")
+
+    def __init__(self, types, stats, level, hp, max_hp, moves):
+        self.types = types
+        self.stats = stats  # atk, def, spa, spd, spe
+        self.level = level
+        self.hp = hp
+        self.max_hp = max_hp
+        self.boosts = [0, 0, 0, 0, 0]
+        self.moves = moves
+
+    def copy(self) -> "SimMon":
+        mon = SimMon(
+            self.types, self.stats, self.level, self.hp, self.max_hp, self.moves
+        )
+        mon.boosts = self.boosts[:]
+        return mon
+
+
+class SimSide:
+    __slots__ = ("team", "active")
+
+    def __init__(self, team: list[SimMon], active: list[Optional[int]]):
+        self.team = team
+        self.active = active  # team index per position, None when empty
+
+    def copy(self) -> "SimSide":
+        return SimSide([mon.copy() for mon in self.team], self.active[:])
+
+    def bench(self) -> list[int]:
+        return [
+            i
+            for i, mon in enumerate(self.team)
+            if mon.hp > 0 and i not in self.active
+        ]
+
+    def score(self) -> float:
+        return sum(mon.hp / mon.max_hp for mon in self.team) / max(1, len(self.team))
+
+
+def _estimate_stats(species_name: str, level: int) -> tuple[int, ...]:
+    species = get_species(species_name)
+    base = species.base_stats if species is not None else (80,) * 6
+    stats = tuple((2 * b + 52) * level // 100 + 5 for b in base)
+    max_hp = (2 * base[0] + 52) * level // 100 + level + 10
+    return (max_hp,) + stats[1:]
+
+
+def _sim_moves(move_ids: list[str], types: tuple[str, ...], physical: bool) -> list:
+    """Moves in request order; ones missing from the index do no damage"""
+    moves = []
+    for move_id in move_ids:
+        info = get_move(move_id)
+        if info is None:
+            moves.append(SimMove(0, "Normal", physical, 1.0, 0, "normal"))
+            continue
+        moves.append(
+            SimMove(
+                info.base_power if info.category != "Status" else 0,
+                info.type,
+                info.category == "Physical",
+                1.0 if info.accuracy is True else info.accuracy / 100,
+                info.priority,
+                info.target,
+            )
+        )
+    if not moves:
+        moves = [
+            SimMove(PLACEHOLDER_POWER, t, physical, 1.0, 0, "normal") for t in types
+        ]
+    return moves
+
+
+def _foe_moves(mon: PokemonState) -> list[str]:
+    """Revealed moves, topped up to four with the likeliest predicted ones"""
+    prediction = predict_mon(mon)
+    if prediction is None:
+        return mon.moves
+    moves = list(mon.moves)
+    for move_id, _ in prediction.moves:
+        if len(moves) >= MOVE_SLOTS:
+            break
+        # The search can't use a move it knows nothing about
+        if move_id not in moves and get_move(move_id) is not None:
+            moves.append(move_id)
+    return moves
+
+
+def _sim_mon(
+    mon: PokemonState,
+    stats: Optional[dict] = None,
+    move_ids: Optional[list[str]] = None,
+) -> SimMon:
+    species = get_species(mon.species)
+    types = species.types if species is not None else ("Normal",)
+    if mon.terastallized and mon.tera_type:
+        types = (mon.tera_type,)
+    estimated = _estimate_stats(mon.species, mon.level)
+    if stats:
+        battle_stats = tuple(stats[s] for s in ("atk", "def", "spa", "spd", "spe"))
+        max_hp = mon.max_hp
+    else:
+        battle_stats = estimated[1:]
+        max_hp = estimated[0]
+    hp = max_hp * mon.hp_fraction
+    sim = SimMon(
+        types,
+        battle_stats,
+        mon.level,
+        hp,
+        max_hp,
+        _sim_moves(
+            mon.moves if move_ids is None else move_ids,
+            types,
+            battle_stats[0] >= battle_stats[2],
+        ),
+    )
+    sim.boosts = [mon.boosts[i] for i in range(5)]
+    return sim
+
+
+def snapshot(
+    state: BattleState, request: dict, battle_format: Optional[str] = None
+) -> Optional[tuple[SimSide, SimSide]]:
+    """(our side, their side) for the search, or None if the state is too thin.
+
+    Unrevealed opponent moves are predicted only if battle_format has set data.
+    """
+    ours, theirs = state.our_side, state.foe_side
+    if ours is None or theirs is None or not ours.team:
+        return None
+    stats = [p.get("stats") for p in request.get("side", {}).get("pokemon", [])]
+    our_team = [
+        _sim_mon(mon, stats[i] if i < len(stats) else None)
+        for i, mon in enumerate(ours.team)
+    ]
+    active_count = len(request.get("active", [])) or 1
+    our_active = [i if i < len(our_team) else None for i in range(active_count)]
+
+    foe_mons = list(theirs.pokemon.values())
+    if has_sets(battle_format):
+        foe_team = [_sim_mon(mon, move_ids=_foe_moves(mon)) for mon in foe_mons]
+    else:
+        foe_team = [_sim_mon(mon) for mon in foe_mons]
+    foe_active = []
+    for position in range(active_count):
+        mon = theirs.active[position]
+        foe_active.append(foe_mons.index(mon) if mon in foe_mons else None)
+    if not foe_team or all(i is None for i in foe_active):
+        return None
+    return SimSide(our_team, our_active), SimSide(foe_team, foe_active)
+
+
+def _boost(stage: int) -> float:
+    return (2 + stage) / 2 if stage >= 0 else 2 / (2 - stage)
+
+
+def _damage(
+    rng: random.Random, user: SimMon, move: SimMove, foe: SimMon, spread: bool
+) -> float:
+    if move.power <= 0 or rng.random() > move.accuracy:
+        return 0.0
+    a, d = (0, 1) if move.physical else (2, 3)
+    attack = user.stats[a] * _boost(user.boosts[a])
+    defense = foe.stats[d] * _boost(foe.boosts[d])
+    base = ((2 * user.level / 5 + 2) * move.power * attack / defense) / 50 + 2
+    modifier = effectiveness(move.type, foe.types) * rng.uniform(0.85, 1.0)
+    if move.type in user.types:
+        modifier *= 1.5
+    if spread:
+        modifier *= 0.75
+    return base * modifier
+
+
+def _random_action(rng: random.Random, side: SimSide) -> list[tuple]:
+    """One option per position for a rollout: mostly attacks, sometimes switches"""
+    action = []
+    bench = side.bench()
+    for index in side.active:
+        mon = side.team[index] if index is not None else None
+        if mon is None or mon.hp <= 0:
+            action.append(PASS)
+        elif bench and rng.random() < 0.1:
+            choice = rng.choice(bench)
+            bench.remove(choice)
+            action.append(("switch", choice))
+        else:
+            move = rng.randrange(len(mon.moves))
+            action.append(("move", move, rng.choice((1, 2))))
+    return action
+
+
+def _resolve(rng: random.Random, sides: tuple[SimSide, SimSide], actions) -> None:
+    """Play one turn in place: switches, then moves by priority and speed"""
+    queue = []
+    for side_index, (side, action) in enumerate(zip(sides, actions)):
+        for position, option in enumerate(action):
+            if option[0] == "switch":
+                if side.team[option[1]].hp > 0 and option[1] not in side.active:
+                    side.active[position] = option[1]
+            elif option[0] == "move" and side.active[position] is not None:
+                mon = side.team[side.active[position]]
+                if option[1] < len(mon.moves):
+                    move = mon.moves[option[1]]
+                    speed = mon.stats[4] * _boost(mon.boosts[4])
+                    tiebreak = rng.random()
+                    queue.append(
+                        (move.priority, speed, tiebreak, side_index, position, option)
+                    )
+    queue.sort(reverse=True)
+
+    for _, _, _, side_index, position, option in queue:
+        side, foe_side = sides[side_index], sides[1 - side_index]
+        user_index = side.active[position]
+        if user_index is None or side.team[user_index].hp <= 0:
+            continue
+        user = side.team[user_index]
+        move = user.moves[option[1]]
+        living = [
+            i for i in foe_side.active if i is not None and foe_side.team[i].hp > 0
+        ]
+        if not living:
+            break
+        if option[2] is not None and option[2] < 0:
+            continue  # aimed at our own ally
+        if move.target in SPREAD_TARGETS:
+            targets = living
+        else:
+            wanted = option[2] if option[2] and option[2] > 0 else 1
+            position_index = min(wanted - 1, len(foe_side.active) - 1)
+            target = foe_side.active[position_index]
+            targets = [target if target in living else living[0]]
+        for target in targets:
+            foe = foe_side.team[target]
+            foe.hp = max(0.0, foe.hp - _damage(rng, user, move, foe, len(targets) > 1))
+
+    for side in sides:
+        for position, index in enumerate(side.active):
+            if index is not None and side.team[index].hp <= 0:
+                bench = side.bench()
+                side.active[position] = bench[0] if bench else None
+
+
+def _value(sides: tuple[SimSide, SimSide]) -> float:
+    ours, theirs = sides
+    if all(mon.hp <= 0 for mon in theirs.team):
+        return 1.0
+    if all(mon.hp <= 0 for mon in ours.team):
+        return -1.0
+    return ours.score() - theirs.score()
+
+
+def search_worker(
+    sides: tuple[SimSide, SimSide],
+    actions: ActionSet,
+    deadline: float,
+    seed: int,
+    depth: int = 6,
+    exploration: float = 1.4,
+) -> tuple[list[int], list[float]]:
+    """Run UCB1 rollouts until time.monotonic() passes deadline (pool entry point)"""
+    rng = random.Random(seed)
+    visits = [0] * len(actions)
+    values = [0.0] * len(actions)
+    total = 0
+    while time.monotonic() < deadline:
+        if total < len(actions):
+            pick = total
+        else:
+            log_total = math.log(total)
+            pick = max(
+                range(len(actions)),
+                key=lambda i: values[i] / visits[i]
+                + exploration * math.sqrt(log_total / visits[i]),
+            )
+        ours, theirs = sides[0].copy(), sides[1].copy()
+        game = (ours, theirs)
+        _resolve(rng, game, (actions[pick], _random_action(rng, theirs)))
+        for _ in range(depth - 1):
+            if abs(_value(game)) == 1.0:
+                break
+            replies = (_random_action(rng, ours), _random_action(rng, theirs))
+            _resolve(rng, game, replies)
+        visits[pick] += 1
+        values[pick] += _value(game)
+        total += 1
+    return visits, values
+
+
+class SearchPool:
+    """Worker processes shared by every search in this process"""
+
+    def __init__(self, processes: Optional[int] = None):
+        self.processes = processes or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.active_searches = 0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.processes)
+        return self._executor
+
+    def fair_share(self) -> int:
+        """Workers one more search may use without starving the others"""
+        return max(1, self.processes // max(1, self.active_searches))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+_default_pool: Optional[SearchPool] = None
+
+
+def get_search_pool(processes: Optional[int] = None) -> SearchPool:
+    """The process's shared pool; processes sizes it if it isn't made yet"""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = SearchPool(processes)
+    return _default_pool
+
+
+def close_search_pool():
+    """Shut the shared pool down. Pool workers that searched must call this
+    before they exit, or their exit waits on the search processes forever"""
+    global _default_pool
+    if _default_pool is not None:
+        _default_pool.close()
+        _default_pool = None
+
+
+class MCTSSearch:
+    """Anytime search: returns the best /choose found when the budget runs out"""
+
+    def __init__(
+        self,
+        budget: Optional[float] = None,
+        pool: Optional[SearchPool] = None,
+        depth: int = 6,
+        exploration: float = 1.4,
+    ):
+        if budget is None:
+            budget = REQUEST_TIMEOUT * SEARCH_BUDGET_SHARE
+        self.budget = budget
+        self.pool = pool
+        self.depth = depth
+        self.exploration = exploration
+        self.last_visits = 0  # rollouts behind the last decision
+
+    async def choose(
+        self,
+        state: BattleState,
+        request: dict,
+        actions: Optional[ActionSet] = None,
+    ) -> Optional[str]:
+        """Search a request off-loop; None when there is nothing to search"""
+        if actions is None:
+            # The model has no terastallization or mega evolution
+            actions = legal_actions(request, state, gimmicks=False)
+        if len(actions) < 2:
+            return to_choice(actions[0]) if actions else None
+        sides = snapshot(state, request, state.battle_format)
+        if sides is None:
+            return None
+
+        pool = self.pool or get_search_pool()
+        loop = asyncio.get_running_loop()
+        pool.active_searches += 1
+        try:
+            # An absolute deadline: jobs that wait in the pool queue behind other
+            # rooms' searches just get less time instead of overrunning
+            deadline = time.monotonic() + self.budget
+            futures = [
+                loop.run_in_executor(
+                    pool.executor,
+                    search_worker,
+                    sides,
+                    actions,
+                    deadline,
+                    random.getrandbits(32),
+                    self.depth,
+                    self.exploration,
+                )
+                for _ in range(pool.fair_share())
+            ]
+            done, pending = await asyncio.wait(
+                futures, timeout=self.budget * 1.5 + 0.1
+            )
+            for future in pending:
+                future.cancel()
+        finally:
+            pool.active_searches -= 1
+
+        visits = [0] * len(actions)
+        values = [0.0] * len(actions)
+        for future in done:
+            if future.exception() is not None:
+                continue
+            worker_visits, worker_values = future.result()
+            for i in range(len(actions)):
+                visits[i] += worker_visits[i]
+                values[i] += worker_values[i]
+        self.last_visits = sum(visits)
+        if not self.last_visits:
+            return None
+        best = max(range(len(actions)), key=lambda i: (visits[i], values[i]))
+        return to_choice(actions[best])
@@ -0,0 +1,91 @@
+import functools
+import json
+import os
+import re
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Union
+
+MOVES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "moves.json"
+)
+
+# Showdown target types that hit several Pokémon at once
+SPREAD_TARGETS = frozenset({"allAdjacent", "allAdjacentFoes"})
+
+# Target types where /choose must name a target slot in doubles
+CHOSEN_TARGETS = frozenset(
+    {"normal", "any", "adjacentFoe", "adjacentAlly", "adjacentAllyOrSelf"}
+)
+
+ALLY_TARGETS = frozenset({"adjacentAlly", "adjacentAllyOrSelf"})
+
+
+class MoveInfo(NamedTuple):
+    id: str
+    name: str
+    type: str
+    category: str
+    base_power: int
+    accuracy: Union[int, bool]  # True for moves that never miss
+    priority: int
+    target: str
+
+    @property
+    def spread(self) -> bool:
+        return self.target in SPREAD_TARGETS
+
+    @property
+    def needs_target(self) -> bool:
+        return self.target in CHOSEN_TARGETS
+
+
+def to_id(name: str) -> str:
+    """Showdown's toID: "Will-O-Wisp" -> "willowisp\""""
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+@functools.lru_cache(maxsize=None)
+def load_move_index(path: str = MOVES_PATH) -> Mapping[str, MoveInfo]:
+    """Read the moves data file once; every bot in the process shares the result"""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    return MappingProxyType(
+        {
+            move_id: MoveInfo(
+                id=move_id,
+                name=data["name"],
+                type=data["type"],
+                category=data["category"],
+                base_power=data["basePower"],
+                accuracy=data["accuracy"],
+                priority=data["priority"],
+                target=data["target"],
+            )
+            for move_id, data in raw.items()
+        }
+    )
+
+
+def get_move(move: str) -> Optional[MoveInfo]:
+    """Look a move up by id or display name"""
+    index = load_move_index()
+    info = index.get(move)
+    if info is None:
+        info = index.get(to_id(move))
+    return info
+
+
+def check_request_targets(request: dict) -> list[str]:
+    """Compare the index against the target fields the server sent in a |request|"""
+    problems = []
+    for active in request.get("active") or []:
+        for move in active.get("moves", []):
+            move_id = move.get("id") or to_id(move.get("move", ""))
+            info = get_move(move_id)
+            if info is None:
+                problems.append(f"{move_id}: not in move index")
+            elif "target" in move and move["target"] != info.target:
+                problems.append(
+                    f"{move_id}: request says {move['target']}, index says {info.target}"
+                )
+    return problems
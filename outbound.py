@@ -0,0 +1,80 @@
+"""Outgoing command queue: several commands per websocket frame.
+
+Showdown reads a client frame "ROOM|line\\nline..." as one command per line,
+run in order in ROOM, so commands queued back to back for the same room can
+share a frame. That saves a send, and a throttle token, per command.
+"""
+
+import asyncio
+import contextlib
+from typing import Awaitable, Callable
+
+# Showdown refuses frames of more lines than this from normal users
+MAX_LINES = 3
+# Commands queued before put() flushes on its own
+MAX_PENDING = 64
+
+
+class Outbox:
+    """Commands waiting to go out on one connection.
+
+    Inside batch() put() only queues, and the outermost batch sends
+    everything when it ends; the bot wraps the handling of each incoming
+    frame in one, so the commands its handlers issue go out together.
+    Outside a batch put() sends at once. Either way put() waits for the
+    send (and the connection's throttle) once max_pending commands are
+    queued, so producers slow down instead of queueing without bound.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        max_lines: int = MAX_LINES,
+        max_pending: int = MAX_PENDING,
+    ):
+        self._send = send
+        self.max_lines = max(1, max_lines)
+        self.max_pending = max(1, max_pending)
+        self.pending: list[tuple[str, str]] = []  # (room id, command)
+        self.commands = 0
+        self.frames = 0
+        self._depth = 0
+        self._lock = asyncio.Lock()  # one flush at a time keeps commands in order
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    async def put(self, room_id: str, command: str):
+        self.pending.append((room_id, command))
+        self.commands += 1
+        if self._depth == 0 or len(self.pending) >= self.max_pending:
+            await self.flush()
+
+    @contextlib.asynccontextmanager
+    async def batch(self):
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                await self.flush()
+
+    async def flush(self):
+        """Send what is queued, consecutive commands for a room in one frame"""
+        async with self._lock:
+            while self.pending:
+                room_id = self.pending[0][0]
+                lines = []
+                while (
+                    self.pending
+                    and self.pending[0][0] == room_id
+                    and len(lines) < self.max_lines
+                ):
+                    lines.append(self.pending.pop(0)[1])
+                await self._send(f"{room_id}|" + "\n".join(lines))
+                self.frames += 1
+
+    def clear(self):
+        """Drop queued commands, e.g. ones meant for a connection that closed"""
+        self.pending.clear()
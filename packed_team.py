@@ -0,0 +1,259 @@
+"""Showdown's packed team format: parse, check against format rules, cache.
+
+A packed team is one set per Pokémon, separated by "]":
+
+    NICKNAME|SPECIES|ITEM|ABILITY|MOVES|NATURE|EVS|GENDER|IVS|SHINY|LEVEL|MISC
+
+where SPECIES is blank when it equals NICKNAME, MOVES, EVS and IVS are
+comma-separated, and MISC is "happiness,pokeball,hiddenpower,gigantamax,
+dynamaxlevel,teratype". Teambuilder exports put "format]teamname|" in front.
+
+load_team() parses and validates once per (team text, format) in a process,
+so a fleet of bots sharing a team pays for it once, and a bad team raises
+TeamValidationError before anything is sent to the server.
+"""
+
+import functools
+import hashlib
+from typing import NamedTuple, Optional
+
+from move_index import to_id
+from pokedex import STATS, get_species, load_pokedex, load_type_chart
+
+NATURES = frozenset(
+    "Adamant Bashful Bold Brave Calm Careful Docile Gentle Hardy Hasty Impish"
+    " Jolly Lax Lonely Mild Modest Naive Naughty Quiet Quirky Rash Relaxed"
+    " Sassy Serious Timid".split()
+)
+
+MAX_EV = 252
+MAX_EV_TOTAL = 510
+MAX_IV = 31
+
+_FIELDS = 12
+
+# Hyphenated names that are species of their own, not a forme of the prefix
+_NOT_FORMES = frozenset({"porygonz"})
+
+
+class TeamValidationError(ValueError):
+    """A team that can't be parsed or breaks the format's rules"""
+
+    def __init__(self, problems: list[str]):
+        self.problems = problems
+        super().__init__("; ".join(problems))
+
+
+class TeamSet(NamedTuple):
+    nickname: str
+    species: str
+    item: str
+    ability: str
+    moves: tuple[str, ...]
+    nature: str
+    evs: tuple[int, ...]  # in STATS order
+    gender: str
+    ivs: tuple[int, ...]
+    shiny: bool
+    level: int
+    misc: tuple[str, ...]  # happiness, pokeball, hidden power, gmax, dmax level, tera
+
+    @property
+    def tera_type(self) -> str:
+        return self.misc[5] if len(self.misc) > 5 else ""
+
+    def pack(self) -> str:
+        return "|".join(
+            [
+                self.nickname,
+                "" if self.nickname == self.species else self.species,
+                self.item,
+                self.ability,
+                ",".join(self.moves),
+                self.nature,
+                _pack_spread(self.evs, 0),
+                self.gender,
+                _pack_spread(self.ivs, MAX_IV),
+                "S" if self.shiny else "",
+                "" if self.level == 100 else str(self.level),
+                ",".join(self.misc) if any(self.misc) else "",
+            ]
+        )
+
+
+class PackedTeam(NamedTuple):
+    format: str  # from a teambuilder export, "" otherwise
+    name: str
+    sets: tuple[TeamSet, ...]
+
+    def pack(self) -> str:
+        """The bare packed team, as /utm expects it"""
+        return "]".join(team_set.pack() for team_set in self.sets)
+
+    @property
+    def species(self) -> list[str]:
+        return [team_set.species for team_set in self.sets]
+
+
+def _pack_spread(values: tuple[int, ...], default: int) -> str:
+    if all(value == default for value in values):
+        return ""
+    return ",".join("" if value == default else str(value) for value in values)
+
+
+def _spread(text: str, default: int, label: str, problems: list[str]):
+    if not text:
+        return (default,) * len(STATS)
+    parts = text.split(",")
+    if len(parts) != len(STATS):
+        problems.append(f"{label} needs {len(STATS)} values, got {text!r}")
+        return (default,) * len(STATS)
+    values = []
+    for part in parts:
+        if part and not part.isdigit():
+            problems.append(f"{label} value {part!r} is not a number")
+            part = ""
+        values.append(int(part) if part else default)
+    return tuple(values)
+
+
+def _parse_set(chunk: str, index: int, problems: list[str]) -> Optional[TeamSet]:
+    fields = chunk.split("|")
+    if len(fields) != _FIELDS:
+        problems.append(
+            f"set {index + 1} has {len(fields)} fields, expected {_FIELDS}:"
+            f" {chunk[:40]!r}"
+        )
+        return None
+    nickname, species = fields[0], fields[1] or fields[0]
+    label = f"set {index + 1} ({species or '?'})"
+    level = fields[10]
+    if level and not level.isdigit():
+        problems.append(f"{label}: level {level!r} is not a number")
+        level = ""
+    return TeamSet(
+        nickname=nickname or species,
+        species=species,
+        item=fields[2],
+        ability=fields[3],
+        moves=tuple(move for move in fields[4].split(",") if move),
+        nature=fields[5],
+        evs=_spread(fields[6], 0, f"{label}: EVs", problems),
+        gender=fields[7],
+        ivs=_spread(fields[8], MAX_IV, f"{label}: IVs", problems),
+        shiny=fields[9] == "S",
+        level=int(level) if level else 100,
+        misc=tuple(fields[11].split(",")) if fields[11] else (),
+    )
+
+
+def parse_packed(text: str) -> PackedTeam:
+    """Packed team text (bare or teambuilder export) -> PackedTeam"""
+    text = text.strip()
+    team_format = name = ""
+    head, sep, rest = text.partition("]")
+    if sep and "|" not in head:
+        # "format]teamname|..." export prefix
+        team_format, text = head, rest
+        if text.split("]", 1)[0].count("|") >= _FIELDS:
+            name, text = text.split("|", 1)
+    problems: list[str] = []
+    sets = []
+    for index, chunk in enumerate(text.split("]") if text else []):
+        team_set = _parse_set(chunk, index, problems)
+        if team_set is not None:
+            sets.append(team_set)
+    if problems:
+        raise TeamValidationError(problems)
+    if not sets:
+        raise TeamValidationError(["team is empty"])
+    return PackedTeam(team_format, name, tuple(sets))
+
+
+def _base_species(name: str) -> str:
+    """"Rotom-Wash" -> "rotom", for Species Clause; "Chi-Yu" stays "chiyu" """
+    species_id = to_id(name)
+    base = to_id(name.split("-", 1)[0])
+    if species_id not in _NOT_FORMES and base in load_pokedex():
+        return base
+    return species_id
+
+
+def validate(team: PackedTeam, battle_format: str) -> list[str]:
+    """What is wrong with the team for battle_format, as messages.
+
+    Covers the rules that can be checked from local data: team size,
+    species, moveslots, natures, EV and IV limits, levels, tera types,
+    Species Clause, and VGC's Item Clause and Monotype's shared type. Moves
+    are not checked: data/moves.json only holds the common ones.
+    """
+    problems = []
+    battle_format = to_id(battle_format)
+    vgc = "vgc" in battle_format or "battlestadium" in battle_format
+    min_size = 4 if vgc else 1
+    if not min_size <= len(team.sets) <= 6:
+        problems.append(f"{len(team.sets)} Pokémon, expected {min_size} to 6")
+    types = set(load_type_chart()) | {"Stellar"}
+    for team_set in team.sets:
+        label = team_set.nickname or team_set.species
+        if get_species(team_set.species) is None:
+            problems.append(f"{label}: unknown species {team_set.species!r}")
+        if not 1 <= len(team_set.moves) <= 4:
+            problems.append(f"{label}: {len(team_set.moves)} moves, expected 1 to 4")
+        if len(set(map(to_id, team_set.moves))) != len(team_set.moves):
+            problems.append(f"{label}: duplicate moves")
+        if team_set.nature and team_set.nature not in NATURES:
+            problems.append(f"{label}: unknown nature {team_set.nature!r}")
+        if any(ev > MAX_EV for ev in team_set.evs):
+            problems.append(f"{label}: an EV is above {MAX_EV}")
+        if sum(team_set.evs) > MAX_EV_TOTAL:
+            problems.append(f"{label}: {sum(team_set.evs)} EVs, above {MAX_EV_TOTAL}")
+        if any(iv > MAX_IV for iv in team_set.ivs):
+            problems.append(f"{label}: an IV is above {MAX_IV}")
+        if not 1 <= team_set.level <= 100:
+            problems.append(f"{label}: level {team_set.level}")
+        if team_set.tera_type and team_set.tera_type not in types:
+            problems.append(f"{label}: unknown tera type {team_set.tera_type!r}")
+
+    if "anythinggoes" not in battle_format and "hackmons" not in battle_format:
+        seen = set()
+        for species in map(_base_species, team.species):
+            if species in seen:
+                problems.append(f"Species Clause: more than one {species}")
+            seen.add(species)
+    if vgc:
+        items = [to_id(team_set.item) for team_set in team.sets if team_set.item]
+        if len(set(items)) != len(items):
+            problems.append("Item Clause: two Pokémon hold the same item")
+    if "monotype" in battle_format:
+        shared = None
+        for name in team.species:
+            species = get_species(name)
+            if species is not None:
+                kinds = set(species.types)
+                shared = kinds if shared is None else shared & kinds
+        if shared is not None and not shared:
+            problems.append("Monotype: the team does not share a type")
+    return problems
+
+
+@functools.lru_cache(maxsize=256)
+def _load(text: str, battle_format: str) -> tuple[Optional[PackedTeam], tuple]:
+    try:
+        team = parse_packed(text)
+    except TeamValidationError as e:
+        return None, tuple(e.problems)
+    return team, tuple(validate(team, battle_format))
+
+
+def load_team(text: str, battle_format: str) -> PackedTeam:
+    """Parse and validate, cached per process by the team's text and format"""
+    team, problems = _load(text, battle_format)
+    if problems:
+        raise TeamValidationError(list(problems))
+    return team
+
+
+def team_hash(team: PackedTeam) -> str:
+    """Content hash of the packed sets, the same for any export of one team"""
+    return hashlib.sha1(team.pack().encode()).hexdigest()
@@ -0,0 +1,69 @@
+import functools
+import json
+import os
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
+from move_index import to_id
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+POKEDEX_PATH = os.path.join(DATA_DIR, "pokedex.json")
+TYPECHART_PATH = os.path.join(DATA_DIR, "typechart.json")
+
+STATS = ("hp", "atk", "def", "spa", "spd", "spe")
+
+
+class Species(NamedTuple):
+    id: str
+    name: str
+    types: tuple[str, ...]
+    base_stats: tuple[int, ...]  # in STATS order
+
+    def base(self, stat: str) -> int:
+        return self.base_stats[STATS.index(stat)]
+
+
+@functools.lru_cache(maxsize=None)
+def load_pokedex(path: str = POKEDEX_PATH) -> Mapping[str, Species]:
+    """Read the species data file once; every bot in the process shares it"""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    return MappingProxyType(
+        {
+            species_id: Species(
+                id=species_id,
+                name=data["name"],
+                types=tuple(data["types"]),
+                base_stats=tuple(data["baseStats"][stat] for stat in STATS),
+            )
+            for species_id, data in raw.items()
+        }
+    )
+
+
+@functools.lru_cache(maxsize=2048)
+def get_species(name: str) -> Optional[Species]:
+    """Look up "Rotom-Wash" or "rotomwash"; unknown formes fall back to the base"""
+    dex = load_pokedex()
+    species = dex.get(to_id(name))
+    if species is None and "-" in name:
+        species = dex.get(to_id(name.split("-", 1)[0]))
+    return species
+
+
+@functools.lru_cache(maxsize=None)
+def load_type_chart(path: str = TYPECHART_PATH) -> Mapping[str, Mapping[str, float]]:
+    """attacking type -> defending type -> multiplier (missing pairs are 1x)"""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    return MappingProxyType(
+        {attacker: MappingProxyType(row) for attacker, row in raw.items()}
+    )
+
+
+def effectiveness(move_type: str, defender_types: tuple[str, ...]) -> float:
+    row = load_type_chart().get(move_type, {})
+    multiplier = 1.0
+    for defender_type in defender_types:
+        multiplier *= row.get(defender_type, 1.0)
+    return multiplier
@@ -0,0 +1,586 @@
+"""Decision policies: given the battle state, the |request| and our legal joint
+actions, return the text to send after /choose.
+
+ShowdownBot holds one Policy and calls choose() for every request that needs
+an answer. Policies that can score many decisions at once implement
+choose_batch(), and BatchedPolicy collects calls from every room and bot in
+the process over a short window and answers them with one choose_batch().
+"""
+
+import asyncio
+import logging
+import random
+from typing import Optional
+
+import damage
+from actions import PASS, ActionSet, parse_option
+from battle_state import BattleState
+from eval_cache import EvalCache, get_eval_cache
+from mcts import MCTSSearch
+from move_index import ALLY_TARGETS, CHOSEN_TARGETS, get_move
+from timing import Timings
+
+# Share of HP at or below which the heuristic switches out (doubles is lower)
+SWITCH_HP_SINGLES = 0.2
+SWITCH_HP_DOUBLES = 0.15
+
+# (state, request, legal joint actions) for one pending decision
+Decision = tuple[BattleState, dict, ActionSet]
+
+
+class Policy:
+    """Base class; subclasses override choose() and optionally choose_batch()"""
+
+    name = "policy"
+
+    async def choose(
+        self, state: BattleState, request: dict, legal: ActionSet
+    ) -> Optional[str]:
+        raise NotImplementedError
+
+    async def choose_batch(self, decisions: list[Decision]) -> list[Optional[str]]:
+        """One choose() per decision, run together; override to score them at once"""
+        return list(await asyncio.gather(*(self.choose(*d) for d in decisions)))
+
+
+class RandomPolicy(Policy):
+    """Uniform over the legal joint actions; the baseline everything should beat"""
+
+    name = "random"
+
+    async def choose(self, state, request, legal):
+        return (await self.choose_batch([(state, request, legal)]))[0]
+
+    async def choose_batch(self, decisions):
+        return [
+            legal.choice(random.randrange(len(legal))) if len(legal) else None
+            for _, _, legal in decisions
+        ]
+
+
+class HeuristicPolicy(Policy):
+    """The bot's original rules: switch out at low HP, otherwise attack.
+
+    Attacks are the damage engine's best option per slot when numpy is
+    available, a random legal move with a sensible target otherwise. The
+    rules work from the raw request, so what they pick is checked against
+    the legal actions (see legal_choice()) before it is sent.
+    """
+
+    name = "heuristic"
+
+    def __init__(
+        self,
+        use_damage: bool = True,
+        timings: Optional[Timings] = None,
+        log: Optional[logging.Logger] = None,
+    ):
+        self.damage_engine = (
+            damage.DamageEngine() if use_damage and damage.available() else None
+        )
+        self.timings = timings or Timings()
+        self.log = log or logging.getLogger(__name__)
+
+    async def choose(self, state, request, legal):
+        best = self.best_options([(state, request)])[0]
+        return self.legal_choice(self.decide(state, request, best), legal, best)
+
+    async def choose_batch(self, decisions):
+        turns = [(state, request) for state, request, _ in decisions]
+        return [
+            self.legal_choice(self.decide(state, request, best), legal, best)
+            for (state, request, legal), best in zip(
+                decisions, self.best_options(turns)
+            )
+        ]
+
+    def legal_choice(
+        self, preferred: Optional[str], legal: ActionSet, best_options: dict
+    ) -> Optional[str]:
+        """preferred if it is legal, else the legal joint action closest to it.
+
+        The rules can ask for a switch while trapped or aim at an empty slot;
+        such a slot falls back to another target for the same move, then to
+        the damage engine's pick, then to any legal option.
+        """
+        if not len(legal):
+            return preferred
+        width = legal.width
+        wanted = [parse_option(part.strip()) for part in (preferred or "").split(",")]
+        if len(wanted) < width:
+            # The rules leave out fainted slots, which the server passes itself
+            for slot in range(width):
+                if {legal.options[i] for i in legal.table[slot::width]} == {PASS}:
+                    wanted.insert(slot, PASS)
+        scores: dict[tuple[int, int], int] = {}
+
+        def score(slot: int, option_id: int) -> int:
+            key = (slot, option_id)
+            if key not in scores:
+                option = legal.options[option_id]
+                want = wanted[slot] if slot < len(wanted) else None
+                best = best_options.get(slot)
+                points = 0
+                if option == want:
+                    points = 8
+                elif want and option[0] == want[0] == "move" and option[1] == want[1]:
+                    points = 4
+                elif best is not None and option[:2] == ("move", best.move):
+                    points = 2 if option[2] == best.target else 1
+                scores[key] = points
+            return scores[key]
+
+        totals = [
+            sum(score(slot, option_id) for slot, option_id in enumerate(legal.row(i)))
+            for i in range(len(legal))
+        ]
+        top = max(totals)
+        if top == 8 * width:
+            return preferred
+        rows = [i for i, total in enumerate(totals) if total == top]
+        choice = legal.choice(rows[0] if len(rows) == 1 else random.choice(rows))
+        self.log.debug("⚠️ %s is not legal here, sending %s", preferred, choice)
+        return choice
+
+    def best_options(
+        self, turns: list[tuple[BattleState, dict]]
+    ) -> list[dict[int, damage.Option]]:
+        """Highest-damage option per active slot, empty without the damage engine"""
+        if self.damage_engine is None:
+            return [{} for _ in turns]
+        move_turns = [
+            (state, request) if not request.get("forceSwitch") else (state, {})
+            for state, request in turns
+        ]
+        with self.timings.span("damage_score"):
+            return self.damage_engine.best_options_batch(move_turns)
+
+    def decide(
+        self, state: BattleState, request: dict, best_options: dict
+    ) -> Optional[str]:
+        side = state.our_side
+        pokemon_list = side.team if side is not None else []
+
+        # Handle forced switch (single or double)
+        if request.get("forceSwitch"):
+            return self.choose_switch_doubles(request, pokemon_list)
+
+        if not pokemon_list:
+            self.log.warning("⚠️ No pokemon in side data")
+            return None
+
+        active_pokemon = request["active"]
+        if len(active_pokemon) > 1:
+            return self.double_battle_moves(active_pokemon, pokemon_list, best_options)
+        return self.single_battle_moves(active_pokemon[0], pokemon_list, best_options)
+
+    def single_battle_moves(self, active, pokemon_list, best_options) -> Optional[str]:
+        """Handle move selection for single battles (original logic)"""
+        current_pokemon = pokemon_list[0]
+
+        moves = active.get("moves", [])
+
+        # Decide whether to switch
+        no_moves = not any(not m.get("disabled", False) for m in moves)
+        low_hp = current_pokemon.hp_fraction <= SWITCH_HP_SINGLES
+
+        if low_hp or no_moves:
+            # Out of low HP only into something above the threshold (so
+            # healthier too), or two weak Pokémon swap places every turn
+            min_hp = 0.0 if no_moves else SWITCH_HP_SINGLES
+            valid_switch = self.find_valid_switch_target(pokemon_list, min_hp=min_hp)
+            if valid_switch is not None:
+                self.log.debug("🔄 Switched to slot %d", valid_switch)
+                return f"switch {valid_switch}"
+
+        # Choose a move
+        legal_moves = [
+            i for i, move in enumerate(moves) if not move.get("disabled", False)
+        ]
+
+        if legal_moves:
+            best = best_options.get(0)
+            choice_index = best.move if best else random.choice(legal_moves)
+            self.log.debug("⚡ Used %s", moves[choice_index]["move"])
+            return f"move {choice_index + 1}"
+        self.log.warning("❌ No legal moves available!")
+        return None
+
+    def double_battle_moves(
+        self, active_pokemon, pokemon_list, best_options
+    ) -> Optional[str]:
+        """Handle move selection for double battles"""
+        self.log.debug(
+            "Processing double battle with %d active Pokemon", len(active_pokemon)
+        )
+
+        move_choices = []
+        used_switch_slots = set()  # Both slots must not bring in the same Pokemon
+
+        for slot_index, active in enumerate(active_pokemon):
+            slot_number = slot_index + 1
+
+            # Get current Pokemon info
+            if slot_index < len(pokemon_list):
+                current_pokemon = pokemon_list[slot_index]
+                pokemon_name = current_pokemon.species
+                hp_fraction = current_pokemon.hp_fraction
+                fainted = current_pokemon.fainted
+            else:
+                pokemon_name = "Unknown"
+                hp_fraction = 1.0
+                fainted = False
+
+            # SKIP if Pokemon is fainted
+            if fainted:
+                self.log.debug(
+                    "Slot %d (%s) is fainted, skipping", slot_number, pokemon_name
+                )
+                continue  # Don't add any command for this slot
+
+            moves = active.get("moves", [])
+
+            # Check if we should switch this Pokemon
+            no_moves = not any(not m.get("disabled", False) for m in moves)
+            low_hp = hp_fraction <= SWITCH_HP_DOUBLES
+
+            if low_hp or no_moves:
+                min_hp = 0.0 if no_moves else SWITCH_HP_DOUBLES
+                valid_switch = self.find_valid_switch_target_doubles(
+                    pokemon_list, used_switch_slots, min_hp=min_hp
+                )
+                if valid_switch is not None:
+                    move_choices.append(f"switch {valid_switch}")
+                    used_switch_slots.add(valid_switch)
+                    self.log.debug(
+                        "Slot %d (%s) switching to slot %d",
+                        slot_number,
+                        pokemon_name,
+                        valid_switch,
+                    )
+                    continue
+
+            # Find legal moves
+            legal_moves = [
+                i for i, move in enumerate(moves) if not move.get("disabled", False)
+            ]
+
+            best = best_options.get(slot_index)
+            if best is not None:
+                # Highest expected damage, with the target it was scored against
+                move_data = moves[best.move]
+                move_number = best.move + 1
+                target_info = {
+                    "needs_target": best.target is not None,
+                    "target": best.target,
+                    "description": f"best damage ({best.score:.2f})",
+                }
+            elif legal_moves:
+                # Choose random move
+                choice_index = random.choice(legal_moves)
+                move_data = moves[choice_index]
+                move_number = choice_index + 1
+
+                # Determine if move needs a target based on move data
+                target_info = self.determine_move_target(move_data, slot_index)
+            else:
+                # No legal moves available - use default
+                move_choices.append("move 0")
+                self.log.debug(
+                    "Slot %d (%s) has no legal moves, using default",
+                    slot_number,
+                    pokemon_name,
+                )
+                continue
+
+            if target_info["needs_target"]:
+                move_choices.append(f"move {move_number} {target_info['target']}")
+                self.log.debug(
+                    "Slot %d (%s) using %s targeting %s",
+                    slot_number,
+                    pokemon_name,
+                    move_data["move"],
+                    target_info["description"],
+                )
+            else:
+                move_choices.append(f"move {move_number}")
+                self.log.debug(
+                    "Slot %d (%s) using %s (no target needed)",
+                    slot_number,
+                    pokemon_name,
+                    move_data["move"],
+                )
+
+        if not move_choices:
+            self.log.warning(
+                "No moves generated for double battle (all Pokemon fainted)!"
+            )
+            return None
+        return ", ".join(move_choices)
+
+    def choose_switch_doubles(self, request, pokemon_list) -> Optional[str]:
+        """Handle forced switches for both single and double battles"""
+        force_switch = request.get("forceSwitch", [])
+
+        # Handle both single (boolean) and double (list) force switch formats
+        if isinstance(force_switch, bool):
+            # Single battle format
+            self.log.debug("🔄 Forced to switch (single battle)!")
+            valid_switch = self.find_valid_switch_target(pokemon_list)
+            if valid_switch is not None:
+                self.log.debug("✅ Switched to slot %d", valid_switch)
+                return f"switch {valid_switch}"
+            self.log.warning("🆘 Emergency switch to slot 2")
+            return "switch 2"
+
+        # Double battle format (list of booleans)
+        self.log.debug("🔄 Forced to switch (double battle): %s", force_switch)
+        switch_choices = []
+        used_switch_slots = set()  # Track which slots we've already used for switching
+
+        for slot_index, must_switch in enumerate(force_switch):
+            if must_switch:
+                valid_switch = self.find_valid_switch_target_doubles(
+                    pokemon_list, used_switch_slots
+                )
+                if valid_switch is not None:
+                    switch_choices.append(f"switch {valid_switch}")
+                    used_switch_slots.add(valid_switch)
+                    self.log.debug(
+                        "✅ Slot %d switching to slot %d",
+                        slot_index + 1,
+                        valid_switch,
+                    )
+                else:
+                    # Emergency switch - find any available slot
+                    for emergency_slot in range(
+                        3, len(pokemon_list) + 1
+                    ):  # Start from slot 3
+                        if emergency_slot not in used_switch_slots:
+                            switch_choices.append(f"switch {emergency_slot}")
+                            used_switch_slots.add(emergency_slot)
+                            self.log.warning(
+                                "🆘 Emergency switch slot %d to slot %d",
+                                slot_index + 1,
+                                emergency_slot,
+                            )
+                            break
+                    else:
+                        # Last resort - use any slot
+                        emergency_slot = len(pokemon_list)
+                        switch_choices.append(f"switch {emergency_slot}")
+                        self.log.warning(
+                            "🆘 Final emergency switch slot %d to slot %d",
+                            slot_index + 1,
+                            emergency_slot,
+                        )
+            else:
+                # This slot doesn't need to switch - send pass command
+                switch_choices.append("pass")
+                self.log.debug("⏭️ Slot %d not switching (pass)", slot_index + 1)
+
+        return ", ".join(switch_choices) if switch_choices else None
+
+    def find_valid_switch_target_doubles(self, pokemon_list, used_slots, min_hp=0.0):
+        """Find a valid switch target, avoiding already used slots"""
+        with self.timings.span("switch_search"):
+            for i, mon in enumerate(pokemon_list):
+                slot_number = i + 1
+
+                # Skip fainted and active Pokemon and slots already switched to
+                if mon.fainted or mon.active or slot_number in used_slots:
+                    continue
+                if mon.hp_fraction <= min_hp:
+                    continue
+
+                self.log.debug("🎯 Valid switch target - Slot %d", slot_number)
+                return slot_number
+
+            return None
+
+    def find_valid_switch_target(self, pokemon_list, exclude_active=False, min_hp=0.0):
+        """Find a pokemon to switch to that isn't fainted or already active,
+        with more than min_hp of its HP left"""
+        with self.timings.span("switch_search"):
+            for i, mon in enumerate(pokemon_list):
+                if mon.fainted or mon.active or mon.hp_fraction <= min_hp:
+                    continue
+
+                self.log.debug("🎯 Valid switch target - Slot %d", i + 1)
+                return i + 1
+
+            return None
+
+    def determine_move_target(self, move_data, user_slot):
+        """Determine appropriate target for a move based on its properties"""
+        with self.timings.span("target_select"):
+            # The server's own target field wins; the move index covers the rest
+            target = move_data.get("target")
+            if target is None:
+                info = get_move(move_data.get("id") or move_data.get("move", ""))
+                target = info.target if info else "normal"
+
+            if target not in CHOSEN_TARGETS:
+                # Self, field, side and spread moves take no target slot
+                return {
+                    "needs_target": False,
+                    "target": None,
+                    "description": f"area effect ({target})",
+                }
+
+            if target in ALLY_TARGETS:
+                # Allies are negative: slot 0 (a) is -1, slot 1 (b) is -2
+                ally_slot = -2 if user_slot == 0 else -1
+                return {
+                    "needs_target": True,
+                    "target": ally_slot,
+                    "description": f"ally slot {ally_slot}",
+                }
+
+            # Target random opponent
+            opponent_target = random.choice([1, 2])  # 1 = opponent left, 2 = right
+            return {
+                "needs_target": True,
+                "target": opponent_target,
+                "description": f"opponent slot {opponent_target}",
+            }
+
+
+class SearchPolicy(Policy):
+    """MCTS on move requests, another policy for everything it can't answer"""
+
+    name = "search"
+
+    def __init__(
+        self, search: Optional[MCTSSearch] = None, fallback: Optional[Policy] = None
+    ):
+        self.search = search or MCTSSearch()
+        self.fallback = fallback or HeuristicPolicy()
+
+    async def choose(self, state, request, legal):
+        if not request.get("forceSwitch"):
+            choice = await self.search.choose(
+                state, request, legal.without_gimmicks()
+            )
+            if choice is not None:
+                return choice
+        return await self.fallback.choose(state, request, legal)
+
+
+class BatchedPolicy(Policy):
+    """Pools decisions from every caller for up to `window` seconds, then answers
+    them all with one inner.choose_batch() call.
+
+    Share one instance between all the bots of a process. A batch is flushed
+    when the window closes or max_batch decisions are waiting, whichever
+    comes first, so a lone decision waits at most `window`. Any inner policy
+    works; one without a choose_batch() of its own makes the batch's
+    choose() calls side by side.
+    """
+
+    name = "batched"
+
+    def __init__(self, inner: Policy, window: float = 0.002, max_batch: int = 256):
+        self.inner = inner
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: list[tuple[Decision, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._answering: set[asyncio.Task] = set()  # batches inner is deciding
+        self.batches = 0
+        self.decisions = 0
+
+    async def choose(self, state, request, legal):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((state, request, legal), future))
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self.flush)
+        return await future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.batches += 1
+        self.decisions += len(pending)
+        task = asyncio.get_running_loop().create_task(self._answer(pending))
+        self._answering.add(task)
+        task.add_done_callback(self._answering.discard)
+
+    async def _answer(self, pending: list[tuple[Decision, asyncio.Future]]):
+        try:
+            choices = await self.inner.choose_batch(
+                [decision for decision, _ in pending]
+            )
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), choice in zip(pending, choices):
+            if not future.done():
+                future.set_result(choice)
+
+    @property
+    def mean_batch(self) -> float:
+        return self.decisions / self.batches if self.batches else 0.0
+
+
+class CachedPolicy(Policy):
+    """Answers positions the cache has seen before, asks inner for the rest.
+
+    Uses the process-wide cache by default, so entries outlive the battle
+    that produced them and are shared by every bot in the process.
+    """
+
+    name = "cached"
+
+    def __init__(self, inner: Policy, cache: Optional[EvalCache] = None):
+        self.inner = inner
+        self.cache = cache or get_eval_cache()
+
+    async def choose(self, state, request, legal):
+        key = self.cache.key(state, legal)
+        choice = self.cache.get(key)
+        if choice is None:
+            choice = await self.inner.choose(state, request, legal)
+            if choice is not None:
+                self.cache.put(key, choice)
+        return choice
+
+    async def choose_batch(self, decisions):
+        keys = [self.cache.key(state, legal) for state, _, legal in decisions]
+        choices = [self.cache.get(key) for key in keys]
+        missing = [i for i, choice in enumerate(choices) if choice is None]
+        if missing:
+            answers = await self.inner.choose_batch([decisions[i] for i in missing])
+            for i, choice in zip(missing, answers):
+                choices[i] = choice
+                if choice is not None:
+                    self.cache.put(keys[i], choice)
+        return choices
+
+
+POLICIES = {
+    "random": RandomPolicy,
+    "heuristic": HeuristicPolicy,
+    "search": SearchPolicy,
+    "batched": lambda: BatchedPolicy(HeuristicPolicy()),
+    "cached-search": lambda: CachedPolicy(SearchPolicy()),
+}
+
+
+def make_policy(name: str) -> Policy:
+    """Policy by name, for command-line switches"""
+    try:
+        return POLICIES[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown policy {name!r}, expected one of {', '.join(POLICIES)}"
+        ) from None
@@ -0,0 +1,97 @@
+from typing import Awaitable, Callable, Iterable, Optional, Union
+
+from battle_room import BattleRoom
+
+# Seconds the bot allows itself to answer one |request|
+REQUEST_TIMEOUT = 30
+
+# Seconds to wait for the server to answer a login attempt before the next one
+LOGIN_ACK_TIMEOUT = 2.0
+
+# handler(room, args, line) -> None, sync or async
+Handler = Callable[
+    [Optional[BattleRoom], list[str], str], Union[None, Awaitable[None]]
+]
+
+# observer(room, msg_type, args), called for every line before its handlers
+Observer = Callable[[Optional[BattleRoom], str, list[str]], None]
+
+
+def parse_line(line: str) -> tuple[str, list[str]]:
+    """Split a protocol line once into its message type and arguments.
+
+    "|switch|p1a: Garchomp|Garchomp, L77|100/100" -> ("switch", ["p1a: Garchomp", ...]).
+    Lines that don't start with "|" are plain room text and get the type "".
+    """
+    parts = line.split("|")
+    if parts[0] or len(parts) == 1:
+        return "", [line]
+    return parts[1], parts[2:]
+
+
+class MessageDispatcher:
+    """Looks up protocol lines by message type in a table of registered handlers.
+
+    A line costs about what the if/elif chain it replaced did, observer
+    included (benchmarks/bench_dispatch.py): the table is there so handlers
+    can be added per type and get their arguments split once, not for speed.
+    """
+
+    def __init__(self):
+        self._handlers: dict[str, list[Handler]] = {}
+        self._fallback: Optional[Handler] = None
+        self._observers: list[Observer] = []
+
+    def register(self, msg_type: str, handler: Handler):
+        """Run handler for every line of msg_type, after any already registered"""
+        self._handlers.setdefault(msg_type, []).append(handler)
+
+    def unregister(self, msg_type: str, handler: Handler):
+        handlers = self._handlers.get(msg_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if not handlers:
+            self._handlers.pop(msg_type, None)
+
+    def on(self, msg_type: str):
+        """Decorator form of register"""
+
+        def decorator(handler: Handler) -> Handler:
+            self.register(msg_type, handler)
+            return handler
+
+        return decorator
+
+    def set_fallback(self, handler: Optional[Handler]):
+        """Handler for lines whose type has nothing registered"""
+        self._fallback = handler
+
+    def observe(self, observer: Observer):
+        """See every parsed line, whatever its type, before it is handled"""
+        self._observers.append(observer)
+
+    def handlers_for(self, msg_type: str) -> list[Handler]:
+        return self._handlers.get(msg_type, [])
+
+    async def dispatch(self, room: Optional[BattleRoom], line: str):
+        await self.dispatch_lines(room, (line,))
+
+    async def dispatch_lines(self, room: Optional[BattleRoom], lines: Iterable[str]):
+        """dispatch() each line in order, in one coroutine for the whole frame"""
+        observers = self._observers
+        table = self._handlers
+        fallback = (self._fallback,) if self._fallback is not None else ()
+        for line in lines:
+            # parse_line, inlined; one split and no copy of the line
+            parts = line.split("|")
+            if parts[0] or len(parts) == 1:
+                msg_type, args = "", [line]
+            else:
+                msg_type, args = parts[1], parts[2:]
+            for observer in observers:
+                observer(room, msg_type, args)
+            for handler in table.get(msg_type, fallback):
+                # Sync handlers return None; anything else is awaited
+                result = handler(room, args, line)
+                if result is not None:
+                    await result
@@ -0,0 +1,152 @@
+"""Append-only battle replay log.
+
+Every frame a bot receives for a battle room and every choice it sends are
+kept, in order and with timestamps, and written out as one record when the
+battle ends. A log file is
+
+    MAGIC, then records: <u32 payload length> <u32 crc32 of payload> <payload>
+
+and a payload is one battle, zlib-compressed:
+
+    <u32 length> <meta JSON>, then events: <u8 kind> <f32 seconds since
+    start> <u32 length> <UTF-8 data>
+
+where kind is FRAME (a raw websocket message) or CHOICE (the text after
+/choose). Each battle is self-contained, so files can be streamed a record
+at a time and a truncated tail only loses the battle being written.
+
+Compression and disk writes happen on a writer thread; the event loop only
+appends events to an in-memory list. Files rotate every battles_per_file
+battles and are named <prefix>-<start time>-<pid>-<sequence>.sdrl.
+"""
+
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from typing import Optional
+
+MAGIC = b"SDRL\x01"
+RECORD_HEADER = struct.Struct("<II")  # payload length, crc32
+META_HEADER = struct.Struct("<I")
+EVENT_HEADER = struct.Struct("<BfI")  # kind, seconds since start, data length
+
+FRAME = 0
+CHOICE = 1
+
+SUFFIX = ".sdrl"
+
+
+class BattleRecord:
+    """Events of one battle as seen by one bot, kept until the battle ends"""
+
+    __slots__ = ("room_id", "username", "started", "_start", "events")
+
+    def __init__(self, room_id: str, username: str):
+        self.room_id = room_id
+        self.username = username
+        self.started = time.time()
+        self._start = time.monotonic()
+        self.events: list[tuple[int, float, str]] = []
+
+    def frame(self, msg: str):
+        self.events.append((FRAME, time.monotonic() - self._start, msg))
+
+    def choice(self, choice: str):
+        self.events.append((CHOICE, time.monotonic() - self._start, choice))
+
+
+def encode_battle(record: BattleRecord, meta: dict) -> bytes:
+    """Uncompressed payload for one battle"""
+    meta = {
+        "room_id": record.room_id,
+        "username": record.username,
+        "started": record.started,
+        **meta,
+    }
+    meta_bytes = json.dumps(meta, separators=(",", ":")).encode()
+    parts = [META_HEADER.pack(len(meta_bytes)), meta_bytes]
+    for kind, offset, text in record.events:
+        data = text.encode()
+        parts.append(EVENT_HEADER.pack(kind, offset, len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+class ReplayRecorder:
+    """Compresses and appends finished battles to rotating log files.
+
+    One recorder can be shared by every bot in a process. Call close() when
+    done; it waits for queued battles to be written.
+    """
+
+    def __init__(
+        self,
+        directory: str = "replays",
+        battles_per_file: int = 1000,
+        level: int = 6,
+        prefix: str = "battles",
+    ):
+        self.directory = directory
+        self.battles_per_file = max(1, battles_per_file)
+        self.level = level
+        self.prefix = prefix
+        self.battles = 0  # written so far
+        self.path: Optional[str] = None
+        self._file = None
+        self._in_file = 0
+        self._sequence = 0
+        self._started = time.strftime("%Y%m%d-%H%M%S")
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._write_loop, name="replay-writer", daemon=True
+        )
+        self._thread.start()
+
+    def open(self, room_id: str, username: str) -> BattleRecord:
+        return BattleRecord(room_id, username)
+
+    def finish(self, record: BattleRecord, meta: Optional[dict] = None):
+        """Queue a finished battle for writing"""
+        self._queue.put((record, meta or {}))
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            record, meta = item
+            payload = zlib.compress(encode_battle(record, meta), self.level)
+            self._write(payload)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, payload: bytes):
+        if self._file is None or self._in_file >= self.battles_per_file:
+            self._rotate()
+        self._file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self._file.flush()
+        self._in_file += 1
+        self.battles += 1
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self._sequence += 1
+        name = f"{self.prefix}-{self._started}-{os.getpid()}-{self._sequence:05d}"
+        self.path = os.path.join(self.directory, name + SUFFIX)
+        self._file = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self._in_file = 0
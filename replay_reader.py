@@ -0,0 +1,193 @@
+"""Stream recorded battles back through a bot, offline and at full speed.
+
+iter_battles() reads replay_log files one record at a time, so a file of
+months of self-play is never held in memory; iter_text_frames() reads raw
+protocol text with frames separated by blank lines (data/sample_battle.log).
+replay() pushes frames through a real ShowdownBot.handle_message with a
+FakeWebSocket that captures what the bot sends: no network, no sleeps.
+
+Run as a script it re-decides recorded battles and reports how often the
+current policy makes the choice that was recorded, which makes it a
+regression check for decision changes:
+
+    python replay_reader.py replays/*.sdrl [--policy heuristic] [--min-agreement 0.95]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+import zlib
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from log_config import configure_logging
+from policy import POLICIES, Policy, make_policy
+from replay_log import CHOICE, EVENT_HEADER, FRAME, MAGIC, META_HEADER, RECORD_HEADER
+from showdown_bot import ShowdownBot
+
+logger = logging.getLogger(__name__)
+
+
+class RecordedBattle(NamedTuple):
+    meta: dict
+    frames: list[str]
+    choices: list[str]  # what was sent after /choose, in order
+
+
+def decode_battle(payload: bytes) -> RecordedBattle:
+    """One compressed record payload -> the battle it holds"""
+    raw = zlib.decompress(payload)
+    (meta_length,) = META_HEADER.unpack_from(raw, 0)
+    offset = META_HEADER.size
+    meta = json.loads(raw[offset : offset + meta_length])
+    offset += meta_length
+    frames, choices = [], []
+    while offset < len(raw):
+        kind, _, length = EVENT_HEADER.unpack_from(raw, offset)
+        offset += EVENT_HEADER.size
+        text = raw[offset : offset + length].decode()
+        offset += length
+        if kind == FRAME:
+            frames.append(text)
+        elif kind == CHOICE:
+            choices.append(text)
+    return RecordedBattle(meta, frames, choices)
+
+
+def iter_battles(paths: Iterable[str]) -> Iterator[RecordedBattle]:
+    """Every battle in the given log files, read and decoded one at a time"""
+    for path in paths:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a replay log")
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if not header:
+                    break
+                if len(header) < RECORD_HEADER.size:
+                    logger.warning("%s: truncated record header, stopping", path)
+                    break
+                length, crc = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length:
+                    logger.warning("%s: truncated last record, stopping", path)
+                    break
+                if zlib.crc32(payload) != crc:
+                    # The length may be as damaged as the payload; give up on the file
+                    logger.warning("%s: checksum mismatch, stopping", path)
+                    break
+                yield decode_battle(payload)
+
+
+def iter_text_frames(path: str) -> Iterator[str]:
+    """Frames of a raw protocol text file, split at blank lines"""
+    lines: list[str] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line:
+                lines.append(line)
+            elif lines:
+                yield "\n".join(lines)
+                lines = []
+    if lines:
+        yield "\n".join(lines)
+
+
+class FakeWebSocket:
+    """Stands in for the client connection: sends are recorded, nothing is sent"""
+
+    def __init__(self):
+        self.sent: list[str] = []
+        self.closed = False
+
+    async def send(self, message: str):
+        self.sent.append(message)
+
+    async def close(self):
+        self.closed = True
+
+
+def choices_sent(ws: FakeWebSocket) -> list[str]:
+    choices = []
+    for msg in ws.sent:
+        # A frame may carry several commands, one per line
+        for line in msg.partition("|")[2].split("\n"):
+            if line.startswith("/choose "):
+                choices.append(line[len("/choose ") :])
+    return choices
+
+
+async def replay(bot: ShowdownBot, frames: Iterable[str]) -> list[str]:
+    """Feed frames to bot as if they came off its socket; returns its choices"""
+    ws = FakeWebSocket()
+    bot.ws = ws
+    for frame in frames:
+        await bot.handle_message(frame)
+        # A live server waits for the choice before it goes on; so does this
+        await bot.settle()
+    return choices_sent(ws)
+
+
+class ReplayStats(NamedTuple):
+    battles: int
+    frames: int
+    decisions: int
+    recorded: int  # choices in the log
+    agreed: int  # decisions identical to the recorded ones, position by position
+    elapsed: float
+
+    @property
+    def agreement(self) -> float:
+        compared = max(self.decisions, self.recorded)
+        return self.agreed / compared if compared else 1.0
+
+
+async def redecide(
+    battles: Iterable[RecordedBattle], policy: Policy, seed: int = 0
+) -> ReplayStats:
+    """Replay each battle through a fresh bot and compare its choices.
+
+    The random module is reseeded per battle, so a run is deterministic for
+    a given policy and log.
+    """
+    counts = [0, 0, 0, 0, 0]
+    start = time.perf_counter()
+    for battle in battles:
+        random.seed(seed)
+        bot = ShowdownBot(battle.meta.get("username"), policy=policy)
+        choices = await replay(bot, battle.frames)
+        counts[0] += 1
+        counts[1] += len(battle.frames)
+        counts[2] += len(choices)
+        counts[3] += len(battle.choices)
+        counts[4] += sum(a == b for a, b in zip(choices, battle.choices))
+    return ReplayStats(*counts, time.perf_counter() - start)
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="heuristic")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-agreement", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    configure_logging(quiet=True)
+
+    stats = asyncio.run(
+        redecide(iter_battles(args.paths), make_policy(args.policy), args.seed)
+    )
+    print(
+        f"{stats.battles} battles, {stats.frames} frames, {stats.decisions} decisions"
+        f" in {stats.elapsed:.2f}s ({stats.frames / max(stats.elapsed, 1e-9):,.0f}"
+        f" frames/s); {stats.agreement:.1%} agree with the recording"
+    )
+    if stats.agreement < args.min_agreement:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
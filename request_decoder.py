@@ -0,0 +1,62 @@
+"""Decoding |request| payloads: a fast JSON backend and no repeat work.
+
+The JSON backend is picked on first use: orjson, then ujson, then the
+standard library, whichever imports first. Pass backend= to force one.
+
+A request byte-identical to the last one seen for the same key (the bot
+uses the room id) is not decoded again; Showdown sends the same request
+again when a room is rejoined, for one. The repeat gets the same dict as
+the first time, so requests are shared and must not be modified.
+
+Requests are kept as decoded. Nearly all of side.pokemon is read (the team
+library stores it whole), and deleting the few unread top-level keys
+doesn't shrink a dict: pruning them saved no memory and slowed every decode.
+"""
+
+import importlib
+import json
+from typing import Callable, Optional
+
+# Tried in order when no backend is named
+BACKENDS = ("orjson", "ujson", "json")
+
+
+def get_backend(name: Optional[str] = None) -> tuple[str, Callable[[str], object]]:
+    """(name, loads) for the named backend, or the first one installed"""
+    for candidate in (name,) if name else BACKENDS:
+        try:
+            module = importlib.import_module(candidate)
+        except ImportError:
+            if name:
+                raise
+            continue
+        return candidate, module.loads
+    return "json", json.loads
+
+
+class RequestDecoder:
+    """Decodes request payloads, skipping ones seen last for the same key.
+
+    A repeat returns the very dict decode() returned before: the room's
+    BattleState and team hold on to parts of it, so callers read requests
+    and never modify them. Call forget() when a key's room closes.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend, self._loads = get_backend(backend)
+        self._last: dict[str, tuple[str, dict]] = {}  # key -> (payload, request)
+        self.decoded = 0
+        self.repeats = 0
+
+    def decode(self, payload: str, key: str = "") -> dict:
+        last = self._last.get(key)
+        if last is not None and last[0] == payload:
+            self.repeats += 1
+            return last[1]
+        request = self._loads(payload)
+        self._last[key] = (payload, request)
+        self.decoded += 1
+        return request
+
+    def forget(self, key: str = ""):
+        self._last.pop(key, None)
@@ -0,0 +1,219 @@
+"""Predict an opponent's moves, item, ability and tera type in random battles.
+
+data/randbats_sets.json has the layout of the published random battle set
+statistics: for each species a level and its roles, each role with a
+weight and the chance of every ability, item, tera type and move appearing
+in it. The file shipped here covers the local server's roster; a published
+stats file for the format is a drop-in replacement. Other formats (doubles
+random battles, anything with built teams) draw from other sets, so
+has_sets() says which formats the data can be used for.
+
+load_index() reads it once per process into interned ids and flat arrays.
+predict() weighs each role by how well it explains what has been revealed
+so far. BattleState already keeps |move|, |-item|, |-ability| and
+|-terastallize| on the Pokémon, so predict_mon() just reads them. Results
+are cached by (species, evidence). The same opponent showing the same
+moves in a hundred battles is worked out once, and a repeat query is a
+dict lookup.
+"""
+
+import functools
+import json
+import os
+from array import array
+from typing import Mapping, NamedTuple, Optional
+
+from battle_state import PokemonState
+from move_index import to_id
+from pokedex import DATA_DIR
+
+SETS_PATH = os.path.join(DATA_DIR, "randbats_sets.json")
+
+MOVE_SLOTS = 4
+
+# Format ids whose sets data/randbats_sets.json describes
+SETS_FORMATS = frozenset({"gen9randombattle"})
+
+# Weight kept by a role that doesn't list a revealed move or item, so one
+# surprise (a Tricked item, data older than the battle) can't rule out all
+SURPRISE = 0.01
+
+# Role fields, in the order _Role.fields keeps them
+_FIELDS = ("moves", "items", "abilities", "teraTypes")
+
+
+class _Role(NamedTuple):
+    name: str
+    weight: float
+    # per field: (ids, probabilities), parallel arrays
+    fields: tuple[tuple[array, array], ...]
+
+
+class _Species(NamedTuple):
+    level: int
+    roles: tuple[_Role, ...]
+
+
+class SetIndex(NamedTuple):
+    names: tuple[str, ...]  # id -> name (move, item, ability and type ids)
+    ids: Mapping[str, int]
+    species: Mapping[str, _Species]
+
+
+class SetPrediction(NamedTuple):
+    species: str
+    level: int
+    roles: tuple[tuple[str, float], ...]  # posterior, most likely first
+    moves: tuple[tuple[str, float], ...]  # chance each move is on the set
+    items: tuple[tuple[str, float], ...]
+    abilities: tuple[tuple[str, float], ...]
+    tera_types: tuple[tuple[str, float], ...]
+
+    def likely_moves(self, n: int = MOVE_SLOTS) -> list[str]:
+        """The n moves most likely on the set, revealed ones first"""
+        return [move for move, _ in self.moves[:n]]
+
+
+@functools.lru_cache(maxsize=None)
+def load_index(path: str = SETS_PATH) -> SetIndex:
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    names: list[str] = []
+    ids: dict[str, int] = {}
+
+    def intern(name: str) -> int:
+        key = to_id(name)
+        if key not in ids:
+            ids[key] = len(names)
+            names.append(key)
+        return ids[key]
+
+    species = {}
+    for name, data in raw.items():
+        roles = []
+        for role_name, role in data.get("roles", {}).items():
+            fields = []
+            for field in _FIELDS:
+                entries = role.get(field, {})
+                fields.append(
+                    (
+                        array("H", [intern(k) for k in entries]),
+                        array("f", entries.values()),
+                    )
+                )
+            roles.append(_Role(role_name, float(role["weight"]), tuple(fields)))
+        species[to_id(name)] = _Species(int(data.get("level", 100)), tuple(roles))
+    return SetIndex(tuple(names), ids, species)
+
+
+def _chance(entries: tuple[array, array], value_id: Optional[int]) -> float:
+    ids, probabilities = entries
+    if value_id is None or value_id not in ids:
+        return 0.0
+    return probabilities[ids.index(value_id)]
+
+
+def _ranked(totals: dict[int, float], names: tuple[str, ...]) -> tuple:
+    ranked = sorted(totals.items(), key=lambda item: -item[1])
+    return tuple((names[i], round(p, 4)) for i, p in ranked if p > 0)
+
+
+@functools.lru_cache(maxsize=65536)
+def _predict(
+    species_id: str,
+    moves: tuple[str, ...],
+    item: Optional[str],
+    ability: Optional[str],
+    tera_type: Optional[str],
+) -> Optional[SetPrediction]:
+    index = load_index()
+    entry = index.species.get(species_id)
+    if entry is None or not entry.roles:
+        return None
+    ids = index.ids
+    move_ids = [ids.get(move, -1) for move in moves]
+    known = (item, ability, tera_type)
+
+    posterior = []
+    for role in entry.roles:
+        weight = role.weight
+        for move_id in move_ids:
+            weight *= max(_chance(role.fields[0], move_id), SURPRISE)
+        for field, value in zip(role.fields[1:], known):
+            if value is not None:
+                weight *= max(_chance(field, ids.get(value)), SURPRISE)
+        posterior.append(weight)
+    total = sum(posterior) or 1.0
+    posterior = [weight / total for weight in posterior]
+
+    # Moves: revealed ones are certain; the rest share the free slots
+    free = max(0, MOVE_SLOTS - len(moves))
+    move_totals: dict[int, float] = {}
+    for role, weight in zip(entry.roles, posterior):
+        role_ids, probabilities = role.fields[0]
+        unseen = [
+            (i, p) for i, p in zip(role_ids, probabilities) if i not in move_ids
+        ]
+        mass = sum(p for _, p in unseen)
+        scale = free / mass if mass else 0.0
+        for i, p in unseen:
+            move_totals[i] = move_totals.get(i, 0.0) + weight * min(1.0, p * scale)
+    revealed = tuple((move, 1.0) for move in moves)
+
+    others = []
+    for field_index, value in enumerate(known, start=1):
+        if value is not None:
+            others.append(((value, 1.0),))
+            continue
+        totals: dict[int, float] = {}
+        for role, weight in zip(entry.roles, posterior):
+            for i, p in zip(*role.fields[field_index]):
+                totals[i] = totals.get(i, 0.0) + weight * p
+        others.append(_ranked(totals, index.names))
+
+    roles = sorted(zip(entry.roles, posterior), key=lambda item: -item[1])
+    return SetPrediction(
+        species_id,
+        entry.level,
+        tuple((role.name, round(weight, 4)) for role, weight in roles),
+        revealed + _ranked(move_totals, index.names),
+        *others,
+    )
+
+
+def has_sets(battle_format: Optional[str]) -> bool:
+    """True if predictions hold for battles of this format id"""
+    return battle_format in SETS_FORMATS
+
+
+def predict(
+    species: str,
+    moves: tuple[str, ...] = (),
+    item: Optional[str] = None,
+    ability: Optional[str] = None,
+    tera_type: Optional[str] = None,
+) -> Optional[SetPrediction]:
+    """What a species' set probably is, given what it has shown.
+
+    None for species without set data. item, ability and tera_type are
+    None while unknown; moves are the ones revealed so far.
+    """
+    return _predict(
+        to_id(species),
+        tuple(sorted(set(map(to_id, moves)))),
+        to_id(item) if item else None,
+        to_id(ability) if ability else None,
+        to_id(tera_type) if tera_type else None,
+    )
+
+
+def predict_mon(mon: PokemonState) -> Optional[SetPrediction]:
+    """predict() from what the battle state has recorded about an opponent"""
+    return predict(
+        mon.species,
+        tuple(mon.moves),
+        # "" is an item that is gone (knocked off, eaten); which one is unknown
+        mon.item or None,
+        mon.ability,
+        mon.tera_type if mon.terastallized else None,
+    )
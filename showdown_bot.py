@@ -1,17 +1,28 @@
 import asyncio
 import websockets
-import json
 import random
 import string
-from typing import Optional
-import logging
-import requests
+from typing import TYPE_CHECKING, Optional
 import hashlib
 import time
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
+from actions import ActionSet, legal_actions
+from battle_room import BattleRoom, GameResult
+from battle_state import BattleState
+from connection import THROTTLE_NOTICE, ConnectionHealth, SendThrottle
+from log_config import bot_logger
+from login_client import AssertionClient, LoginError, get_default_client
+from outbound import Outbox
+from packed_team import load_team
+from policy import HeuristicPolicy, Policy
+from protocol import LOGIN_ACK_TIMEOUT, REQUEST_TIMEOUT, Handler, MessageDispatcher
+from request_decoder import RequestDecoder
+from timing import RoomProfiler, Timings
+
+if TYPE_CHECKING:
+    # Only bots that keep replays or a team library are handed these
+    from replay_log import ReplayRecorder
+    from team_library import TeamLibrary
 
 SHOWDOWN_WS_URL = "ws://localhost:8000/showdown/websocket"
 
@@ -40,21 +51,152 @@ class ShowdownBot:
         ws_url: str = None,
         battle_format: str = "gen9randombattle",
         packed_team: str = None,
+        max_battles: int = 1,
+        login_client: Optional[AssertionClient] = None,
+        max_games: Optional[int] = None,
+        timing: bool = False,
+        timing_path: Optional[str] = None,
+        policy: Optional[Policy] = None,
+        recorder: Optional["ReplayRecorder"] = None,
+        throttle: Optional[SendThrottle] = None,
+        team_library: Optional["TeamLibrary"] = None,
     ):
         self.username = username or generate_random_username()
         self.battle_format = battle_format
         self.ws_url = ws_url or SHOWDOWN_WS_URL
         self.ws: Optional[websockets.WebSocketClientProtocol] = None
-        self.battle_room: Optional[str] = None
+        self.rooms: dict[str, BattleRoom] = {}
+        self.max_battles = max(1, max_battles)
+        # Disconnect after this many finished battles (None plays forever)
+        self.max_games = max_games
+        self.results: list[GameResult] = []
+        # Per-phase decision histograms, reported when the connection ends
+        self.timings = Timings(enabled=timing)
+        self.requests = RequestDecoder()
+        self.timing_path = timing_path
+        self.profilers: list[RoomProfiler] = []
+        # Decides every request; policies can be shared between bots
+        self.policy = policy or HeuristicPolicy(timings=self.timings, log=self.log)
+        # Keeps every frame and choice of each battle; shareable between bots
+        self.recorder = recorder
+        # Stores each battle's team and result; shareable between bots
+        self.team_library = team_library
+        # Outgoing rate limit (None sends immediately) and connection counters
+        self.throttle = throttle
+        self.health = ConnectionHealth()
+        # Commands queued while handling a frame go out together
+        self.outbox = Outbox(self.send)
+        # Fallback logins still to try, and the timer that moves on to the next
+        self._login_attempts: list[str] = []
+        self._login_timer: Optional[asyncio.TimerHandle] = None
+        self._recv_time = 0.0
+        self.searching = False
         self.logged_in = False
         self.battle_started = False
-        self.fainted_slots: set[int] = set()
-        self.team: list[dict] = []
-        self.current_request = None
         self.is_official_server = "psim.us" in (ws_url or "")
         self.packed_team = packed_team
+        # Parsed and checked against the format up front (cached per process);
+        # raises TeamValidationError rather than letting the server refuse it
+        self.team = load_team(packed_team, battle_format) if packed_team else None
+        self.login_client = login_client
+        self.dispatcher = MessageDispatcher()
+        self.register_default_handlers()
+
+    @property
+    def username(self) -> str:
+        return self._username
+
+    @username.setter
+    def username(self, value: str):
+        # Keep the per-bot logger name in step with renames
+        self._username = value
+        self.log = bot_logger(value)
+
+    @property
+    def has_capacity(self) -> bool:
+        """True while we can take on another concurrent battle"""
+        if self.max_games is not None:
+            if len(self.rooms) + len(self.results) >= self.max_games:
+                return False
+        return len(self.rooms) < self.max_battles
+
+    @property
+    def done(self) -> bool:
+        """True once max_games battles have finished"""
+        return self.max_games is not None and len(self.results) >= self.max_games
+
+    def open_room(self, room_id: str) -> BattleRoom:
+        """Get the state object for a battle room, creating it on first sight"""
+        room = self.rooms.get(room_id)
+        if room is None:
+            room = BattleRoom(room_id)
+            if self.recorder is not None:
+                room.record = self.recorder.open(room_id, self.username)
+            self.rooms[room_id] = room
+            self.battle_started = True
+            self.searching = False
+            self.log.info(
+                "⚔️ Joined %s (%d/%d battles)", room_id, len(self.rooms), self.max_battles
+            )
+        return room
+
+    def profile_room(
+        self, match: str, profiler=None, path: Optional[str] = None
+    ) -> RoomProfiler:
+        """Profile the next battle room whose id contains match (cProfile by default)"""
+        room_profiler = RoomProfiler(match, profiler, path)
+        self.profilers.append(room_profiler)
+        return room_profiler
+
+    async def close_room(self, room: BattleRoom):
+        """Forget a finished battle and queue up for the next one"""
+        if self.rooms.pop(room.room_id, None) is None:
+            return
+        room.finished = True
+        room.cancel_decision()
+        self.requests.forget(room.room_id)
+        for room_profiler in self.profilers[:]:
+            if room_profiler.room_id == room.room_id:
+                room_profiler.finish()
+                self.profilers.remove(room_profiler)
+        result = room.result(self.username)
+        self.results.append(result)
+        if room.record is not None:
+            self.recorder.finish(
+                room.record, {"format": self.battle_format, **result._asdict()}
+            )
+        if self.team_library is not None:
+            self.team_library.record(
+                self.username,
+                self.battle_format,
+                room.team,
+                result.won,
+                tie=result.winner is None,
+            )
+        try:
+            await self.command("", f"/leave {room.room_id}")
+            if self.done and not self.rooms:
+                await self.outbox.flush()
+        except Exception as e:
+            self.log.warning("❌ Failed to leave %s: %s", room.room_id, e)
+        if self.done and not self.rooms:
+            self.log.info("🏁 Finished %d battles, disconnecting", len(self.results))
+            self.outbox.clear()
+            await self.ws.close()
+            return
+        if self.logged_in and not self.searching and self.has_capacity:
+            await self.search_battle()
 
     async def connect_and_run(self):
+        """One connection's lifetime: login, rejoin open rooms, play until closed.
+
+        Errors are logged and counted in self.health rather than raised;
+        reconnecting is up to the caller (see fleet.Fleet).
+        """
+        self.logged_in = False
+        self.searching = False
+        self.outbox.clear()
+        self.health.state = "connecting"
         try:
             # Add proper headers for official server
             extra_headers = {}
@@ -68,90 +210,325 @@ class ShowdownBot:
                 self.ws_url,
             ) as ws:
                 self.ws = ws
-                print(f"✅ Connected as {self.username}")
+                self.health.connects += 1
+                self.health.connected_at = time.monotonic()
+                self.health.state = "connected"
+                self.log.info("✅ Connected to %s", self.ws_url)
                 await self.initialize()
                 await self.main_loop()
         except Exception as e:
-            print(f"❌ Connection error for {self.username}: {e}")
+            self.health.record_error(e)
+            self.log.error("❌ Connection error: %s", e)
+        finally:
+            # Choices in progress were for this connection's requests, and a
+            # rejoin replays the frames held back behind them
+            for room in self.rooms.values():
+                room.cancel_decision()
+                room.held.clear()
+            if self._login_timer is not None:
+                self._login_timer.cancel()
+                self._login_timer = None
+            if self.health.connected_at is not None:
+                self.health.disconnects += 1
+                self.health.connected_at = None
+            self.health.state = "done" if self.done else "idle"
+            self.report_timings()
+
+    def report_timings(self):
+        """Log the timing table and write it as JSON if a path was given"""
+        if not self.timings.enabled:
+            return
+        self.log.info("⏱️ Decision timings:\n%s", self.timings.report())
+        if self.timing_path:
+            self.timings.dump(self.timing_path)
 
     async def initialize(self):
         """Initialize connection and login"""
         # Don't send nick command immediately, wait for challstr
-        print(f"🔗 {self.username}: Waiting for server initialization...")
+        self.log.info("🔗 Waiting for server initialization...")
 
         # Wait for login confirmation
         while not self.logged_in:
-            msg = await self.ws.recv()
-            await self.handle_message(msg)
-
-        # Start searching for battles
-        await self.search_battle()
+            await self.handle_message(await self.recv())
+
+        async with self.outbox.batch():
+            # Battles still open from before a reconnect
+            await self.rejoin_rooms()
+            # Start searching for battles
+            await self.search_battle()
+
+    async def rejoin_rooms(self):
+        """Ask the server to resend every room we were playing in.
+
+        The server answers with the room's whole log and the pending
+        |request|; on_init resets the room's state before it is replayed.
+        """
+        for room_id in list(self.rooms):
+            self.health.rejoined += 1
+            self.log.info("🔁 Rejoining %s", room_id)
+            await self.command("", f"/join {room_id}")
+
+    async def recv(self) -> str:
+        msg = await self.ws.recv()
+        self.health.received += 1
+        self.health.last_recv = time.monotonic()
+        if self.timings.enabled:
+            self._recv_time = time.perf_counter()
+        return msg
+
+    async def command(self, room_id: str, text: str):
+        """Queue one command for a room ("" for the global room)"""
+        await self.outbox.put(room_id, text)
+
+    async def send(self, message: str):
+        """Every outgoing frame goes through here, and through the throttle"""
+        if self.throttle is not None:
+            await self.throttle.acquire()
+        await self.ws.send(message)
+        self.health.sent += 1
 
     async def main_loop(self):
         while True:
+            # Anything recv() raises ends the connection; looping on it would spin
             try:
-                msg = await self.ws.recv()
-                await self.handle_message(msg)
+                msg = await self.recv()
             except websockets.exceptions.ConnectionClosed:
-                print(f"{self.username} disconnected")
+                if not self.done:
+                    self.log.warning("Disconnected")
                 break
+            # A message we fail to handle costs only that message
+            try:
+                await self.handle_message(msg)
             except Exception as e:
-                print(f"Error for {self.username}: {e}")
+                self.health.handler_errors += 1
+                self.log.exception("Error handling message: %s", e)
+
+    def register_default_handlers(self):
+        """Fill the dispatch table with the bot's own protocol handlers"""
+        handlers = {
+            "challstr": self.on_challstr,
+            "updateuser": self.on_updateuser,
+            "updatesearch": self.on_updatesearch,
+            "init": self.on_init,
+            "noinit": self.on_noinit,
+            "raw": self.on_raw,
+            "request": self.on_request,
+            "win": self.on_battle_end,
+            "tie": self.on_battle_end,
+            "turn": self.on_turn,
+            "pm": self.on_pm,
+            "faint": self.on_faint,
+            "error": self.on_error,
+            "nametaken": self.on_nametaken,
+            "deinit": self.on_deinit,
+            "c": self.ignore_line,  # Filter out chat messages
+        }
+        for msg_type, handler in handlers.items():
+            self.dispatcher.register(msg_type, handler)
+        self.dispatcher.set_fallback(self.on_unhandled)
+        self.dispatcher.observe(self.track_state)
+
+    def register_handler(self, msg_type: str, handler: Handler):
+        """Hook extra protocol message types such as "switch" or "-damage" """
+        self.dispatcher.register(msg_type, handler)
 
     async def handle_message(self, msg: str):
-        for line in msg.split("\n"):
-            if line.startswith("|challstr|"):
-                await self.handle_challstr(line)
-            elif "|updateuser|" in line and self.username.lower() in line.lower():
-                self.logged_in = True
-                print(f"✅ Logged in as {self.username}")
-            elif "|updatesearch|" in line:
-                print(f"🔍 {self.username} searching...")
-            elif line.startswith(">battle-"):
-                room_id = line.split(">")[1].strip()
-                self.battle_room = room_id
-                self.battle_started = True
-                print(f"⚔️ {self.username} joined: {self.battle_room}")
-            elif "|request|" in line:
-                try:
-                    await asyncio.wait_for(self.handle_battle_request(line), timeout=30)
-                except asyncio.TimeoutError:
-                    print(f"⏰ {self.username}: Move timed out, skipping turn.")
-            elif "|win|" in line:
-                winner = line.split("|win|")[1].strip()
-                print(f"🏆 {self.username} sees winner: {winner}")
-            elif "|turn|" in msg:
-                print(f"🔄 {self.username}: New turn started")
-            elif "|pm|" in msg and "/challenge" in msg:
-                try:
-                    parts = msg.split("|pm|")[1].split("|")
-                    challenger = parts[0].strip()
-                    print(f"📬 Challenge received from {challenger}")
-                    await self.ws.send(f"|/accept {challenger}")
-                    print(f"✅ Accepted challenge from {challenger}")
-                except Exception as e:
-                    print(f"❌ Failed to parse challenge: {e}")
-            elif line.startswith("|faint|"):
-                await self.handle_faint(line)
-            elif "|error|" in line:
-                print(f"🚨 ERROR for {self.username}: {line}")
-                await self.debug_team_state()
-            elif "|nametaken|" in line:
-                print(f"❌ Name taken: {line}")
-                # Generate new username and retry
-                self.username = generate_random_username()
-                print(f"🔄 Trying new username: {self.username}")
+        lines = msg.split("\n")
+
+        # Frames addressed to a room start with ">roomid"; route them to its state
+        room = None
+        if lines and lines[0].startswith(">"):
+            room_id = lines[0][1:].strip()
+            lines = lines[1:]
+            room = self.rooms.get(room_id)
+            # Only a battle being set up opens a room; late frames of a battle
+            # we already left (|deinit|, chat) must not resurrect it
+            if room is None and room_id.startswith("battle-"):
+                if "|init|battle" in msg or "|request|" in msg:
+                    room = self.open_room(room_id)
+            if room is not None and room.record is not None:
+                room.record.frame(msg)
+
+        if room is not None and (room.decision is not None or room.held):
+            # A choice in progress sees the state its request left, however
+            # the tasks happen to be scheduled; the room's later frames wait
+            room.held.append(lines)
+            return
+        await self.dispatch_frame(room, lines)
+
+    async def dispatch_frame(self, room: Optional[BattleRoom], lines: list[str]):
+        room_profiler = self.profiler_for(room) if self.profilers else None
+        async with self.outbox.batch():
+            if room_profiler is None:
+                await self.dispatcher.dispatch_lines(room, lines)
+            else:
+                with room_profiler:
+                    await self.dispatcher.dispatch_lines(room, lines)
+
+    def profiler_for(self, room: Optional[BattleRoom]) -> Optional[RoomProfiler]:
+        if room is None:
+            return None
+        for room_profiler in self.profilers:
+            if room_profiler.claims(room.room_id):
+                return room_profiler
+        return None
+
+    def track_state(self, room, msg_type, args):
+        """Fold every battle line into the room's incremental state"""
+        if room is not None:
+            room.state.apply(msg_type, args)
+
+    async def on_challstr(self, room, args, line):
+        await self.handle_challstr(line)
+
+    async def on_updateuser(self, room, args, line):
+        if args and self.username.lower() in args[0].lower():
+            self.logged_in = True
+            self._login_attempts.clear()
+            if self._login_timer is not None:
+                self._login_timer.cancel()
+            self.log.info("✅ Logged in as %s", self.username)
+
+    async def on_init(self, room, args, line):
+        if room is not None and (room.turn or room.current_request):
+            # A rejoined room: the server replays it from the start
+            room.cancel_decision()
+            room.state = BattleState()
+            room.current_request = None
+            room.fainted_slots.clear()
+
+    async def on_noinit(self, room, args, line):
+        # Rejoining a room the server no longer has: the battle is over
+        if room is not None:
+            self.log.warning("⚠️ %s is gone: %s", room.room_id, line)
+            await self.close_room(room)
+
+    async def on_raw(self, room, args, line):
+        if THROTTLE_NOTICE in line:
+            self.health.throttle_notices += 1
+            self.log.warning("🐢 Server throttled a message")
+            if self.throttle is not None:
+                self.throttle.penalize()
+
+    def on_updatesearch(self, room, args, line):
+        self.log.debug("🔍 Searching...")
+
+    async def on_request(self, room, args, line):
+        if room is None:
+            self.log.warning("⚠️ Request outside a battle room, ignoring")
+            return
+        # The request is folded into the room's state here, in frame order;
+        # the choice is made in a task of its own, so a slow policy (a search
+        # in worker processes) doesn't hold up the frames of other rooms.
+        # The room's own later frames wait for it (see handle_message).
+        room.cancel_decision()
+        start = time.perf_counter()
+        legal = self.read_request(room, line)
+        if legal is not None:
+            room.request_recv = self._recv_time
+            room.decision = asyncio.create_task(self.decide(room, legal, start))
+
+    async def decide(self, room: BattleRoom, legal: ActionSet, start: float):
+        """Choose for the room's request within REQUEST_TIMEOUT and send it"""
+        # The choice runs outside the frame that asked for it, so a room's
+        # profiler is entered here too
+        room_profiler = self.profiler_for(room) if self.profilers else None
+        try:
+            if room_profiler is None:
+                await asyncio.wait_for(
+                    self.choose_and_send(room, legal), timeout=REQUEST_TIMEOUT
+                )
             else:
-                if line.strip() and not line.startswith(
-                    "|c|"
-                ):  # Filter out chat messages
-                    print(f"📬 {self.username} received: {line.strip()}")
+                with room_profiler:
+                    await asyncio.wait_for(
+                        self.choose_and_send(room, legal), timeout=REQUEST_TIMEOUT
+                    )
+        except asyncio.TimeoutError:
+            self.log.warning("⏰ Move timed out in %s, skipping turn.", room.room_id)
+        finally:
+            # Unless a newer decision already took this one's place
+            if room.decision is asyncio.current_task():
+                room.decision = None
+        elapsed = time.perf_counter() - start
+        room.decision_times.append(elapsed)
+        self.timings.record("decide", elapsed)
+        await self.release_frames(room)
+
+    async def release_frames(self, room: BattleRoom):
+        """Handle the frames held back while the room's choice was made"""
+        while room.held and room.decision is None and not room.finished:
+            lines = room.held.pop(0)
+            try:
+                await self.dispatch_frame(room, lines)
+            except Exception as e:
+                self.health.handler_errors += 1
+                self.log.exception("Error handling message: %s", e)
 
-    async def handle_faint(self, line: str):
+    async def settle(self):
+        """Wait until every room's choice in progress has been made and sent"""
+        while True:
+            pending = [room.decision for room in self.rooms.values() if room.decision]
+            if not pending:
+                return
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def on_battle_end(self, room, args, line):
+        winner = args[0].strip() if args else None
+        self.log.info("🏆 Winner: %s", winner)
+        if room is not None:
+            room.winner = winner
+            await self.close_room(room)
+
+    def on_turn(self, room, args, line):
+        self.log.debug("🔄 New turn started")
+
+    async def on_pm(self, room, args, line):
+        # |pm|SENDER|RECEIVER|MESSAGE
+        if len(args) < 3 or not args[2].startswith("/challenge"):
+            return
+        challenger = args[0].strip()
+        self.log.info("📬 Challenge received from %s", challenger)
+        if not self.has_capacity:
+            await self.command("", f"/reject {challenger}")
+            self.log.info(
+                "🚫 At %d battles, rejected %s", self.max_battles, challenger
+            )
+            return
+        await self.command("", f"/accept {challenger}")
+        self.log.info("✅ Accepted challenge from %s", challenger)
+
+    async def on_faint(self, room, args, line):
+        if room is not None:
+            await self.handle_faint(room, line)
+
+    async def on_error(self, room, args, line):
+        self.log.error("🚨 ERROR: %s", line)
+        if room is not None:
+            await self.debug_team_state(room)
+
+    async def on_nametaken(self, room, args, line):
+        self.log.warning("❌ Name taken: %s", line)
+        # Generate new username and retry
+        self.username = generate_random_username()
+        self.log.info("🔄 Trying new username: %s", self.username)
+        await self.next_login_attempt()
+
+    async def on_deinit(self, room, args, line):
+        if room is not None:
+            await self.close_room(room)
+
+    def ignore_line(self, room, args, line):
+        pass
+
+    def on_unhandled(self, room, args, line):
+        if line.strip():
+            self.log.debug("📬 Received: %s", line)
+
+    async def handle_faint(self, room: BattleRoom, line: str):
         """Better faint handling with proper slot tracking"""
         try:
             faint_data = line.strip().split("|faint|")[1].strip()
-            print(f"🔍 {self.username}: Raw faint data: {faint_data}")
+            self.log.debug("🔍 Raw faint data: %s", faint_data)
 
             if ":" in faint_data:
                 ident = faint_data.split(":")[0].strip()
@@ -162,56 +539,58 @@ class ShowdownBot:
                 player = ident[1]
                 slot_char = ident[2]
 
-                our_player = "1" if self.username.endswith("1") else "2"
+                if room.player_id:
+                    our_player = room.player_id[1]
+                else:
+                    our_player = "1" if self.username.endswith("1") else "2"
 
                 if player == our_player:
                     fainted_index = ord(slot_char) - ord("a")
-                    self.fainted_slots.add(fainted_index)
-                    print(
-                        f"☠️ {self.username}: Our Pokémon in slot {fainted_index} ({slot_char}) fainted."
+                    room.fainted_slots.add(fainted_index)
+                    self.log.info(
+                        "☠️ Our Pokémon in slot %d (%s) fainted.", fainted_index, slot_char
                     )
                 else:
-                    print(f"💀 {self.username}: Opponent's Pokémon fainted: {ident}")
+                    self.log.info("💀 Opponent's Pokémon fainted: %s", ident)
         except Exception as e:
-            print(f"❌ {self.username}: Error parsing faint: {e} | Line: {line}")
+            self.log.error("❌ Error parsing faint: %s | Line: %s", e, line)
 
-    async def debug_team_state(self):
+    async def debug_team_state(self, room: BattleRoom):
         """Debug function to log current team state"""
-        print(f"🔍 {self.username} DEBUG - Team State:")
-        print(f"   Fainted slots: {self.fainted_slots}")
-        if self.current_request:
-            side = self.current_request.get("side", {})
-            pokemon_list = side.get("pokemon", [])
-            for i, mon in enumerate(pokemon_list):
-                condition = mon.get("condition", "unknown")
-                active = mon.get("active", False)
-                ident = mon.get("ident", f"slot_{i}")
-                print(
-                    f"   Slot {i}: {ident} - Condition: {condition} - Active: {active}"
+        self.log.debug("🔍 DEBUG - Team State (%s):", room.room_id)
+        self.log.debug("   Fainted slots: %s", room.fainted_slots)
+        side = room.state.our_side
+        if side is not None:
+            for i, mon in enumerate(side.team):
+                self.log.debug(
+                    "   Slot %d: %s - HP: %d/%d %s - Active: %s",
+                    i,
+                    mon.name,
+                    mon.hp,
+                    mon.max_hp,
+                    mon.status,
+                    mon.active,
                 )
 
     async def handle_challstr(self, line: str):
         """Handle challstr and authenticate properly"""
         try:
             challstr_data = line.strip().split("|challstr|")[1]
-            print(f"🔑 {self.username}: Received challstr: {challstr_data[:50]}...")
+            self.log.debug("🔑 Received challstr: %.50s...", challstr_data)
 
             if self.is_official_server:
                 await self.authenticate_official_server(challstr_data)
             else:
                 # Local server - simple authentication
-                await self.ws.send(f"|/trn {self.username},0")
-                print(f"🔐 {self.username}: Sent simple login")
+                await self.command("", f"/trn {self.username},0")
+                self.log.info("🔐 Sent simple login")
 
         except Exception as e:
-            print(f"❌ Error in handle_challstr for {self.username}: {e}")
+            self.log.error("❌ Error in handle_challstr: %s", e)
 
     async def authenticate_official_server(self, challstr_data):
         """Authenticate with official Pokémon Showdown server"""
         try:
-            # Use the correct login server URL
-            login_url = "https://play.pokemonshowdown.com/~~showdown/action.php"
-
             # Prepare authentication data
             userid = self.username.lower().replace(" ", "")
 
@@ -219,652 +598,148 @@ class ShowdownBot:
             if userid.startswith("guest"):
                 self.username = generate_random_username()
                 userid = self.username.lower().replace(" ", "")
-                print(
-                    f"🔄 {self.username}: Generated new username to avoid 'guest' restriction"
+                self.log.info(
+                    "🔄 Generated new username %s to avoid 'guest' restriction",
+                    self.username,
                 )
 
-            data = {
-                "act": "getassertion",
-                "userid": userid,
-                "challstr": challstr_data,
-                "pass": "",  # Empty password for guest login
-            }
-
-            print(f"🔐 {self.username}: Requesting authentication...")
-
-            # Make request with proper headers
-            headers = {
-                "Content-Type": "application/x-www-form-urlencoded",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "Origin": "https://play.pokemonshowdown.com",
-                "Referer": "https://play.pokemonshowdown.com/",
-            }
-
-            response = requests.post(login_url, data=data, headers=headers, timeout=15)
-
-            if response.status_code == 200:
-                assertion = response.text.strip()
-
-                if assertion.startswith(";;"):
-                    # Error message from server
-                    print(f"❌ {self.username}: Server error: {assertion}")
-                    await self.fallback_guest_login()
-                    return
-
-                if len(assertion) > 10:  # Valid assertion should be longer
-                    print(f"✅ {self.username}: Received valid assertion")
-                    await self.ws.send(f"|/trn {self.username},0,{assertion}")
-                    print(f"🔐 {self.username}: Sent authentication with assertion")
-                else:
-                    print(
-                        f"❌ {self.username}: Invalid assertion received: {assertion}"
-                    )
-                    await self.fallback_guest_login()
-            else:
-                print(f"❌ {self.username}: HTTP error {response.status_code}")
-                await self.fallback_guest_login()
+            self.log.info("🔐 Requesting authentication...")
 
+            # The HTTP round trip runs off the event loop
+            client = self.login_client or get_default_client()
+            assertion = await client.get_assertion(userid, challstr_data)
+
+            self.log.info("✅ Received valid assertion")
+            await self.command("", f"/trn {self.username},0,{assertion}")
+            self.log.info("🔐 Sent authentication with assertion")
+
+        except LoginError as e:
+            self.log.error("❌ %s", e)
+            await self.fallback_guest_login()
         except Exception as e:
-            print(f"❌ {self.username}: Authentication error: {e}")
+            self.log.error("❌ Authentication error: %s", e)
             await self.fallback_guest_login()
 
     async def fallback_guest_login(self):
         """Fallback authentication method"""
+        self.log.info("🔄 Trying fallback authentication...")
+        # Try different approaches, one at a time: the next goes out when the
+        # server refuses the name (|nametaken|) or stays silent
+        self._login_attempts = ["trn", "nick", "new name"]
+        await self.next_login_attempt()
+
+    async def next_login_attempt(self):
+        if self._login_timer is not None:
+            self._login_timer.cancel()
+            self._login_timer = None
+        if self.logged_in or not self._login_attempts:
+            return
+        approach = self._login_attempts.pop(0)
+        if approach == "nick":
+            text = f"/nick {self.username}"
+        else:
+            if approach == "new name":
+                self.username = generate_random_username()
+            text = f"/trn {self.username},0"
         try:
-            print(f"🔄 {self.username}: Trying fallback authentication...")
-
-            # Try different approaches
-            approaches = [
-                f"|/trn {self.username},0",
-                f"|/nick {self.username}",
-                f"|/trn {generate_random_username()},0",
-            ]
-
-            for approach in approaches:
-                await self.ws.send(approach)
-                await asyncio.sleep(1)
-                print(f"🔄 {self.username}: Tried: {approach}")
-
+            await self.command("", text)
         except Exception as e:
-            print(f"❌ {self.username}: Fallback failed: {e}")
+            self.log.error("❌ Fallback failed: %s", e)
+            return
+        self.log.info("🔄 Tried: %s", text)
+        loop = asyncio.get_running_loop()
+        self._login_timer = loop.call_later(
+            LOGIN_ACK_TIMEOUT, lambda: asyncio.ensure_future(self.next_login_attempt())
+        )
 
     async def search_battle(self):
         """Start searching for battles"""
-        if self.packed_team:
-                # Send custom team with search
-            await self.ws.send(f"|/team {self.packed_team}")
-            await asyncio.sleep(1)  # Give the server a moment to process
-            # Then search for a battle
-            await self.ws.send(f"|/search {self.battle_format}")
-            print(
-                f"🔍 {self.username}: Started searching for {self.battle_format} battles with custom team"
+        if not self.has_capacity:
+            self.log.info("⏸️ Already in %d battles, not searching", len(self.rooms))
+            return
+
+        self.searching = True
+        if self.team is not None:
+            # Send custom team with search; the server runs a frame's commands
+            # in order, so both can go in one
+            async with self.outbox.batch():
+                await self.command("", f"/utm {self.team.pack()}")
+                await self.command("", f"/search {self.battle_format}")
+            self.log.info(
+                "🔍 Started searching for %s battles with custom team",
+                self.battle_format,
             )
         else:
             # Send regular search for random battles
-            await self.ws.send(f"|/search {self.battle_format}")
-            print(
-                f"🔍 {self.username}: Started searching for {self.battle_format} battles"
-            )
+            await self.command("", f"/search {self.battle_format}")
+            self.log.info("🔍 Started searching for %s battles", self.battle_format)
+        if self.health.first_search is None:
+            self.health.first_search = time.monotonic()
 
         # Fallback challenge system for testing
         if not self.is_official_server:
             asyncio.create_task(self.fallback_battle())
 
-    async def handle_battle_request(self, line: str):
+    def read_request(self, room: BattleRoom, line: str) -> Optional[ActionSet]:
+        """Fold a |request| into the room; its legal actions if it wants a choice"""
         try:
-            request_json = json.loads(line.split("|request|")[1])
-            self.current_request = request_json
+            with self.timings.span("json_parse"):
+                request_json = self.requests.decode(
+                    line.split("|request|", 1)[1], room.room_id
+                )
+            room.current_request = request_json
+            room.state.update_from_request(request_json)
 
             # Initialize team data
-            if not self.team and "side" in request_json:
-                self.team = request_json["side"].get("pokemon", [])
-                print(
-                    f"📋 {self.username}: Team initialized with {len(self.team)} Pokémon"
+            if not room.team and "side" in request_json:
+                room.team = request_json["side"].get("pokemon", [])
+                self.log.info(
+                    "📋 Team initialized with %d Pokémon in %s",
+                    len(room.team),
+                    room.room_id,
                 )
 
-            # Handle forced switch (single or double)
-            if request_json.get("forceSwitch"):
-                await self.choose_switch_doubles(request_json)
-                return
+            # Opponent is still choosing (e.g. their forced switch)
+            if request_json.get("wait"):
+                return None
 
-            if not request_json.get("active"):
-                print(f"⚠️ {self.username}: No active pokemon data")
-                return
-
-            active_pokemon = request_json["active"]
-            side = request_json.get("side", {})
-            pokemon_list = side.get("pokemon", [])
+            if not request_json.get("forceSwitch") and not request_json.get("active"):
+                self.log.warning("⚠️ No active pokemon data")
+                return None
 
-            if not pokemon_list:
-                print(f"⚠️ {self.username}: No pokemon in side data")
-                return
-
-            # Detect battle format (single vs double)
-            is_double_battle = len(active_pokemon) > 1
-
-            if is_double_battle:
-                await self.handle_double_battle_moves(active_pokemon, pokemon_list)
-            else:
-                await self.handle_single_battle_moves(active_pokemon[0], pokemon_list)
+            return legal_actions(request_json, room.state)
 
         except Exception as e:
-            print(f"❌ {self.username}: Battle request error: {e}")
-
-    async def handle_single_battle_moves(self, active, pokemon_list):
-        """Handle move selection for single battles (original logic)"""
-        current_pokemon = pokemon_list[0]
-        pokemon_name = current_pokemon.get("details", "???").split(",")[0]
-        condition = current_pokemon.get("condition", "100/100")
+            self.log.exception("❌ Battle request error: %s", e)
+            return None
 
-        # Parse HP
+    async def choose_and_send(self, room: BattleRoom, legal: ActionSet):
         try:
-            if "/" in condition:
-                current_hp = int(condition.split("/")[0].split(" ")[-1])
-            else:
-                current_hp = 0 if condition == "0 fnt" else 100
-        except (ValueError, IndexError):
-            current_hp = 100
-
-        moves = active.get("moves", [])
-
-        # Decide whether to switch
-        should_switch = current_hp <= 20 or not any(
-            not m.get("disabled", False) for m in moves
-        )
-
-        if should_switch:
-            valid_switch = await self.find_valid_switch_target(pokemon_list)
-            if valid_switch is not None:
-                await self.ws.send(f"{self.battle_room}|/choose switch {valid_switch}")
-                print(f"🔄 {self.username}: Switched to slot {valid_switch}")
-                return
-
-        # Choose a move
-        legal_moves = [
-            i for i, move in enumerate(moves) if not move.get("disabled", False)
-        ]
-
-        if legal_moves:
-            choice_index = random.choice(legal_moves)
-            move_name = moves[choice_index]["move"]
-            await self.ws.send(f"{self.battle_room}|/choose move {choice_index + 1}")
-            print(f"⚡ {self.username}: Used {move_name}")
-        else:
-            print(f"❌ {self.username}: No legal moves available!")
-
-    async def handle_double_battle_moves(self, active_pokemon, pokemon_list):
-        """Handle move selection for double battles"""
-        print(
-            f"{self.username}: Processing double battle with {len(active_pokemon)} active Pokemon"
-        )
-
-        move_choices = []
-
-        for slot_index, active in enumerate(active_pokemon):
-            slot_number = slot_index + 1
-
-            # Get current Pokemon info
-            if slot_index < len(pokemon_list):
-                current_pokemon = pokemon_list[slot_index]
-                pokemon_name = current_pokemon.get("details", "???").split(",")[0]
-                condition = current_pokemon.get("condition", "100/100")
-            else:
-                pokemon_name = "Unknown"
-                condition = "100/100"
-
-            # SKIP if Pokemon is fainted
-            if condition.startswith("0") or "fnt" in condition.lower():
-                print(
-                    f"{self.username}: Slot {slot_number} ({pokemon_name}) is fainted, skipping"
-                )
-                continue  # Don't add any command for this slot
-
-            # Parse HP for switching decision
-            try:
-                if "/" in condition:
-                    current_hp = int(condition.split("/")[0].split(" ")[-1])
-                else:
-                    current_hp = 0 if condition == "0 fnt" else 100
-            except (ValueError, IndexError):
-                current_hp = 100
-
-            moves = active.get("moves", [])
-
-            # Check if we should switch this Pokemon
-            should_switch = current_hp <= 15 or not any(  # Lower threshold for doubles
-                not m.get("disabled", False) for m in moves
-            )
-
-            if should_switch:
-                valid_switch = await self.find_valid_switch_target(
-                    pokemon_list, exclude_active=True
-                )
-                if valid_switch is not None:
-                    move_choices.append(f"switch {valid_switch}")
-                    print(
-                        f"{self.username}: Slot {slot_number} ({pokemon_name}) switching to slot {valid_switch}"
-                    )
-                    continue
-
-            # Find legal moves
-            legal_moves = [
-                i for i, move in enumerate(moves) if not move.get("disabled", False)
-            ]
-
-            if legal_moves:
-                # Choose random move
-                choice_index = random.choice(legal_moves)
-                move_data = moves[choice_index]
-                move_name = move_data["move"]
-                move_number = choice_index + 1
-
-                # Determine if move needs a target based on move data
-                target_info = self.determine_move_target(move_data, slot_index)
-
-                if target_info["needs_target"]:
-                    move_choices.append(f"move {move_number} {target_info['target']}")
-                    print(
-                        f"{self.username}: Slot {slot_number} ({pokemon_name}) using {move_name} targeting {target_info['description']}"
-                    )
-                else:
-                    move_choices.append(f"move {move_number}")
-                    print(
-                        f"{self.username}: Slot {slot_number} ({pokemon_name}) using {move_name} (no target needed)"
-                    )
-            else:
-                # No legal moves available - use default
-                move_choices.append("move 0")
-                print(
-                    f"{self.username}: Slot {slot_number} ({pokemon_name}) has no legal moves, using default"
+            with self.timings.span("policy"):
+                choice = await self.policy.choose(
+                    room.state, room.current_request, legal
                 )
+            if choice is None:
+                self.log.warning("❌ %s policy made no choice", self.policy.name)
+                return
+            await self.send_choice(room, choice)
 
-        # Send the combined command
-        if move_choices:
-            command = ", ".join(move_choices)
-            await self.ws.send(f"{self.battle_room}|/choose {command}")
-            print(f"{self.username}: Sent double battle command: {command}")
-        else:
-            print(
-                f"{self.username}: No moves generated for double battle (all Pokemon fainted)!"
-            )
-
-    async def choose_switch_doubles(self, request_json):
-        """Handle forced switches for both single and double battles"""
-        force_switch = request_json.get("forceSwitch", [])
-        side = request_json.get("side", {})
-        pokemon_list = side.get("pokemon", [])
-
-        # Handle both single (boolean) and double (list) force switch formats
-        if isinstance(force_switch, bool):
-            # Single battle format
-            if force_switch:
-                print(f"🔄 {self.username}: Forced to switch (single battle)!")
-                valid_switch = await self.find_valid_switch_target(pokemon_list)
-                if valid_switch is not None:
-                    await self.ws.send(
-                        f"{self.battle_room}|/choose switch {valid_switch}"
-                    )
-                    print(f"✅ {self.username}: Switched to slot {valid_switch}")
-                else:
-                    await self.ws.send(f"{self.battle_room}|/choose switch 2")
-                    print(f"🆘 {self.username}: Emergency switch to slot 2")
-        else:
-            # Double battle format (list of booleans)
-            print(
-                f"🔄 {self.username}: Forced to switch (double battle): {force_switch}"
-            )
-            switch_choices = []
-            used_switch_slots = (
-                set()
-            )  # Track which slots we've already used for switching
-
-            for slot_index, must_switch in enumerate(force_switch):
-                if must_switch:
-                    valid_switch = await self.find_valid_switch_target_doubles(
-                        pokemon_list, used_switch_slots
-                    )
-                    if valid_switch is not None:
-                        switch_choices.append(f"switch {valid_switch}")
-                        used_switch_slots.add(valid_switch)
-                        print(
-                            f"✅ {self.username}: Slot {slot_index + 1} switching to slot {valid_switch}"
-                        )
-                    else:
-                        # Emergency switch - find any available slot
-                        for emergency_slot in range(
-                            3, len(pokemon_list) + 1
-                        ):  # Start from slot 3
-                            if emergency_slot not in used_switch_slots:
-                                switch_choices.append(f"switch {emergency_slot}")
-                                used_switch_slots.add(emergency_slot)
-                                print(
-                                    f"🆘 {self.username}: Emergency switch slot {slot_index + 1} to slot {emergency_slot}"
-                                )
-                                break
-                        else:
-                            # Last resort - use any slot
-                            emergency_slot = len(pokemon_list)
-                            switch_choices.append(f"switch {emergency_slot}")
-                            print(
-                                f"🆘 {self.username}: Final emergency switch slot {slot_index + 1} to slot {emergency_slot}"
-                            )
-                else:
-                    # This slot doesn't need to switch - send pass command
-                    switch_choices.append("pass")
-                    print(
-                        f"⏭️ {self.username}: Slot {slot_index + 1} not switching (pass)"
-                    )
-
-            if switch_choices:
-                command = ", ".join(switch_choices)
-                await self.ws.send(f"{self.battle_room}|/choose {command}")
-                print(f"📤 {self.username}: Sent double switch command: {command}")
-
-    async def find_valid_switch_target_doubles(self, pokemon_list, used_slots):
-        """Find a valid switch target, avoiding already used slots"""
-        for i, mon in enumerate(pokemon_list):
-            slot_number = i + 1
-            condition = mon.get("condition", "")
-            active = mon.get("active", False)
-
-            # Skip if Pokemon is fainted
-            if condition.startswith("0") or "fnt" in condition.lower():
-                continue
-
-            # Skip if Pokemon is currently active
-            if active:
-                continue
-
-            # Skip if this slot is already being used for switching
-            if slot_number in used_slots:
-                continue
-
-            print(f"🎯 {self.username}: Valid switch target - Slot {slot_number}")
-            return slot_number
-
-        return None
-
-    async def find_valid_switch_target(self, pokemon_list, exclude_active=False):
-        """Find a pokemon to switch to, with option to exclude currently active Pokemon"""
-        for i, mon in enumerate(pokemon_list):
-            condition = mon.get("condition", "")
-            active = mon.get("active", False)
-
-            # Skip if Pokemon is fainted
-            if condition.startswith("0") or "fnt" in condition.lower():
-                continue
-
-            # Skip if Pokemon is currently active (for doubles)
-            if exclude_active and active:
-                continue
-
-            # Skip if this is the current active Pokemon (for singles)
-            if not exclude_active and active:
-                continue
-
-            print(f"🎯 {self.username}: Valid switch target - Slot {i+1}")
-            return i + 1
-
-        return None
-
-    async def choose_switch(self, request_json):
-        """Handle forced switches"""
-        print(f"🔄 {self.username}: Forced to switch!")
-
-        side = request_json.get("side", {})
-        pokemon_list = side.get("pokemon", [])
-
-        valid_switch = await self.find_valid_switch_target(pokemon_list)
-        if valid_switch is not None:
-            await self.ws.send(f"{self.battle_room}|/choose switch {valid_switch}")
-            print(f"✅ {self.username}: Switched to slot {valid_switch}")
-        else:
-            # Emergency switch
-            await self.ws.send(f"{self.battle_room}|/choose switch 2")
-            print(f"🆘 {self.username}: Emergency switch to slot 2")
-
-    def determine_move_target(self, move_data, user_slot):
-        """Determine appropriate target for a move based on its properties"""
-        target = move_data.get("target", "normal")
-        move_name = move_data.get("move", "").lower()
-
-        # Moves that don't need targets (self-targeting, field effects, etc.)
-        no_target_moves = {
-            "tailwind",
-            "trickroom",
-            "reflect",
-            "lightscreen",
-            "safeguard",
-            "mist",
-            "haze",
-            "defog",
-            "rapidspin",
-            "spikes",
-            "toxicspikes",
-            "stealthrock",
-            "stickyweb",
-            "healingwish",
-            "lunardance",
-            "memento",
-            "explosion",
-            "selfdestruct",
-            "perishsong",
-            "aromatherapy",
-            "healbell",
-            "substitute",
-            "protect",
-            "detect",
-            "endure",
-            "focuspunch",
-            "rest",
-            "sleeptalk",
-            "snore",
-            "curse",
-            "bellydrum",
-            "swordsdance",
-            "nastyplot",
-            "calmmind",
-            "agility",
-            "rockpolish",
-            "dragondance",
-            "quiverdance",
-            "shellsmash",
-            "growth",
-            "workup",
-            "bulkup",
-            "howl",
-            "meditate",
-            "sharpen",
-            "defensecurl",
-            "withdraw",
-            "harden",
-            "acidarmor",
-            "barrier",
-            "amnesia",
-            "stockpile",
-            "swallow",
-            "spitup",
-            "bide",
-            "counter",
-            "mirrorcoat",
-            "transform",
-            "sketch",
-            "mimic",
-            "copycat",
-            "mefirst",
-            "assist",
-            "metronome",
-            "sleeptalk",
-            "batonpass",
-            "roar",
-            "whirlwind",
-            "teleport",
-            "uturn",
-            "voltswitch",
-            "partingshot",
-            "healingwish",
-            "earthquake",
-            "surf",
-            "discharge",
-            "dazzlinggleam",
-            "heatwave",
-            "blizzard",
-            "lavaplume",
-            "mudslap",
-            "rockslide",
-            "bulldoze",
-            "iciclespear",
-            "bonemerang",
-            "doublekick",
-            "twineedle",
-            "furyattack",
-            "pinmissile",
-            "spikecannon",
-            "barrage",
-            "eggbomb",
-            "swift",
-            "magicalleaf",
-            "shockwave",
-            "aerialace",
-            "feintattack",
-            "shadowpunch",
-            "vitalthrow",
-            "magneticflux",
-            "geomancy",
-            "floralhealing",
-            "strengthsap",
-            "moonlight",
-            "synthesis",
-            "morningsun",
-            "recover",
-            "softboiled",
-            "milkdrink",
-            "healorder",
-            "slackoff",
-            "roost",
-            "wish",
-            "refresh",
-            "naturalgift",
-            "cosmicpower",
-            "charge",
-            "stockpile",
-            "ingrain",
-        }
-
-        # Ally-targeting moves
-        ally_moves = {
-            "helpinghand",
-            "followme",
-            "ragepowder",
-            "spotlight",
-            "afteryou",
-            "quash",
-            "powder",
-            "aromatherapy",
-            "healbell",
-            "wish",
-            "lifedew",
-            "pollenpuff",
-            "floralhealing",
-            "strengthsap",
-            "junglehealing",
-            "matblock",
-            "quickguard",
-            "wideguard",
-            "craftyshield",
-            "allyswitch",
-        }
-
-        # Wide-hitting moves that hit multiple targets (no specific target needed)
-        spread_moves = {
-            "earthquake",
-            "surf",
-            "discharge",
-            "dazzlinggleam",
-            "heatwave",
-            "blizzard",
-            "lavaplume",
-            "mudslap",
-            "rockslide",
-            "bulldoze",
-            "sludgebomb",
-            "sludgewave",
-            "airslash",
-            "razorleaf",
-            "petaldance",
-            "selfdestruct",
-            "explosion",
-            "boomburst",
-            "hypervoice",
-            "round",
-            "echoedvoice",
-            "uproar",
-            "perishsong",
-            "healbell",
-            "aromatherapy",
-        }
-
-        # Check move name first
-        if move_name in no_target_moves or move_name in spread_moves:
-            return {"needs_target": False, "target": None, "description": "no target"}
-
-        if move_name in ally_moves:
-            # Target ally (the other active Pokemon on our side)
-            # In doubles: slot 0 targets slot 1 (right ally = +1), slot 1 targets slot 0 (left ally = -1)
-            ally_slot = 1 if user_slot == 0 else -1
-            return {
-                "needs_target": True,
-                "target": ally_slot,
-                "description": f"ally slot {ally_slot}",
-            }
-
-        # Check target property from move data
-        if target in [
-            "self",
-            "all",
-            "allAdjacent",
-            "allAdjacentFoes",
-            "allySide",
-            "foeSide",
-            "field",
-        ]:
-            return {
-                "needs_target": False,
-                "target": None,
-                "description": f"area effect ({target})",
-            }
-
-        if target in ["adjacentAlly", "ally"]:
-            ally_slot = 1 if user_slot == 0 else -1
-            return {
-                "needs_target": True,
-                "target": ally_slot,
-                "description": f"ally slot {ally_slot}",
-            }
-
-        if target in ["adjacentFoe", "normal", "any", "randomNormal"]:
-            # Target random opponent
-            opponent_target = random.choice(
-                [1, 2]
-            )  # 1 = opponent left, 2 = opponent right
-            return {
-                "needs_target": True,
-                "target": opponent_target,
-                "description": f"opponent slot {opponent_target}",
-            }
-
-        # Default case - target random opponent
-        opponent_target = random.choice([1, 2])
-        return {
-            "needs_target": True,
-            "target": opponent_target,
-            "description": f"opponent slot {opponent_target} (default)",
-        }
+        except Exception as e:
+            self.log.exception("❌ Battle request error: %s", e)
+
+    async def send_choice(self, room: BattleRoom, choice: str):
+        """Send "/choose <choice>" to a room, timing the send and recv-to-send"""
+        with self.timings.span("send"):
+            # A choice doesn't wait for the rest of the frame to be handled
+            await self.command(room.room_id, f"/choose {choice}")
+            await self.outbox.flush()
+        if room.record is not None:
+            room.record.choice(choice)
+        if self.timings.enabled and room.request_recv:
+            self.timings.record("recv_to_send", time.perf_counter() - room.request_recv)
 
     async def fallback_battle(self):
         """Fallback battle system for local testing"""
         await asyncio.sleep(15)
         if not self.battle_started:
-            print(
-                f"⚠️ {self.username}: No battle found, this is normal on official server"
-            )
+            self.log.info("⚠️ No battle found, this is normal on official server")
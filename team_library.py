@@ -0,0 +1,283 @@
+"""Team library: every team a bot played, with its record, in SQLite.
+
+The team is what the first |request| of a battle lists under side.pokemon:
+species, level, moves, item, abilities, tera type and stats. Battle-time
+fields (HP, active, terastallized) are dropped, so the same team played in
+another battle or by another bot lands on the same row. Rows are kept per
+format with games, wins and ties, and are indexed by species.
+
+Writes go through a queue to a writer thread that commits them in batches,
+so recording a finished battle costs the event loop one queue put. Reads
+(find) use their own connection; call them off the loop or offline:
+
+    python team_library.py teams/library.sqlite3 [--species Garchomp]
+                           [--format gen9randombattle] [--min-games 5]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Iterable, NamedTuple, Optional
+
+from move_index import to_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join("teams", "library.sqlite3")
+
+# Per-battle fields of side.pokemon that say nothing about the team
+_TRANSIENT = ("condition", "active", "terastallized", "commanding", "reviving")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS teams (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    format TEXT NOT NULL,
+    username TEXT NOT NULL,
+    pokemon TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    games INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    ties INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (key, format)
+);
+CREATE TABLE IF NOT EXISTS team_species (
+    team_id INTEGER NOT NULL REFERENCES teams (id),
+    species TEXT NOT NULL,
+    PRIMARY KEY (species, team_id)
+);
+CREATE INDEX IF NOT EXISTS teams_format ON teams (format, games);
+"""
+
+_UPSERT = """
+INSERT INTO teams (key, format, username, pokemon, first_seen, last_seen,
+                   games, wins, ties)
+VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+ON CONFLICT (key, format) DO UPDATE SET
+    last_seen = excluded.last_seen,
+    games = games + 1,
+    wins = wins + excluded.wins,
+    ties = ties + excluded.ties
+RETURNING id
+"""
+
+
+class TeamRecord(NamedTuple):
+    id: int
+    format: str
+    username: str  # the first bot seen with the team
+    pokemon: list[dict]
+    games: int
+    wins: int
+    ties: int
+
+    @property
+    def species(self) -> list[str]:
+        return [species_of(mon) for mon in self.pokemon]
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+
+def species_of(mon: dict) -> str:
+    return mon.get("details", "").split(",")[0]
+
+
+def normalize_team(pokemon: Iterable[dict]) -> list[dict]:
+    """side.pokemon without per-battle fields; max HP goes into stats"""
+    team = []
+    for mon in pokemon:
+        entry = {k: v for k, v in mon.items() if k not in _TRANSIENT}
+        ident = entry.get("ident", "")
+        # "p1: Nick" -> "Nick": the side is per battle
+        entry["ident"] = ident.split(": ", 1)[-1]
+        max_hp = mon.get("condition", "").split(" ")[0].partition("/")[2]
+        if max_hp.isdigit():
+            entry["stats"] = {"hp": int(max_hp), **entry.get("stats", {})}
+        team.append(entry)
+    return team
+
+
+def team_key(team: list[dict]) -> str:
+    """Content hash of a normalized team, independent of slot order"""
+    entries = sorted(json.dumps(mon, sort_keys=True) for mon in team)
+    return hashlib.sha1("\n".join(entries).encode()).hexdigest()
+
+
+class TeamLibrary:
+    """Records teams and their results; shareable between bots in a process.
+
+    Several processes can write one database (SQLite locks it per batch).
+    Call close() when done; it waits for queued writes.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+    ):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        # A batch is committed this long after its first write at the latest
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.batches = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+        db.close()
+        self._thread = threading.Thread(
+            target=self._write_loop, name="team-library", daemon=True
+        )
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def record(
+        self,
+        username: str,
+        battle_format: str,
+        pokemon: list[dict],
+        won: bool,
+        tie: bool = False,
+    ):
+        """Queue one finished battle's team and result"""
+        if pokemon:
+            self._queue.put((username, battle_format, pokemon, won, tie, time.time()))
+
+    def flush(self):
+        """Wait until everything queued so far is committed"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _write_loop(self):
+        db = self._connect()
+        try:
+            running = True
+            while running:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while batch[-1] is not None and len(batch) < self.batch_size:
+                    if isinstance(batch[-1], threading.Event):
+                        break
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=timeout))
+                    except queue.Empty:
+                        break
+                rows = [item for item in batch if isinstance(item, tuple)]
+                if rows:
+                    try:
+                        with db:
+                            for row in rows:
+                                self._write(db, *row)
+                    except sqlite3.Error as e:
+                        # Lose this batch, not the writer
+                        logger.error("❌ Failed to store %d teams: %s", len(rows), e)
+                    else:
+                        self.written += len(rows)
+                        self.batches += 1
+                for item in batch:
+                    if item is None:
+                        running = False
+                    elif isinstance(item, threading.Event):
+                        item.set()
+        finally:
+            db.close()
+
+    def _write(self, db, username, battle_format, pokemon, won, tie, seen):
+        team = normalize_team(pokemon)
+        (team_id,) = db.execute(
+            _UPSERT,
+            (
+                team_key(team),
+                battle_format,
+                username,
+                json.dumps(team, separators=(",", ":")),
+                seen,
+                seen,
+                int(won),
+                int(tie),
+            ),
+        ).fetchone()
+        db.executemany(
+            "INSERT OR IGNORE INTO team_species (team_id, species) VALUES (?, ?)",
+            [(team_id, to_id(species_of(mon))) for mon in team],
+        )
+
+    def find(
+        self,
+        species: Iterable[str] = (),
+        battle_format: Optional[str] = None,
+        min_games: int = 0,
+        limit: int = 20,
+    ) -> list[TeamRecord]:
+        """Teams with all of species, best win rate first"""
+        sql = ["SELECT id, format, username, pokemon, games, wins, ties FROM teams"]
+        where, params = ["games >= ?"], [min_games]
+        if battle_format:
+            where.append("format = ?")
+            params.append(battle_format)
+        for name in species:
+            where.append("id IN (SELECT team_id FROM team_species WHERE species = ?)")
+            params.append(to_id(name))
+        sql.append("WHERE " + " AND ".join(where))
+        sql.append("ORDER BY CAST(wins AS REAL) / games DESC, games DESC LIMIT ?")
+        params.append(limit)
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            rows = db.execute(" ".join(sql), params).fetchall()
+        finally:
+            db.close()
+        return [
+            TeamRecord(id_, fmt, user, json.loads(pokemon), games, wins, ties)
+            for id_, fmt, user, pokemon, games, wins, ties in rows
+        ]
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--species", action="append", default=[])
+    parser.add_argument("--format", default=None)
+    parser.add_argument("--min-games", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    library = TeamLibrary(args.path)
+    try:
+        records = library.find(args.species, args.format, args.min_games, args.limit)
+    finally:
+        library.close()
+    for record in records:
+        print(
+            f"{record.win_rate:6.1%} of {record.games:>4} games  {record.format:<22}"
+            f" {', '.join(record.species)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
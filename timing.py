@@ -0,0 +1,203 @@
+"""Per-phase decision timing: HDR-style histograms, spans and room profiling."""
+
+import contextlib
+import json
+import time
+from typing import Optional
+
+# Phases ShowdownBot times around each |request|
+PHASES = (
+    "decide",  # from |request| to the choice sent
+    "json_parse",
+    "switch_search",
+    "target_select",
+    "damage_score",
+    "policy",  # the whole policy.choose call
+    "send",
+    "recv_to_send",  # frame received -> /choose written
+)
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Histogram:
+    """Log-linear latency histogram in microseconds, like HdrHistogram.
+
+    Values below 2**sub_bits us get a bucket each; above that every power of
+    two is split into 2**(sub_bits - 1) buckets, so any recorded value is
+    reported to within 1/2**(sub_bits - 1) of its true size (under 1% at the
+    default) while the bucket count grows only with log(max).
+    """
+
+    def __init__(self, sub_bits: int = 8):
+        self.sub_bits = sub_bits
+        self._half = 1 << (sub_bits - 1)
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        shift = value.bit_length() - self.sub_bits
+        if shift <= 0:
+            return value
+        return shift * self._half + (value >> shift)
+
+    def _lower(self, index: int) -> int:
+        if index < 2 * self._half:
+            return index
+        shift = index // self._half - 1
+        return (index - shift * self._half) << shift
+
+    def _upper(self, index: int) -> int:
+        return self._lower(index + 1) - 1
+
+    def record(self, seconds: float):
+        value = max(0, int(seconds * 1e6))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        if not self.count or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> int:
+        """Upper edge of the bucket holding the q-th (0-100) percentile, in us"""
+        if not self.count:
+            return 0
+        rank = max(1, int(round(q / 100 * self.count)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._upper(index), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "min_us": self.min,
+            "mean_us": round(self.mean, 1),
+            "p50_us": self.percentile(50),
+            "p90_us": self.percentile(90),
+            "p99_us": self.percentile(99),
+            "p999_us": self.percentile(99.9),
+            "max_us": self.max,
+            # lower bucket edge (us) -> count
+            "buckets": {
+                str(self._lower(index)): self.counts[index]
+                for index in sorted(self.counts)
+            },
+        }
+
+
+class _Span:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter() - self.start)
+        return False
+
+
+class Timings:
+    """A bot's histograms, one per phase.
+
+    Disabled timings hand out a shared no-op context manager from span() and
+    ignore record(), so the instrumented code costs one attribute check.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.histograms: dict[str, Histogram] = {}
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def span(self, name: str):
+        """with timings.span("json_parse"): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self.histogram(name))
+
+    def record(self, name: str, seconds: float):
+        if self.enabled:
+            self.histogram(name).record(seconds)
+
+    def to_dict(self) -> dict:
+        return {name: h.to_dict() for name, h in self.histograms.items()}
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def report(self) -> str:
+        """Fixed-width table of every phase, known phases first"""
+        names = [p for p in PHASES if p in self.histograms]
+        names += sorted(set(self.histograms) - set(PHASES))
+        lines = [
+            f"{'phase':<14}{'count':>8}{'mean':>10}{'p50':>9}{'p90':>9}"
+            f"{'p99':>9}{'max':>10}  (us)"
+        ]
+        for name in names:
+            h = self.histograms[name]
+            lines.append(
+                f"{name:<14}{h.count:>8}{h.mean:>10.1f}{h.percentile(50):>9}"
+                f"{h.percentile(90):>9}{h.percentile(99):>9}{h.max:>10}"
+            )
+        return "\n".join(lines)
+
+
+class RoomProfiler:
+    """Profile message handling and decisions for one battle room.
+
+    profiler is anything with enable()/disable(), cProfile.Profile by default;
+    sampling profilers can be adapted with a small wrapper. When the room
+    closes the stats go to path (if set) via the profiler's dump_stats().
+    A decision is profiled for as long as it runs, which includes whatever
+    other rooms do while it awaits a search.
+    """
+
+    def __init__(self, match: str, profiler=None, path: Optional[str] = None):
+        if profiler is None:
+            import cProfile
+
+            profiler = cProfile.Profile()
+        self.match = match
+        self.profiler = profiler
+        self.path = path
+        self.room_id: Optional[str] = None
+
+    def claims(self, room_id: str) -> bool:
+        """Attach to the first room whose id contains match, and only that one"""
+        if self.room_id is None and self.match in room_id:
+            self.room_id = room_id
+        return self.room_id == room_id
+
+    def __enter__(self):
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.disable()
+        return False
+
+    def finish(self):
+        if self.path and hasattr(self.profiler, "dump_stats"):
+            self.profiler.dump_stats(self.path)
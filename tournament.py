@@ -0,0 +1,298 @@
+"""Self-play tournament: many bot pairs across a pool of worker processes.
+
+Each worker process runs one event loop holding its share of the pairs.
+Every pair gets its own in-process LocalShowdownServer, so the two bots
+always meet each other, and the bots disconnect after their games. Results
+come back to the parent, which prints a summary table.
+
+    python tournament.py [--pairs 8] [--workers 4] [--games 10] [--format gen9randombattle]
+                         [--policy-a heuristic] [--policy-b random] [--cache-slots 0]
+                         [--replay-dir DIR] [--battles-per-file 1000]
+                         [--team-library PATH]
+
+With --cache-slots, workers share cached policy decisions through a table of
+that many slots in shared memory (see eval_cache). With --replay-dir, every
+worker records its battles there (see replay_log). With --team-library,
+every team played and its results go into that SQLite file (see
+team_library).
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+from battle_room import GameResult
+from eval_cache import SharedEvalTable, get_eval_cache
+from local_server import LocalShowdownServer
+from log_config import configure_logging
+from mcts import close_search_pool, get_search_pool
+from policy import POLICIES, Policy, make_policy
+from replay_log import ReplayRecorder
+from team_library import TeamLibrary
+from showdown_bot import ShowdownBot
+
+SEATS = ("A", "B")
+
+
+class PairResult(NamedTuple):
+    pair: int
+    seat: str
+    results: list[GameResult]
+
+
+class WorkerReport(NamedTuple):
+    worker: int
+    elapsed: float
+    pairs: list[PairResult]
+    cache: dict  # EvalCache.stats() of the worker process
+
+
+async def play_pair(
+    pair: int,
+    games: int,
+    battle_format: str,
+    seed: Optional[int],
+    max_turns: int,
+    policies: dict[str, Policy],
+    recorder: Optional[ReplayRecorder] = None,
+    library: Optional[TeamLibrary] = None,
+) -> list[PairResult]:
+    """Play one pair's games on a private local server"""
+    async with LocalShowdownServer(port=0, seed=seed, max_turns=max_turns) as server:
+        bots = [
+            ShowdownBot(
+                f"pair{pair}{seat.lower()}",
+                ws_url=server.ws_url,
+                battle_format=battle_format,
+                max_games=games,
+                policy=policies[seat],
+                recorder=recorder,
+                team_library=library,
+            )
+            for seat in SEATS
+        ]
+        await asyncio.gather(*(bot.connect_and_run() for bot in bots))
+    return [PairResult(pair, seat, bot.results) for seat, bot in zip(SEATS, bots)]
+
+
+def run_worker(
+    worker: int,
+    pairs: list[int],
+    games: int,
+    battle_format: str,
+    seed: Optional[int],
+    max_turns: int,
+    policy_names: tuple[str, str],
+    shared_cache: Optional[str] = None,
+    replay_dir: Optional[str] = None,
+    battles_per_file: int = 1000,
+    team_library: Optional[str] = None,
+    quiet: bool = True,
+    search_processes: Optional[int] = None,
+) -> WorkerReport:
+    """Process pool entry point: one event loop for all of this worker's pairs"""
+    configure_logging(quiet=quiet)
+    # Searches get this worker's share of the CPUs, not a pool of all of them
+    get_search_pool(search_processes)
+    cache = get_eval_cache()
+    if shared_cache is not None and cache.shared is None:
+        cache.shared = SharedEvalTable(shared_cache)
+    recorder = ReplayRecorder(replay_dir, battles_per_file) if replay_dir else None
+    library = TeamLibrary(team_library) if team_library else None
+    # One policy object per seat, shared by every bot in this process so that
+    # batched policies see all of the worker's decisions
+    policies = {seat: make_policy(name) for seat, name in zip(SEATS, policy_names)}
+
+    async def play_all():
+        reports = await asyncio.gather(
+            *(
+                play_pair(
+                    pair,
+                    games,
+                    battle_format,
+                    None if seed is None else seed + pair,
+                    max_turns,
+                    policies,
+                    recorder,
+                    library,
+                )
+                for pair in pairs
+            )
+        )
+        return [result for report in reports for result in report]
+
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(play_all())
+    finally:
+        close_search_pool()
+        if recorder is not None:
+            recorder.close()
+        if library is not None:
+            library.close()
+    return WorkerReport(worker, time.perf_counter() - start, results, cache.stats())
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(
+    reports: list[WorkerReport], wall: float, policy_names: tuple[str, str]
+) -> str:
+    """Render per-seat results and throughput as a text table"""
+    rows = []
+    games = 0
+    for seat, policy_name in zip(SEATS, policy_names):
+        played = [
+            result
+            for report in reports
+            for pair in report.pairs
+            if pair.seat == seat
+            for result in pair.results
+        ]
+        wins = sum(result.won for result in played)
+        ties = sum(result.winner is None for result in played)
+        losses = len(played) - wins - ties
+        turns = [result.turns for result in played]
+        latency = [t for result in played for t in result.decision_times]
+        rows.append(
+            (
+                f"{seat} {policy_name}",
+                len(played),
+                wins,
+                losses,
+                ties,
+                wins / len(played) * 100 if played else 0.0,
+                sum(turns) / len(turns) if turns else 0.0,
+                sum(latency) / len(latency) * 1e3 if latency else 0.0,
+                percentile(latency, 0.5) * 1e3,
+                percentile(latency, 0.99) * 1e3,
+            )
+        )
+        games = max(games, len(played))
+
+    header = (
+        f"{'seat':<17}{'games':>7}{'wins':>7}{'losses':>8}{'ties':>6}"
+        f"{'win%':>7}{'turns':>7}{'mean ms':>11}{'p50 ms':>11}{'p99 ms':>11}"
+    )
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            # Latency columns fit searches of up to ~100s: 99999.999
+            f"{row[0]:<17}{row[1]:>7}{row[2]:>7}{row[3]:>8}{row[4]:>6}"
+            f"{row[5]:>7.1f}{row[6]:>7.1f}{row[7]:>11.3f}{row[8]:>11.3f}{row[9]:>11.3f}"
+        )
+    lines.append("")
+    lines.append(
+        f"{games} games in {wall:.2f}s across {len(reports)} workers: "
+        f"{games / wall if wall else 0.0:.1f} games/s"
+    )
+    for report in sorted(reports, key=lambda r: r.worker):
+        worker_games = sum(len(p.results) for p in report.pairs if p.seat == SEATS[0])
+        lines.append(
+            f"  worker {report.worker}: {worker_games} games in {report.elapsed:.2f}s"
+        )
+        cache = report.cache
+        if cache["lookups"]:
+            lines.append(
+                f"    cache: {cache['hit_rate']:.1%} of {cache['lookups']} lookups hit"
+                f" ({cache['hits']} local, {cache['shared_hits']} shared),"
+                f" {cache['entries']} entries"
+            )
+    return "\n".join(lines)
+
+
+def run_tournament(
+    pairs: int,
+    workers: int,
+    games: int,
+    battle_format: str = "gen9randombattle",
+    seed: Optional[int] = None,
+    max_turns: int = 300,
+    policy_names: tuple[str, str] = ("heuristic", "heuristic"),
+    cache_slots: int = 0,
+    replay_dir: Optional[str] = None,
+    battles_per_file: int = 1000,
+    team_library: Optional[str] = None,
+    quiet: bool = True,
+) -> tuple[list[WorkerReport], float]:
+    """Spread pairs round-robin over worker processes and wait for all of them"""
+    workers = max(1, min(workers, pairs))
+    assignments = [list(range(w, pairs, workers)) for w in range(workers)]
+    shared = SharedEvalTable(slots=cache_slots) if cache_slots > 0 else None
+    search_processes = max(1, (os.cpu_count() or 1) // workers)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                run_worker,
+                w,
+                assigned,
+                games,
+                battle_format,
+                seed,
+                max_turns,
+                policy_names,
+                shared.name if shared is not None else None,
+                replay_dir,
+                battles_per_file,
+                team_library,
+                quiet,
+                search_processes,
+            )
+            for w, assigned in enumerate(assignments)
+        ]
+        try:
+            reports = [future.result() for future in futures]
+        finally:
+            if shared is not None:
+                shared.close()
+    return reports, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play tournament runner")
+    parser.add_argument("--pairs", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--games", type=int, default=10, help="games per pair")
+    parser.add_argument("--format", default="gen9randombattle")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-turns", type=int, default=300)
+    parser.add_argument("--policy-a", choices=sorted(POLICIES), default="heuristic")
+    parser.add_argument("--policy-b", choices=sorted(POLICIES), default="heuristic")
+    parser.add_argument("--cache-slots", type=int, default=0)
+    parser.add_argument("--replay-dir")
+    parser.add_argument("--battles-per-file", type=int, default=1000)
+    parser.add_argument("--team-library")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    configure_logging(quiet=not args.verbose)
+    policy_names = (args.policy_a, args.policy_b)
+    reports, wall = run_tournament(
+        args.pairs,
+        args.workers,
+        args.games,
+        args.format,
+        args.seed,
+        args.max_turns,
+        policy_names,
+        cache_slots=args.cache_slots,
+        replay_dir=args.replay_dir,
+        battles_per_file=args.battles_per_file,
+        team_library=args.team_library,
+        quiet=not args.verbose,
+    )
+    print(summarize(reports, wall, policy_names))
+
+
+if __name__ == "__main__":
+    main()
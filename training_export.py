@@ -0,0 +1,420 @@
+"""Export recorded battles as fixed-width training arrays.
+
+Every decision in a replay log becomes one row of (features, legal actions,
+chosen action, outcome). Rows come from re-running the battle through a
+real ShowdownBot with a policy that hands back the recorded choices, so the
+features are built from exactly what a policy sees in read_request:
+the tracked BattleState, the |request| and the legal ActionSet.
+
+Columns, one .npy file each per shard:
+
+    features  float32 [n, len(FEATURES)]   see feature_names()
+    legal     uint8   [n, SLOTS, ACTIONS]  1 where a slot's option is legal
+    action    int16   [n, SLOTS]           chosen option per slot, -1 if none
+    outcome   int8    [n]                  +1 won, -1 lost, 0 tie/unfinished
+    turn      int16   [n]
+    game      int64   [n]                  hash of (room, player)
+
+A row is only written once its turn's log has been applied: turn >= 1 and
+a foe Pokémon out. Decisions that fail this (from recordings made while the
+local server sent requests ahead of the log) are counted in the manifest's
+"skipped" instead of becoming rows whose features the choice never saw.
+
+Options are numbered per slot: 0 pass, 1-6 switch to team member 1-6, then
+moves as 7 + (move * len(TARGETS) + target) * len(GIMMICK_WORDS) + gimmick.
+Input files are split across worker processes, each streaming battles into
+its own shards; manifest.json lists them. load_shards() opens a directory
+with mmap, so training jobs read rows without copying or parsing JSON.
+
+    python training_export.py replays/*.sdrl --out export/ [--workers 4]
+"""
+
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+from actions import ActionSet, parse_option
+from battle_state import BOOST_STATS, BattleState, PokemonState, SideState
+from log_config import configure_logging
+from move_index import SPREAD_TARGETS, get_move
+from policy import Policy
+from pokedex import STATS, get_species, load_type_chart
+from replay_reader import RecordedBattle, iter_battles, replay
+from showdown_bot import ShowdownBot
+
+SLOTS = 2  # active slots encoded; singles leave the second empty
+TEAM_SIZE = 6
+MOVES = 4
+TARGETS = (None, 1, 2, -1, -2)
+GIMMICK_WORDS = ("", "terastallize", "mega")
+MOVE_BASE = 1 + TEAM_SIZE
+ACTIONS = MOVE_BASE + MOVES * len(TARGETS) * len(GIMMICK_WORDS)
+
+WEATHERS = (
+    "RainDance",
+    "SunnyDay",
+    "Sandstorm",
+    "Snow",
+    "Hail",
+    "DesolateLand",
+    "PrimordialSea",
+    "DeltaStream",
+)
+TERRAINS = ("Electric Terrain", "Grassy Terrain", "Misty Terrain", "Psychic Terrain")
+PSEUDO_WEATHERS = ("Trick Room", "Gravity")
+SIDE_CONDITIONS = (
+    "Stealth Rock",
+    "Spikes",
+    "Toxic Spikes",
+    "Sticky Web",
+    "Reflect",
+    "Light Screen",
+    "Aurora Veil",
+    "Tailwind",
+)
+STATUSES = ("brn", "par", "psn", "tox", "slp", "frz")
+CATEGORIES = ("Physical", "Special", "Status")
+
+COLUMNS = ("features", "legal", "action", "outcome", "turn", "game")
+
+
+@functools.lru_cache(maxsize=None)
+def type_names() -> tuple[str, ...]:
+    return tuple(sorted(load_type_chart()))
+
+
+@functools.lru_cache(maxsize=None)
+def feature_names() -> tuple[str, ...]:
+    """Name of every feature column, in order"""
+    types = type_names()
+    names = ["turn", "doubles"]
+    names += [f"weather:{w}" for w in WEATHERS]
+    names += [f"terrain:{t}" for t in TERRAINS]
+    names += [f"field:{p}" for p in PSEUDO_WEATHERS]
+    mon = ["present", "hp", "fainted"]
+    mon += [f"active:{slot}" for slot in range(SLOTS)]
+    mon += [f"status:{s}" for s in STATUSES]
+    mon += [f"boost:{b}" for b in BOOST_STATS]
+    mon += [f"type:{t}" for t in types]
+    mon += [f"base:{s}" for s in STATS]
+    mon += ["level", "terastallized"]
+    move = ["present", "power", "accuracy", "priority"]
+    move += [f"category:{c}" for c in CATEGORIES]
+    move += [f"type:{t}" for t in types]
+    move += ["spread", "disabled", "pp"]
+    for side in ("our", "foe"):
+        names += [f"{side}:side:{c}" for c in SIDE_CONDITIONS]
+        for i in range(TEAM_SIZE):
+            names += [f"{side}:mon{i}:{f}" for f in mon]
+    for slot in range(SLOTS):
+        for i in range(MOVES):
+            names += [f"slot{slot}:move{i}:{f}" for f in move]
+    return tuple(names)
+
+
+def action_index(option: tuple) -> int:
+    """Per-slot option -> its column in legal / value in action, -1 if unencodable"""
+    if option[0] == "pass":
+        return 0
+    if option[0] == "switch":
+        return 1 + option[1] if option[1] < TEAM_SIZE else -1
+    move, target = option[1], option[2]
+    gimmick = option[3] if len(option) > 3 else ""
+    if move >= MOVES or target not in TARGETS or gimmick not in GIMMICK_WORDS:
+        return -1
+    cell = move * len(TARGETS) + TARGETS.index(target)
+    return MOVE_BASE + cell * len(GIMMICK_WORDS) + GIMMICK_WORDS.index(gimmick)
+
+
+def _mon_types(mon: PokemonState) -> tuple[str, ...]:
+    if mon.terastallized and mon.tera_type:
+        return (mon.tera_type,)
+    species = get_species(mon.species)
+    return species.types if species else ()
+
+
+def _encode_mon(row, at: int, mon: PokemonState, side: SideState, types: dict):
+    row[at] = 1.0
+    row[at + 1] = mon.hp_fraction
+    row[at + 2] = mon.fainted
+    at += 3
+    for slot in range(SLOTS):
+        row[at + slot] = side.active[slot] is mon
+    at += SLOTS
+    if mon.status in STATUSES:
+        row[at + STATUSES.index(mon.status)] = 1.0
+    at += len(STATUSES)
+    for i, stage in enumerate(mon.boosts):
+        row[at + i] = stage / 6
+    at += len(BOOST_STATS)
+    for name in _mon_types(mon):
+        if name in types:
+            row[at + types[name]] = 1.0
+    at += len(types)
+    species = get_species(mon.species)
+    if species is not None:
+        for i, base in enumerate(species.base_stats):
+            row[at + i] = base / 255
+    at += len(STATS)
+    row[at] = mon.level / 100
+    row[at + 1] = mon.terastallized
+
+
+def _encode_move(row, at: int, move: dict, types: dict):
+    info = get_move(move.get("id") or move.get("move", ""))
+    row[at] = 1.0
+    if info is not None:
+        row[at + 1] = info.base_power / 250
+        row[at + 2] = 1.0 if info.accuracy is True else info.accuracy / 100
+        row[at + 3] = info.priority / 5
+        if info.category in CATEGORIES:
+            row[at + 4 + CATEGORIES.index(info.category)] = 1.0
+        if info.type in types:
+            row[at + 4 + len(CATEGORIES) + types[info.type]] = 1.0
+    at += 4 + len(CATEGORIES) + len(types)
+    target = move.get("target") or (info.target if info else "")
+    row[at] = target in SPREAD_TARGETS
+    row[at + 1] = bool(move.get("disabled"))
+    row[at + 2] = move.get("pp", 1) / move["maxpp"] if move.get("maxpp") else 1.0
+
+
+def encode_features(row, state: BattleState, request: dict):
+    """Fill a zeroed float32 row from the tracked state and the request"""
+    types = {name: i for i, name in enumerate(type_names())}
+    row[0] = state.turn / 100
+    row[1] = state.gametype != "singles"
+    at = 2
+    if state.weather in WEATHERS:
+        row[at + WEATHERS.index(state.weather)] = 1.0
+    at += len(WEATHERS)
+    if state.terrain in TERRAINS:
+        row[at + TERRAINS.index(state.terrain)] = 1.0
+    at += len(TERRAINS)
+    for i, name in enumerate(PSEUDO_WEATHERS):
+        row[at + i] = name in state.pseudo_weather
+    at += len(PSEUDO_WEATHERS)
+
+    mon_width = 3 + SLOTS + len(STATUSES) + len(BOOST_STATS) + len(types) + 8
+    for side, ours in ((state.our_side, True), (state.foe_side, False)):
+        if side is not None:
+            for i, name in enumerate(SIDE_CONDITIONS):
+                row[at + i] = side.conditions.get(name, 0)
+        at += len(SIDE_CONDITIONS)
+        if side is not None:
+            mons = side.team if ours else list(side.pokemon.values())
+            for i, mon in enumerate(mons[:TEAM_SIZE]):
+                _encode_mon(row, at + i * mon_width, mon, side, types)
+        at += TEAM_SIZE * mon_width
+
+    move_width = 7 + len(CATEGORIES) + len(types)
+    for slot, slot_request in enumerate(request.get("active", [])[:SLOTS]):
+        for i, move in enumerate(slot_request.get("moves", [])[:MOVES]):
+            _encode_move(row, at + (slot * MOVES + i) * move_width, move, types)
+
+
+def encode_legal(out, legal: ActionSet):
+    """Mark every option a slot takes in at least one legal joint action"""
+    for slot in range(min(legal.width, SLOTS)):
+        for option_id in set(legal.table[slot :: legal.width]):
+            column = action_index(legal.options[option_id])
+            if column >= 0:
+                out[slot, column] = 1
+
+
+def encode_action(out, choice: str):
+    out[:] = -1
+    for slot, part in enumerate(choice.split(",")[:SLOTS]):
+        option = parse_option(part.strip())
+        if option is not None:
+            out[slot] = action_index(option)
+
+
+def row_problem(state: BattleState) -> Optional[str]:
+    """Why a decision's state can't make a row, None if it can"""
+    if state.turn < 1:
+        return "before turn 1"
+    if state.foe_side is None or not state.foe_side.active_pokemon():
+        return "no foe active"
+    return None
+
+
+def game_id(meta: dict) -> int:
+    key = f"{meta.get('room_id')}|{meta.get('username')}".encode()
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class ShardWriter:
+    """Fills preallocated column arrays and saves them as .npy shards when full"""
+
+    def __init__(self, directory: str, prefix: str, rows_per_shard: int):
+        self.directory = directory
+        self.prefix = prefix
+        self.rows_per_shard = rows_per_shard
+        self.shards: list[dict] = []
+        self.skipped: dict[str, int] = {}  # reason -> decisions not written
+        self.rows = 0  # in the current shard
+        self.columns = {
+            "features": np.zeros((rows_per_shard, len(feature_names())), np.float32),
+            "legal": np.zeros((rows_per_shard, SLOTS, ACTIONS), np.uint8),
+            "action": np.full((rows_per_shard, SLOTS), -1, np.int16),
+            "outcome": np.zeros(rows_per_shard, np.int8),
+            "turn": np.zeros(rows_per_shard, np.int16),
+            "game": np.zeros(rows_per_shard, np.int64),
+        }
+
+    def add(self, state, request, legal, choice: str, outcome: int, game: int):
+        problem = row_problem(state)
+        if problem is not None:
+            self.skipped[problem] = self.skipped.get(problem, 0) + 1
+            return
+        i = self.rows
+        columns = self.columns
+        encode_features(columns["features"][i], state, request)
+        encode_legal(columns["legal"][i], legal)
+        encode_action(columns["action"][i], choice)
+        columns["outcome"][i] = outcome
+        columns["turn"][i] = state.turn
+        columns["game"][i] = game
+        self.rows += 1
+        if self.rows == self.rows_per_shard:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        name = f"{self.prefix}-{len(self.shards):05d}"
+        for column, array in self.columns.items():
+            path = os.path.join(self.directory, f"{name}.{column}.npy")
+            np.save(path, array[: self.rows])
+        self.shards.append({"name": name, "rows": self.rows})
+        for column, array in self.columns.items():
+            array.fill(-1 if column == "action" else 0)
+        self.rows = 0
+
+
+class _ReplayPolicy(Policy):
+    """Answers with the recorded choices, in order, exporting each decision"""
+
+    name = "replay"
+
+    def __init__(self, battle: RecordedBattle, writer: ShardWriter):
+        self.choices = iter(battle.choices)
+        self.writer = writer
+        won, winner = battle.meta.get("won"), battle.meta.get("winner")
+        self.outcome = 1 if won else (0 if winner is None else -1)
+        self.game = game_id(battle.meta)
+
+    async def choose(self, state, request, legal):
+        choice = next(self.choices, None)
+        if choice is not None:
+            self.writer.add(state, request, legal, choice, self.outcome, self.game)
+        return choice
+
+
+async def _export_battles(battles: Iterator[RecordedBattle], writer: ShardWriter):
+    for battle in battles:
+        policy = _ReplayPolicy(battle, writer)
+        bot = ShowdownBot(battle.meta.get("username"), policy=policy)
+        await replay(bot, battle.frames)
+
+
+def export_worker(
+    paths: list[str], directory: str, prefix: str, rows_per_shard: int
+) -> tuple[list[dict], dict[str, int]]:
+    """Process pool entry point: stream some input files into our own shards"""
+    configure_logging(quiet=True)
+    writer = ShardWriter(directory, prefix, rows_per_shard)
+    asyncio.run(_export_battles(iter_battles(paths), writer))
+    writer.flush()
+    return writer.shards, writer.skipped
+
+
+def export(
+    paths: list[str], directory: str, workers: int = 1, rows_per_shard: int = 65536
+) -> dict:
+    """Export replay logs into shards under directory; returns the manifest"""
+    if np is None:
+        raise RuntimeError("training export needs numpy")
+    os.makedirs(directory, exist_ok=True)
+    workers = max(1, min(workers, len(paths)))
+    assignments = [paths[w::workers] for w in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                export_worker, assigned, directory, f"shard{w:03d}", rows_per_shard
+            )
+            for w, assigned in enumerate(assignments)
+        ]
+        shards, skipped = [], {}
+        for future in futures:
+            worker_shards, worker_skipped = future.result()
+            shards += worker_shards
+            for problem, count in worker_skipped.items():
+                skipped[problem] = skipped.get(problem, 0) + count
+    manifest = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sources": len(paths),
+        "rows": sum(shard["rows"] for shard in shards),
+        "skipped": skipped,
+        "columns": list(COLUMNS),
+        "features": list(feature_names()),
+        "slots": SLOTS,
+        "actions": ACTIONS,
+        "shards": shards,
+    }
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_shards(directory: str) -> Iterator[dict]:
+    """Column name -> read-only memory-mapped array, one dict per shard"""
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    for shard in manifest["shards"]:
+        yield {
+            column: np.load(
+                os.path.join(directory, f"{shard['name']}.{column}.npy"), mmap_mode="r"
+            )
+            for column in manifest["columns"]
+        }
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--rows-per-shard", type=int, default=65536)
+    args = parser.parse_args(argv)
+    configure_logging(quiet=True)
+
+    start = time.perf_counter()
+    manifest = export(args.paths, args.out, args.workers, args.rows_per_shard)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{manifest['rows']} decisions from {manifest['sources']} files into "
+        f"{len(manifest['shards'])} shards in {elapsed:.2f}s "
+        f"({manifest['rows'] / max(elapsed, 1e-9):,.0f} rows/s)"
+    )
+    if manifest["skipped"]:
+        print(
+            "skipped decisions made before their turn's log: "
+            + ", ".join(f"{n} {why}" for why, n in manifest["skipped"].items())
+        )
+
+
+if __name__ == "__main__":
+    main()